@@ -2,7 +2,14 @@ import os
 import re
 from typing import Dict, Any
 from pydantic import BaseModel
-from openai import OpenAI, AzureOpenAI
+
+from app.core.clients import get_openai_client
+
+
+# Groups generation requests so the provider routes them to the same prompt cache
+REPORT_PROMPT_CACHE_KEY = "report-generation"
+
+REPORT_SYSTEM_PROMPT = "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."
 
 
 class ReportResult(BaseModel):
@@ -12,6 +19,7 @@ class ReportResult(BaseModel):
     report_summary: str
     status: str = "completed"
 
+
 def get_sample_report() -> str:
     """
     Get the exact sample report template used for report generation.
@@ -95,65 +103,8 @@ def get_sample_report() -> str:
         """
 
 
-def generate_report_content(transcript: str, company_data: Dict[str, Any], 
-                          meeting_notes: str = "", additional_instructions: str = "",
-                          api_config: Dict[str, Any] = None) -> ReportResult:
-    """
-    Tool function to generate comprehensive consultation reports using the original 3-step process (3 API calls to LLM).
-
-    Step 1: Generating main sections
-    Step 2: Generation expert recommendations
-    
-    Args:
-        transcript: Meeting transcript text
-        company_data: Company information dictionary
-        meeting_notes: Additional meeting notes (optional)
-        additional_instructions: Special instructions (optional)
-        api_config: API configuration dictionary
-        
-    Returns:
-        ReportResult: Generated report with content and summary
-    """
-    if not transcript or not company_data:
-        raise ValueError("Missing required inputs: transcript and company_data")
-    
-    print(f"Generating report for company: {company_data.get('company_name', 'Unknown')}")
-    
-    # Combine all context for the report (preserve original logic)
-    full_context = "\nMEETING TRANSCRIPT:\n\n"
-    full_context += transcript
-    if meeting_notes:
-        full_context += "\n\nADDITIONAL MEETING NOTES:\n" + meeting_notes
-    
-    if additional_instructions:
-        full_context += "\n\n ADDITIONAL INSTRUCTIONS:\n\n" + additional_instructions
-
-    if api_config.get('model','gpt-5.1').startswith("gpt-5"):
-        full_context += "\n\n ADDITIONAL INSTRUCTIONS: \n\n" + """
-        - Unless you are generating "Recommendation" section, do not create bulleted points and/or sub-sections in other sections. Avoid including unnecessary or overlapping details in the sections. Keep them concise, while covering all important details.
-        - **VERY IMPORTANT:** If you are generating "Recommendation" section, strictly follow the format of the recommendations as given in the sample report. Create just one level of bullet points. DO NOT create any sub-points or sub-sections. 
-        """
-        
-    # Generate the report using the 3-step process
-    report_content = _generate_report(full_context, company_data, api_config)
-    
-    # Generate a report summary 
-    report_summary = _extract_report_summary(report_content, api_config)
-    
-    print("Report generation completed successfully")
-    
-    return ReportResult(
-        report_content=report_content,
-        company_data=company_data,
-        report_summary=report_summary
-    )
-
-
-def _generate_report(full_context: str, company_data: Dict[str, Any], 
-                                         api_config: Dict[str, Any]) -> str:
-    """Generate report content using the original 3-step process with exact prompts."""
-    
-    sample_report = """
+# Format reference sent with both generation calls (company header plus the sample sections)
+GENERATION_SAMPLE_REPORT = """
         AI ASSESSMENT AND CONSULTATION
 
         Company Name: TechNova Oy
@@ -239,6 +190,68 @@ def _generate_report(full_context: str, company_data: Dict[str, Any],
                     assistance with specific technical details or when developing
                     new AI applications on top of their existing solutions.
         """
+
+
+def generate_report_content(transcript: str, company_data: Dict[str, Any], 
+                          meeting_notes: str = "", additional_instructions: str = "",
+                          api_config: Dict[str, Any] = None) -> ReportResult:
+    """
+    Tool function to generate comprehensive consultation reports using the original 3-step process (3 API calls to LLM).
+
+    Step 1: Generating main sections
+    Step 2: Generation expert recommendations
+    
+    Args:
+        transcript: Meeting transcript text
+        company_data: Company information dictionary
+        meeting_notes: Additional meeting notes (optional)
+        additional_instructions: Special instructions (optional)
+        api_config: API configuration dictionary
+        
+    Returns:
+        ReportResult: Generated report with content and summary
+    """
+    if not transcript or not company_data:
+        raise ValueError("Missing required inputs: transcript and company_data")
+    
+    print(f"Generating report for company: {company_data.get('company_name', 'Unknown')}")
+    
+    # Combine all context for the report (preserve original logic)
+    full_context = "\nMEETING TRANSCRIPT:\n\n"
+    full_context += transcript
+    if meeting_notes:
+        full_context += "\n\nADDITIONAL MEETING NOTES:\n" + meeting_notes
+    
+    if additional_instructions:
+        full_context += "\n\n ADDITIONAL INSTRUCTIONS:\n\n" + additional_instructions
+
+    if api_config.get('model','gpt-5.1').startswith("gpt-5"):
+        full_context += "\n\n ADDITIONAL INSTRUCTIONS: \n\n" + """
+        - Unless you are generating "Recommendation" section, do not create bulleted points and/or sub-sections in other sections. Avoid including unnecessary or overlapping details in the sections. Keep them concise, while covering all important details.
+        - **VERY IMPORTANT:** If you are generating "Recommendation" section, strictly follow the format of the recommendations as given in the sample report. Create just one level of bullet points. DO NOT create any sub-points or sub-sections. 
+        """
+        
+    # Generate the report using the 3-step process
+    report_content = _generate_report(full_context, company_data, api_config)
+    
+    # Generate a report summary 
+    report_summary = _extract_report_summary(report_content, api_config)
+    
+    print("Report generation completed successfully")
+    
+    return ReportResult(
+        report_content=report_content,
+        company_data=company_data,
+        report_summary=report_summary
+    )
+
+
+def _generate_report(full_context: str, company_data: Dict[str, Any], 
+                                         api_config: Dict[str, Any]) -> str:
+    """Generate report content using the original 3-step process with exact prompts."""
+    
+    sample_report = GENERATION_SAMPLE_REPORT
+
     
     # Step 1: Generate main sections 
     main_sections = _generate_main_sections(full_context, company_data, sample_report, api_config)
@@ -337,20 +350,14 @@ def _generate_main_sections(full_context, company_data, sample_report, api_confi
     9. **Expectations from FAIR Services:**
     - Describe what they expect from the consultation
 
-    Here is the example report format to follow (VERY IMPORTANT):
-    {sample_report}
-    
-    Use this meeting context to generate the report:
-    \"\"\"
-    {full_context}
-    \"\"\"
+    Follow the example report format and use the meeting context given in the system message to generate the report.
             
     Generate only the sections listed above following the exact format from the example. Keep language business-focused, concise, and professional. Do NOT include Recommendations sections.
     
     IMPORTANT: Provide your response as plain text without any markdown code blocks (no ``` or similar formatting).
     """
     
-    return _call_llm(prompt, api_config, temperature=0.0)
+    return _call_llm(prompt, api_config, temperature=0.0, context=_build_generation_context(full_context, sample_report))
 
 
 def _generate_recommendations_section(full_context, company_data, sample_report, api_config, main_sections):
@@ -404,13 +411,7 @@ def _generate_recommendations_section(full_context, company_data, sample_report,
     - Make recommendations specific, insightful, and tailored to the company's unique situation
     - Make sure the recommendations are comprehensive and cover everything AI experts recommended in the transcript and the meeting notes. Make sure that no opinion, suggestion, or recommendation present in the overall context is left out.
 
-    Here is the example report format to follow (VERY IMPORTANT):
-    {sample_report}
-    
-    Use this meeting context to generate the recommendations:
-    \"\"\"
-    {full_context}
-    \"\"\"
+    Follow the example report format and use the meeting context given in the system message to generate the recommendations.
     
     REPORT SECTIONS ALREADY GENERATED:
     {main_sections}
@@ -420,7 +421,56 @@ def _generate_recommendations_section(full_context, company_data, sample_report,
     IMPORTANT: Provide your response as plain text without any markdown code blocks (no ``` or similar formatting).
     """
     
-    return _call_llm(prompt, api_config, temperature=0.0)
+    return _call_llm(prompt, api_config, temperature=0.0, context=_build_generation_context(full_context, sample_report))
+
+
+def _build_generation_context(full_context: str, sample_report: str) -> str:
+    """
+    Sample report and meeting context shared by both generation calls.
+
+    Sent at the start of the system message so the recommendations call reuses the
+    provider's cached prefix from the main sections call.
+    """
+    return _generation_context_prefix(sample_report) + f"""
+    Meeting context:
+    \"\"\"
+    {full_context}
+    \"\"\"
+    """
+
+
+def _generation_context_prefix(sample_report: str) -> str:
+    """The transcript-independent head of the generation context."""
+    return f"""
+
+    Here is the example report format to follow (VERY IMPORTANT):
+    {sample_report}
+    """
+
+
+def prefill_report_context(api_config: Dict[str, Any]) -> None:
+    """
+    Send the transcript-independent generation prefix so the provider caches it.
+
+    Run while the recording is being transcribed; the first generation call then
+    starts from a cached system prompt and sample report instead of a cold prefill.
+    """
+    client = get_openai_client(api_config)
+    model = api_config.get('model')
+    messages = [
+        {"role": "system", "content": REPORT_SYSTEM_PROMPT + _generation_context_prefix(GENERATION_SAMPLE_REPORT)},
+        {"role": "user", "content": "Reply with OK."}
+    ]
+    if model.startswith("gpt-5"):
+        client.chat.completions.create(
+            model=model, messages=messages, max_completion_tokens=16,
+            reasoning_effort=api_config.get('reasoning_effort', 'low'), prompt_cache_key=REPORT_PROMPT_CACHE_KEY
+        )
+    else:
+        client.chat.completions.create(
+            model=model, messages=messages, max_tokens=1, temperature=0.0,
+            prompt_cache_key=REPORT_PROMPT_CACHE_KEY
+        )
 
 
 def _extract_report_summary(report_content: str, api_config: Dict[str, Any]) -> str:
@@ -439,20 +489,14 @@ def _extract_report_summary(report_content: str, api_config: Dict[str, Any]) ->
     return ' '.join(summary_lines)[:500] + "..." if len(' '.join(summary_lines)) > 500 else ' '.join(summary_lines)
 
 
-def _call_llm(prompt: str, api_config: Dict[str, Any], max_tokens: int = 16000, temperature: float = 0.0) -> str:
-    """Make LLM API call using original configuration."""
+def _call_llm(prompt: str, api_config: Dict[str, Any], max_tokens: int = 16000, temperature: float = 0.0,
+              context: str = "") -> str:
+    """Make LLM API call using original configuration; context is appended to the system message."""
     
     if not api_config:
         raise ValueError("API configuration is required")
     
-    if api_config.get('use_azure', False):
-        client = AzureOpenAI(
-            api_key=api_config.get('api_key',''),
-            azure_endpoint=api_config.get('azure_endpoint', ''),
-            api_version=api_config.get('api_version', '2025-03-01-preview')
-        )
-    else:
-        client = OpenAI(api_key=api_config.get('api_key'))
+    client = get_openai_client(api_config)
     
     model = api_config.get('model')
     if model.startswith("gpt-5"):
@@ -460,22 +504,24 @@ def _call_llm(prompt: str, api_config: Dict[str, Any], max_tokens: int = 16000,
         response = client.chat.completions.create(
             model = model,
             messages=[
-                {"role": "system", "content": "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."},
+                {"role": "system", "content": REPORT_SYSTEM_PROMPT + context},
                 {"role": "user", "content": prompt}
             ],
             max_completion_tokens = api_config.get('max_completion_tokens',4000),
             reasoning_effort = api_config.get('reasoning_effort', 'low'),
-            verbosity = api_config.get('verbosity', 'low')
+            verbosity = api_config.get('verbosity', 'low'),
+            prompt_cache_key = REPORT_PROMPT_CACHE_KEY
         )
     else:
         # non-reasoning model: use standard parameters
         response = client.chat.completions.create(
             model = model,
             messages=[
-                {"role": "system", "content": "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."},
+                {"role": "system", "content": REPORT_SYSTEM_PROMPT + context},
                 {"role": "user", "content": prompt}
             ],
-            temperature = 0.0
+            temperature = 0.0,
+            prompt_cache_key = REPORT_PROMPT_CACHE_KEY
         )
     
     raw_content = response.choices[0].message.content
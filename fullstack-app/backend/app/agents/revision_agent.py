@@ -2,7 +2,59 @@ import re
 import json
 from typing import Dict, Any, Optional, List, Tuple
 from pydantic import BaseModel
-from openai import OpenAI, AzureOpenAI
+
+from app.core.clients import get_openai_client
+
+
+REVISION_SYSTEM_PROMPT = "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."
+
+# Rules shared by every section revision call, kept byte-identical for prompt caching
+SECTION_REVISION_INSTRUCTIONS = """
+
+You are an expert report editor. You improve one report section at a time based on specific feedback.
+
+CRITICAL REQUIREMENTS FOR SUB-SECTION TARGETING:
+
+1. **SURGICAL PRECISION REQUIRED**: This section may contain multiple paragraphs or bullet points. The listed issues likely affect only SOME of these parts, not all.
+
+2. **IDENTIFY PROBLEMATIC PARTS ONLY**:
+   - Read through the section and identify which specific paragraphs/sentences/bullets are directly related to the issues
+   - Map each issue to the specific part(s) of the section that need modification
+
+3. **PRESERVE UNCHANGED CONTENT VERBATIM**:
+   - For paragraphs/sentences/bullets that are NOT related to any of the issues: Keep them EXACTLY as they are
+   - DO NOT rephrase, rewrite, or "improve" content that doesn't address the specific issues
+   - Copy unchanged parts word-for-word from the original
+
+4. **MODIFY ONLY PROBLEMATIC PARTS**:
+   - ONLY modify the specific paragraphs/sentences/bullets that directly address the issues
+   - If an issue mentions "data labeling", only modify the part about data labeling
+   - If an issue mentions "missing information about X", only add/modify content about X
+
+5. **RECONSTRUCTION**:
+   - Combine the preserved unchanged parts (verbatim) with the modified parts
+   - Maintain the original section structure and flow
+   - Keep the section heading exactly as given in the request
+
+6. **FORMAT AND STYLE**:
+   - Maintain the professional tone and markdown formatting
+   - Preserve factual information that isn't flagged as incorrect
+   - DO NOT use markdown code blocks (```) in your response
+
+7. **OUTPUT**: Return the complete section with:
+   - Unchanged parts: EXACT copies from original
+   - Modified parts: Improved to address the specific issues
+   - Section heading: as given in the request
+
+EXAMPLE APPROACH:
+- Parse section into parts (paragraphs/bullets)
+- For each part: Does it relate to any issue?
+  - YES → Modify it to address the issue
+  - NO → Copy it verbatim (word-for-word)
+- Combine all parts in original order
+
+IMPORTANT: Your response should be plain text without any markdown code block formatting (no ``` or similar).
+"""
 
 
 class RevisionResult(BaseModel):
@@ -103,9 +155,9 @@ def _perform_targeted_revision(report_content: str, issues: List[Dict], suggesti
     # Parse report into sections
     sections = _parse_report_sections(report_content)
     
-    # Group issues by section for targeted fixing
-    issues_by_section = _group_issues_by_section(issues)
-    suggestions_by_section = _group_suggestions_by_section(suggestions)
+    # Group issues by section for targeted fixing, keyed by the report's own section names
+    issues_by_section = _align_to_sections(_group_issues_by_section(issues), sections)
+    suggestions_by_section = _align_to_sections(_group_suggestions_by_section(suggestions), sections)
     
     revised_sections = {}
     revision_notes_list = []
@@ -246,6 +298,50 @@ def _group_suggestions_by_section(suggestions: List[Dict]) -> Dict[str, List[Dic
     return suggestions_by_section
 
 
+def _normalize_section_name(name: str) -> str:
+    return re.sub(r'[^a-z0-9 ]', ' ', name.lower()).strip()
+
+
+def _match_section_name(feedback_section: str, section_names: List[str]) -> Optional[str]:
+    """
+    Resolve the section named in verification feedback to a section of the report.
+
+    Tries an exact match, then a normalized or prefix match (e.g. "Recommendations section",
+    "Technical Expertise"), then the section sharing the most words. Returns None if nothing fits.
+    """
+    if feedback_section in section_names:
+        return feedback_section
+
+    wanted = _normalize_section_name(feedback_section)
+    if not wanted:
+        return None
+    normalized = {name: _normalize_section_name(name) for name in section_names}
+    for name, candidate in normalized.items():
+        if candidate and (wanted.startswith(candidate) or candidate.startswith(wanted)):
+            return name
+
+    wanted_words = set(wanted.split())
+    best_name, best_overlap = None, 0.0
+    for name, candidate in normalized.items():
+        candidate_words = set(candidate.split())
+        if not candidate_words:
+            continue
+        overlap = len(wanted_words & candidate_words) / len(wanted_words | candidate_words)
+        if overlap > best_overlap:
+            best_name, best_overlap = name, overlap
+    return best_name if best_overlap >= 0.5 else None
+
+
+def _align_to_sections(items_by_section: Dict[str, List[Dict]], sections: Dict[str, str]) -> Dict[str, List[Dict]]:
+    """Re-key grouped feedback by the report section it refers to; unmatched keys are kept as-is."""
+    section_names = list(sections)
+    aligned: Dict[str, List[Dict]] = {}
+    for feedback_section, items in items_by_section.items():
+        key = _match_section_name(feedback_section, section_names) or feedback_section
+        aligned.setdefault(key, []).extend(items)
+    return aligned
+
+
 def _revise_single_section(section_name: str, section_content: str, issues: List[Dict],
                           suggestions: List[Dict], round_number: int,
                           api_config: Dict[str, Any]) -> str:
@@ -286,9 +382,10 @@ def _revise_single_section(section_name: str, section_content: str, issues: List
     for i, suggestion in enumerate(suggestions, 1):
         suggestions_text += f"{i}. {suggestion.get('description', 'No description')}\n\n"
     
-    # Create targeted section revision prompt with sub-section targeting
+    # Create targeted section revision prompt; the shared rules are sent separately as
+    # SECTION_REVISION_INSTRUCTIONS so every section call starts with the same prefix
     prompt = f"""
-You are an expert report editor. You need to improve ONLY the "{section_name}" section based on specific feedback.
+Improve ONLY the "{section_name}" section based on the specific feedback below.
 
 REVISION ROUND: {round_number}
 
@@ -303,52 +400,10 @@ SPECIFIC ISSUES TO FIX:
 SUGGESTIONS TO IMPLEMENT:
 {suggestions_text if suggestions_text else "No additional suggestions."}
 
-CRITICAL REQUIREMENTS FOR SUB-SECTION TARGETING:
-
-1. **SURGICAL PRECISION REQUIRED**: This section may contain multiple paragraphs or bullet points. The issues listed above likely affect only SOME of these parts, not all.
-
-2. **IDENTIFY PROBLEMATIC PARTS ONLY**:
-   - Read through the section and identify which specific paragraphs/sentences/bullets are directly related to the issues
-   - Map each issue to the specific part(s) of the section that need modification
-
-3. **PRESERVE UNCHANGED CONTENT VERBATIM**:
-   - For paragraphs/sentences/bullets that are NOT related to any of the issues: Keep them EXACTLY as they are
-   - DO NOT rephrase, rewrite, or "improve" content that doesn't address the specific issues
-   - Copy unchanged parts word-for-word from the original
-
-4. **MODIFY ONLY PROBLEMATIC PARTS**:
-   - ONLY modify the specific paragraphs/sentences/bullets that directly address the issues
-   - If an issue mentions "data labeling", only modify the part about data labeling
-   - If an issue mentions "missing information about X", only add/modify content about X
-
-5. **RECONSTRUCTION**:
-   - Combine the preserved unchanged parts (verbatim) with the modified parts
-   - Maintain the original section structure and flow
-   - Keep the section heading exactly as: **{section_name}:**
-
-6. **FORMAT AND STYLE**:
-   - Maintain the professional tone and markdown formatting
-   - Preserve factual information that isn't flagged as incorrect
-   - DO NOT use markdown code blocks (```) in your response
-
-7. **OUTPUT**: Return the complete section with:
-   - Unchanged parts: EXACT copies from original
-   - Modified parts: Improved to address the specific issues
-   - Section heading: **{section_name}:**
-
-EXAMPLE APPROACH:
-- Parse section into parts (paragraphs/bullets)
-- For each part: Does it relate to any issue?
-  - YES → Modify it to address the issue
-  - NO → Copy it verbatim (word-for-word)
-- Combine all parts in original order
-
-Your task: Return the improved "{section_name}" section with SURGICAL PRECISION - only modify what needs fixing, keep everything else EXACTLY as provided.
-
-IMPORTANT: Your response should be plain text without any markdown code block formatting (no ``` or similar).
+Your task: Return the improved "{section_name}" section with SURGICAL PRECISION - only modify what needs fixing, keep everything else EXACTLY as provided. Keep the section heading exactly as: **{section_name}:**
 """
     
-    return _call_revision_llm(prompt, api_config)
+    return _call_revision_llm(prompt, api_config, SECTION_REVISION_INSTRUCTIONS)
 
 def _reconstruct_report(sections: Dict[str, str]) -> str:
     """
@@ -395,20 +450,18 @@ def _reconstruct_report(sections: Dict[str, str]) -> str:
     
     return '\n\n'.join(reconstructed_parts)
 
-def _call_revision_llm(prompt: str, api_config: Dict[str, Any]) -> str:
-    """Call LLM for revision using original configuration."""
+def _call_revision_llm(prompt: str, api_config: Dict[str, Any], instructions: str = "") -> str:
+    """
+    Call LLM for revision using original configuration.
+
+    Fixed instructions are appended to the system message so repeated calls share
+    a cacheable prefix; the variable part goes in the user message.
+    """
     
     if not api_config:
         raise ValueError("API configuration is required")
     
-    if api_config.get('use_azure', False):
-        client = AzureOpenAI(
-            api_key=api_config.get('api_key'),
-            azure_endpoint=api_config.get('azure_endpoint', ''),
-            api_version=api_config.get('api_version', '2025-03-01-preview')
-        )
-    else:
-        client = OpenAI(api_key=api_config.get('api_key'))
+    client = get_openai_client(api_config)
     
     model = api_config.get('model')
 
@@ -417,7 +470,7 @@ def _call_revision_llm(prompt: str, api_config: Dict[str, Any]) -> str:
         response = client.chat.completions.create(
             model = model,
             messages=[
-                {"role": "system", "content": "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."},
+                {"role": "system", "content": REVISION_SYSTEM_PROMPT + instructions},
                 {"role": "user", "content": prompt}
             ],
             max_completion_tokens = api_config.get('max_completion_tokens',4000),
@@ -429,7 +482,7 @@ def _call_revision_llm(prompt: str, api_config: Dict[str, Any]) -> str:
         response = client.chat.completions.create(
             model = model,
             messages=[
-                {"role": "system", "content": "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."},
+                {"role": "system", "content": REVISION_SYSTEM_PROMPT + instructions},
                 {"role": "user", "content": prompt}
             ],
             temperature = 0.0
@@ -1,9 +1,97 @@
+import hashlib
 import re
-import json
+import time
 from typing import Dict, Any, Optional, List, Tuple, Union
 from pydantic import BaseModel
-from openai import OpenAI, AzureOpenAI
+from jiter import from_json
+import orjson
 from dataclasses import dataclass, field
+from functools import lru_cache
+from string import Template
+
+from app.core.clients import get_openai_client
+
+
+# Batch API polling for verification_mode='batch'
+BATCH_POLL_SECONDS = 30
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Streaming verification stops once this many issues are complete and at least one
+# of them is a blocking type, since that round will be sent to revision regardless
+VERIFICATION_EARLY_STOP_ISSUES = 3
+BLOCKING_ISSUE_TYPES = ("Missing Section", "Factual Error")
+
+# Every report section is critical; a missing one always triggers revision
+CRITICAL_SECTIONS = (
+    "AI Maturity Level",
+    "Current Solution Development Stage",
+    "Validity of Concept and Authenticity of Problem Addressed",
+    "Integration and Importance of AI in the Idea",
+    "Identified Target Market and Customer Segments",
+    "Data Requirement Assessment",
+    "Data Collection Strategy",
+    "Technical Expertise and Capability",
+    "Expectations from FAIR Services",
+    "Recommendations",
+)
+
+_HEADING_RE = re.compile(r'^\s*\*\*(.+?):\*\*', re.MULTILINE)
+
+VERIFICATION_SYSTEM_PROMPT = "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."
+
+# Structured output contract for verification responses, enforced through response_format
+VERIFICATION_SCHEMA = {
+    "name": "verification_result",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "score": {"type": "number", "description": "Content quality between 1 and 10"},
+            "issues": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {
+                            "type": "string",
+                            "enum": ["Missing Section", "Factual Error", "Required Element Missing",
+                                     "Relevance", "Clarity Issue", "Recommendation Issue", "Format Issue"],
+                        },
+                        "section": {"type": "string"},
+                        "description": {"type": "string"},
+                        "suggestion": {"type": "string"},
+                        "severity": {"type": "string", "enum": ["High", "Medium", "Low"]},
+                    },
+                    "required": ["type", "section", "description", "suggestion", "severity"],
+                    "additionalProperties": False,
+                },
+            },
+            "suggestions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "section": {"type": "string"},
+                        "description": {"type": "string"},
+                    },
+                    "required": ["section", "description"],
+                    "additionalProperties": False,
+                },
+            },
+            "summary": {"type": "string", "description": "Overall assessment noting improvements from previous rounds"},
+            "strengths": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["score", "issues", "suggestions", "summary", "strengths"],
+        "additionalProperties": False,
+    },
+}
+
+
+_ISSUE_KEYS = tuple(VERIFICATION_SCHEMA["schema"]["properties"]["issues"]["items"]["required"])
+
+
+class VerificationBatchError(RuntimeError):
+    """A Batch API verification request did not complete; the report fails instead of scoring a fallback"""
 
 
 class VerificationIssue(BaseModel):
@@ -24,6 +112,7 @@ class VerificationResult(BaseModel):
     needs_revision: bool
     round_number: int
     decision_explanation: str
+    # "fallback" when the verifier call failed, "truncated" when the stream stopped early
     status: str = "completed"
 
 
@@ -93,13 +182,15 @@ def verify_report_content(report_content: str, transcript: str, meeting_notes: s
     
     # Create progressive verification prompt based on round and context
     progressive_prompt = _create_context_aware_verification_prompt(
-        content_without_company_info, transcript, meeting_notes, 
-        additional_instructions, round_number, context_memory, sample_report
+        content_without_company_info, round_number, context_memory
+    )
+    static_context = _get_static_verification_context(
+        transcript, meeting_notes, additional_instructions, sample_report
     )
     
     # Execute progressive verification with context awareness
     verification_results = _verify_report_with_context(
-        progressive_prompt, api_config, context_memory
+        progressive_prompt, api_config, context_memory, static_context
     )
     
     # Progressive scoring pipeline with consistency validation
@@ -127,24 +218,8 @@ def verify_report_content(report_content: str, transcript: str, meeting_notes: s
     score = enhanced_score
     issues = filtered_issues
     
-    # Extract critical issues - ALL sections are critical (original logic)
-    critical_sections = ["AI Maturity Level", "Current Solution Development Stage", 
-                    "Validity of Concept and Authenticity of Problem Addressed",
-                    "Integration and Importance of AI in the Idea",
-                    "Identified Target Market and Customer Segments",
-                    "Data Requirement Assessment", 
-                    "Data Collection Strategy",
-                    "Technical Expertise and Capability",
-                    "Expectations from FAIR Services",
-                    "Recommendations",
-                    ]
-    
-    # Identify any missing critical sections
-    missing_critical_sections = [
-        issue for issue in issues 
-        if issue.get('type') == 'Missing Section' and 
-        any(crit_sec in issue.get('section', '') for crit_sec in critical_sections)
-    ]
+    # Identify any missing critical sections - ALL sections are critical (original logic)
+    missing_critical_sections = _missing_critical_sections(issues)
     
     # Apply improved revision logic with severity-aware decision making
     needs_revision, decision_explanation = _determine_revision_need(score, issues, round_number, missing_critical_sections)
@@ -159,7 +234,8 @@ def verify_report_content(report_content: str, transcript: str, meeting_notes: s
         strengths=verification_results.get('strengths', []),
         needs_revision=needs_revision,
         round_number=round_number,
-        decision_explanation=decision_explanation
+        decision_explanation=decision_explanation,
+        status=verification_results.get('status', 'completed')
     )
 
 
@@ -431,7 +507,8 @@ def _normalize_severity(raw_severity: Any, issue_type: str) -> str:
         'Section Order': 'Medium',        # Important structure issue
         'Required Element Missing': 'Medium',  # Important content issue
         'Recommendation Issue': 'Medium', # Important quality issue
-        'Clarity Issue': 'Low'            # Minor formatting issue
+        'Clarity Issue': 'Low',           # Minor formatting issue
+        'Format Issue': 'Low'             # Deviation from the sample report format
     }
     
     inferred_severity = severity_mapping.get(issue_type, 'Medium')
@@ -592,7 +669,7 @@ def _determine_revision_need(score: float, issues: List[Dict[str, Any]], round_n
     
     # Minor issue types: Clarity or formatting issues that don't affect core content
     minor_type_issues = [issue for issue in issues if issue.get('type') in 
-                       ['Clarity Issue']]
+                       ['Clarity Issue', 'Format Issue']]
     
     # ROUND-SPECIFIC DECISION LOGIC
     
@@ -756,6 +833,91 @@ def _extract_company_info_section(report_content: str):
     return company_info_section, content_without_company_info
 
 
+def _missing_critical_sections(issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        issue for issue in issues
+        if issue.get('type') == 'Missing Section' and
+        any(crit_sec in issue.get('section', '') for crit_sec in CRITICAL_SECTIONS)
+    ]
+
+
+@lru_cache(maxsize=8)
+def _expected_section_order(sample_report: Optional[str]) -> Tuple[str, ...]:
+    """Critical section headings in the order the sample report uses them."""
+    if not sample_report:
+        return CRITICAL_SECTIONS
+    headings = [h.strip() for h in _HEADING_RE.findall(sample_report)]
+    ordered = tuple(h for h in headings if h in CRITICAL_SECTIONS)
+    return ordered or CRITICAL_SECTIONS
+
+
+def check_report_structure(report_content: str, sample_report: str = None) -> List[Dict[str, str]]:
+    """
+    Deterministic format check of the report headings against the sample report.
+
+    Runs without an LLM call, so the orchestrator can run it alongside the
+    content verification. Returns issues in the same shape as the verifier's.
+    """
+    expected = _expected_section_order(sample_report)
+    found = [h.strip().lower() for h in _HEADING_RE.findall(report_content)]
+    positions = {}
+    for title in expected:
+        # Long titles are often shortened in the report, so accept a heading that is a prefix
+        lowered = title.lower()
+        for index, heading in enumerate(found):
+            if heading and (lowered.startswith(heading) or heading.startswith(lowered)):
+                positions[title] = index
+                break
+
+    issues = []
+    for title in expected:
+        if title not in positions:
+            issues.append({
+                'type': 'Missing Section',
+                'section': title,
+                'description': f"The '{title}' section is missing from the report.",
+                'suggestion': f"Add the '**{title}:**' section in the position used by the sample report.",
+                'severity': 'High',
+            })
+
+    present = [title for title in expected if title in positions]
+    if [positions[title] for title in present] != sorted(positions[title] for title in present):
+        issues.append({
+            'type': 'Section Order',
+            'section': 'Report Structure',
+            'description': "Sections do not follow the order of the sample report.",
+            'suggestion': "Reorder the sections to: " + ", ".join(present) + ".",
+            'severity': 'Medium',
+        })
+    return issues
+
+
+def merge_structure_issues(result: VerificationResult,
+                           structure_issues: List[Dict[str, str]]) -> VerificationResult:
+    """Fold structural check issues into a content verification result."""
+    reported = {(issue.type, issue.section) for issue in result.issues}
+    new_issues = [issue for issue in structure_issues
+                  if (issue['type'], issue['section']) not in reported]
+    if not new_issues:
+        return result
+
+    needs_revision = result.needs_revision
+    decision_explanation = result.decision_explanation
+    missing = _missing_critical_sections(new_issues)
+    if missing and not needs_revision:
+        needs_revision = True
+        decision_explanation = (
+            f"Structure check found {len(missing)} missing critical sections: "
+            f"{[issue['section'] for issue in missing[:3]]}"
+        )
+
+    return result.model_copy(update={
+        'issues': result.issues + [VerificationIssue(**issue) for issue in new_issues],
+        'needs_revision': needs_revision,
+        'decision_explanation': decision_explanation,
+    })
+
+
 def _build_verification_context_memory(round_number: int, previous_verification_results: List[Dict], 
                                        previous_revision_notes: List[str]) -> Dict[str, Any]:
     """
@@ -1097,30 +1259,21 @@ def _build_verification_context_memory(round_number: int, previous_verification_
 #     else:  # strict
 #         return "If ANY required section is COMPLETELY MISSING, categorize as 'Missing Section' issue with HIGH severity."
 
-def _create_context_aware_verification_prompt(report_content: str, transcript: str,
-                                             meeting_notes: str, additional_instructions: str,
-                                             round_number: int, context_memory: Dict[str, Any],
-                                             sample_report: str = None) -> str:
+@lru_cache(maxsize=32)
+def _get_round_instructions(round_number: int, strictness: str) -> str:
     """
-    Create verification prompt with STRONG anti-progressive-perfectionism controls.
-    - Explicit rules against "could be better" refinements
-    - Issue resolution detection and tracking
-    - "Good enough" principle enforcement
-    - Only NEW issue types allowed, not refinements of resolved issues
+    Build the round-specific instruction block of the verification prompt.
+
+    This block only depends on the round number and strictness level, so it is
+    assembled once per round and reused across reports.
 
     Args:
-        report_content: Current report content to verify
-        transcript: Original transcript
-        meeting_notes: Meeting notes
-        additional_instructions: Any additional instructions
         round_number: Current round number
-        context_memory: Context memory structure with focus areas and history
-        sample_report: Sample report for format reference
+        strictness: Verification strictness level ('strict', 'moderate', 'lenient')
 
     Returns:
-        str: Enhanced verification prompt with anti-perfectionism controls
+        str: Round header, strictness mode and anti-perfectionism rules
     """
-
     # Base verification instructions
     base_prompt = f"""
 You are an AI report verification specialist with context memory.
@@ -1129,8 +1282,6 @@ You are an AI report verification specialist with context memory.
 """
 
     # Add progressive verification instructions based on round and strictness level
-    strictness = context_memory.get('verification_strictness', 'standard')
-
     if strictness == 'lenient':  # Round 3+
         base_prompt += f"""
 **LENIENT VERIFICATION MODE** (Round {round_number})
@@ -1195,6 +1346,99 @@ You MUST follow these rules to prevent endless refinement cycles:
    - Do NOT raise standards between rounds
 """
 
+    return base_prompt
+
+
+@lru_cache(maxsize=8)
+def _get_static_verification_context(transcript: str, meeting_notes: str,
+                                     additional_instructions: str, sample_report: Optional[str]) -> str:
+    """
+    Build the part of the verification prompt that is identical in every round.
+
+    It is sent ahead of the round-specific prompt so the provider's prompt cache
+    can reuse it; the lru_cache keeps the exact same string object across rounds.
+    """
+    static_context = _get_format_reference_block(sample_report) if sample_report else ""
+    static_context += f"""
+
+**ORIGINAL CONTEXT:**
+**TRANSCRIPT:** {transcript}
+**MEETING NOTES:** {meeting_notes if meeting_notes else "No additional meeting notes provided."}
+**ADDITIONAL INSTRUCTIONS:** {additional_instructions if additional_instructions else "No additional instructions provided."}
+"""
+    return static_context
+
+
+def _get_format_reference_block(sample_report: str) -> str:
+    """Build the sample-report format reference block."""
+    return f"""
+
+**EXPECTED REPORT FORMAT:**
+(Use this as a reference for format, structure, and content style)
+{sample_report}
+
+**FORMAT VERIFICATION INSTRUCTIONS:**
+- Check if the report follows the expected structure and formatting
+- Verify section headings match the expected pattern
+- Ensure content style is consistent with the sample
+- Flag significant deviations from the expected format as "Format Issue"
+"""
+
+
+# Verification task, compiled once at module load; the output contract is VERIFICATION_SCHEMA
+_VERIFICATION_TASK_TEMPLATE = Template("""
+
+**REPORT TO VERIFY:**
+$report_content
+
+**VERIFICATION TASK:**
+Analyze the report based on current strictness criteria. The current strictness level is $strictness.
+
+**SECTION COMPLETENESS CHECK:**
+Verify that required sections are present:
+
+1. **AI Maturity Level:** Company operations/services + maturity classification (Low/Moderate/High)
+2. **Current Solution Development Stage:** Development phase + current AI readiness + aims and objectives
+3. **Validity of Concept and Authenticity of Problem Addressed:** Practicality/innovation assessment + feasibility comments
+4. **Integration and Importance of AI in the Idea:** AI centrality to solution
+5. **Identified Target Market and Customer Segments:** Target customers + market clarity assessment
+6. **Data Requirement Assessment:** Data needs + assessment of data requirement understanding
+7. **Data Collection Strategy:** Evaluation of data collection/storage/usage approach
+8. **Technical Expertise and Capability:** Assessment of technical skills and development abilities
+9. **Expectations from FAIR Services:** What they expect from consultation
+10. **Recommendations:** Context-based analysis and practical guidance
+
+**ENHANCED VERIFICATION OUTPUT:**
+Score 1-10 on actual content quality and apply Round $round_number standards. Raise the score when previous issues are resolved, apply the "good enough" principle, and only report TRULY NEW issues, not refinements of resolved ones. List resolved issues among the strengths.
+
+
+""")
+
+
+def _create_context_aware_verification_prompt(report_content: str, round_number: int,
+                                             context_memory: Dict[str, Any]) -> str:
+    """
+    Create verification prompt with STRONG anti-progressive-perfectionism controls.
+    - Explicit rules against "could be better" refinements
+    - Issue resolution detection and tracking
+    - "Good enough" principle enforcement
+    - Only NEW issue types allowed, not refinements of resolved issues
+
+    Only the round-specific part of the prompt is built here; the transcript,
+    notes and sample report go into the shared static context
+    (_get_static_verification_context) that is sent ahead of it.
+
+    Args:
+        report_content: Current report content to verify
+        round_number: Current round number
+        context_memory: Context memory structure with focus areas and history
+
+    Returns:
+        str: Enhanced verification prompt with anti-perfectionism controls
+    """
+    strictness = context_memory.get('verification_strictness', 'standard')
+    base_prompt = _get_round_instructions(round_number, strictness)
+
     # Add focus section instructions with resolution context
     if context_memory['focus_sections']:
         base_prompt += f"""
@@ -1246,80 +1490,18 @@ These sections were specifically revised to address previous issues.
   issue is addressed, ACCEPT IT. Do not demand perfection or progressive improvements.
 """
 
-    # Add sample report format reference if available
-    if sample_report:
-        base_prompt += f"""
-
-**EXPECTED REPORT FORMAT:**
-(Use this as a reference for format, structure, and content style)
-{sample_report}
-
-**FORMAT VERIFICATION INSTRUCTIONS:**
-- Check if the report follows the expected structure and formatting
-- Verify section headings match the expected pattern
-- Ensure content style is consistent with the sample
-- Flag significant deviations from the expected format as "Format Issue"
-"""
-
     # Add comprehensive verification instructions with detailed assessment criteria
-    base_prompt += f"""
-
-**ORIGINAL CONTEXT:**
-**TRANSCRIPT:** {transcript}
-**MEETING NOTES:** {meeting_notes if meeting_notes else "No additional meeting notes provided."}
-**ADDITIONAL INSTRUCTIONS:** {additional_instructions if additional_instructions else "No additional instructions provided."}
-
-**REPORT TO VERIFY:**
-{report_content}
-
-**VERIFICATION TASK:**
-Analyze the report based on current strictness criteria. The current strictness level is {strictness}.
-
-**SECTION COMPLETENESS CHECK:**
-Verify that required sections are present:
-
-1. **AI Maturity Level:** Company operations/services + maturity classification (Low/Moderate/High)
-2. **Current Solution Development Stage:** Development phase + current AI readiness + aims and objectives
-3. **Validity of Concept and Authenticity of Problem Addressed:** Practicality/innovation assessment + feasibility comments
-4. **Integration and Importance of AI in the Idea:** AI centrality to solution
-5. **Identified Target Market and Customer Segments:** Target customers + market clarity assessment
-6. **Data Requirement Assessment:** Data needs + assessment of data requirement understanding
-7. **Data Collection Strategy:** Evaluation of data collection/storage/usage approach
-8. **Technical Expertise and Capability:** Assessment of technical skills and development abilities
-9. **Expectations from FAIR Services:** What they expect from consultation
-10. **Recommendations:** Context-based analysis and practical guidance
-
-**ENHANCED VERIFICATION OUTPUT:**
-Return a JSON object following this structure:
-{{
-    "score": <float between 1-10 based on actual content quality. If previous issues have been resolved, increase score accordingly. Apply "good enough" principle - do not demand perfection.>,
-    "issues": [
-        {{
-            "type": "<Missing Section, Factual Error, Required Element Missing, Relevance, Clarity Issue, or Recommendation Issue>",
-            "section": "<section name>",
-            "description": "<detailed description - MUST be a TRULY NEW issue, NOT a refinement of a resolved issue>",
-            "suggestion": "<specific improvement suggestion>",
-            "severity": "<High/Medium/Low - IMPORTANT: Apply Round {round_number} standards. If previous issue was resolved, do NOT flag progressive refinements.>"
-        }}
-    ],
-    "suggestions": [
-        {{
-            "section": "<section name>",
-            "description": "<improvement suggestion - only for TRULY NEW concerns, not refinements>"
-        }}
-    ],
-    "summary": "<overall assessment. Note improvements from previous rounds. Apply 'good enough' principle - if issues are resolved, acknowledge that positively without nitpicking.>",
-    "strengths": ["<list of report strengths - include resolved issues from previous rounds>"]
-}}
-
-
-"""
+    base_prompt += _VERIFICATION_TASK_TEMPLATE.substitute(
+        report_content=report_content,
+        strictness=strictness,
+        round_number=round_number,
+    )
 
     return base_prompt
 
 
 def _verify_report_with_context(prompt: str, api_config: Dict[str, Any], 
-                               context_memory: Dict[str, Any]) -> Dict[str, Any]:
+                               context_memory: Dict[str, Any], static_context: str = "") -> Dict[str, Any]:
     """
     Execute verification with context awareness and enhanced error handling.
     
@@ -1327,6 +1509,7 @@ def _verify_report_with_context(prompt: str, api_config: Dict[str, Any],
         prompt: Context-aware verification prompt
         api_config: API configuration
         context_memory: Context memory for this round
+        static_context: Round-independent context sent ahead of the prompt
         
     Returns:
         Dict: Verification results with context adjustments
@@ -1335,44 +1518,10 @@ def _verify_report_with_context(prompt: str, api_config: Dict[str, Any],
         # Execute verification with progressive criteria and context awareness
         if not api_config:
             raise ValueError("API configuration is required")
-        
-        # Initialize OpenAI client based on configuration
-        if api_config.get('use_azure', False):
-            client = AzureOpenAI(
-                api_key=api_config.get('api_key'),
-                azure_endpoint=api_config.get('azure_endpoint', ''),
-                api_version=api_config.get('api_version', '2025-03-01-preview')
-            )
-        else:
-            client = OpenAI(api_key=api_config.get('api_key'))
-        
-        model = api_config.get('model')
-
-        if model.startswith("gpt-5"):
-            # reasoning-enabled model: include reasoning params
-            response = client.chat.completions.create(
-                model = model,
-                messages=[
-                    {"role": "system", "content": "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_completion_tokens = api_config.get('max_completion_tokens',4000),
-                reasoning_effort = api_config.get('reasoning_effort', 'low'),
-                verbosity = api_config.get('verbosity', 'low')
-        )
-        else:
-            # non-reasoning model: use standard parameters
-            response = client.chat.completions.create(
-                model = model,
-                messages=[
-                    {"role": "system", "content": "You are a professional AI consultant generating assessment reports with precise formatting and natural language. Avoid clichéd consultant language and use straightforward, clear communication. IMPORTANT: Provide responses as plain text without markdown code blocks or ``` formatting."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature = 0.0
-            )
-        
-        verification_response = response.choices[0].message.content
-        verification_results = json.loads(verification_response)
+
+        verification_response = _call_verification_llm(prompt, api_config, static_context)
+        # jiter ships with the openai SDK; cache_mode interns the repeated issue keys
+        verification_results = from_json(verification_response.encode(), partial_mode=False, cache_mode="all")
         
         # Apply context-based adjustments to results
         if context_memory['convergence_mode']:
@@ -1389,6 +1538,8 @@ def _verify_report_with_context(prompt: str, api_config: Dict[str, Any],
         
         return verification_results
     
+    except VerificationBatchError:
+        raise
     except Exception as e:
         print(f"Context-aware verification failed: {str(e)}")
         # Fallback to basic verification results
@@ -1397,5 +1548,148 @@ def _verify_report_with_context(prompt: str, api_config: Dict[str, Any],
             'issues': [],
             'suggestions': [],
             'summary': f"Context-aware verification encountered an error: {str(e)}",
-            'strengths': ["Report structure appears intact"]
-        }
\ No newline at end of file
+            'strengths': ["Report structure appears intact"],
+            'status': 'fallback'
+        }
+
+
+def _call_verification_llm(prompt: str, api_config: Dict[str, Any], static_context: str = "") -> str:
+    """Call LLM for verification using original configuration."""
+
+    # Reuse the shared client so its connection pool stays warm across rounds
+    client = get_openai_client(api_config)
+    request_body = _build_verification_request(prompt, api_config, static_context)
+
+    if api_config.get('verification_mode') == 'batch':
+        return _call_verification_batch(client, request_body, api_config)
+
+    return _stream_verification(client, request_body)
+
+
+def _stream_verification(client: Any, request_body: Dict[str, Any]) -> str:
+    """
+    Stream a verification response, stopping early once revision is certain.
+
+    The partial JSON is re-parsed whenever an object may have closed. As soon as
+    VERIFICATION_EARLY_STOP_ISSUES issues are complete and one of them is a blocking
+    type (which forces revision in every round), the stream is closed and the
+    issues parsed so far are returned as the verification result.
+    """
+    stream = client.chat.completions.create(**request_body, stream=True)
+    content = []
+    try:
+        for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            content.append(delta)
+            if '}' not in delta:
+                continue
+
+            # partial_mode="on" drops unfinished strings, so an issue with all keys is complete
+            partial = from_json("".join(content).encode(), partial_mode="on")
+            issues = [issue for issue in partial.get('issues', [])
+                      if isinstance(issue, dict) and len(issue) == len(_ISSUE_KEYS)]
+            if (len(issues) >= VERIFICATION_EARLY_STOP_ISSUES
+                    and any(issue.get('type') in BLOCKING_ISSUE_TYPES for issue in issues)):
+                print(f"Blocking issue found after {len(issues)} issues, stopping verification stream early")
+                return orjson.dumps({
+                    'score': partial.get('score', 0),
+                    'issues': issues,
+                    'suggestions': [],
+                    'summary': "Verification stopped early: blocking issues require revision.",
+                    'strengths': [],
+                    'status': 'truncated'
+                }).decode()
+    finally:
+        stream.close()
+
+    return "".join(content)
+
+
+def _build_verification_request(prompt: str, api_config: Dict[str, Any], static_context: str = "") -> Dict[str, Any]:
+    """
+    Build the chat completion request body for a verification call.
+
+    The round-independent context is appended to the system message so every
+    round starts with the same prefix and hits the provider's prompt cache.
+    """
+    model = api_config.get('model')
+    request_body = {
+        'model': model,
+        'messages': [
+            {"role": "system", "content": VERIFICATION_SYSTEM_PROMPT + static_context},
+            {"role": "user", "content": prompt}
+        ],
+        'response_format': {"type": "json_schema", "json_schema": VERIFICATION_SCHEMA},
+        # Same key for every round of a report, so its rounds are routed to one prompt cache
+        'prompt_cache_key': _verification_cache_key(static_context),
+    }
+
+    if model.startswith("gpt-5"):
+        # reasoning-enabled model: include reasoning params
+        request_body['max_completion_tokens'] = api_config.get('max_completion_tokens',4000)
+        request_body['reasoning_effort'] = api_config.get('reasoning_effort', 'low')
+        request_body['verbosity'] = api_config.get('verbosity', 'low')
+    else:
+        # non-reasoning model: use standard parameters
+        request_body['temperature'] = 0.0
+
+    return request_body
+
+
+@lru_cache(maxsize=8)
+def _verification_cache_key(static_context: str) -> str:
+    return "verify:" + hashlib.sha256(static_context.encode("utf-8")).hexdigest()[:16]
+
+
+def _call_verification_batch(client: Any, request_body: Dict[str, Any], api_config: Dict[str, Any]) -> str:
+    """
+    Run a verification call through the Batch API and wait for its result.
+
+    Batch requests are billed at half the synchronous price but may take much
+    longer to complete, so this path is only used for offline report review.
+    The batch id is passed to api_config['on_batch_submitted'] when set, so the
+    caller can show which batch the report is waiting on.
+
+    Args:
+        client: OpenAI or Azure OpenAI client
+        request_body: Chat completion request body
+        api_config: API configuration
+
+    Returns:
+        str: Content of the verification response
+
+    Raises:
+        VerificationBatchError: If the batch ends without a completed response
+    """
+    endpoint = "/chat/completions" if api_config.get('use_azure', False) else "/v1/chat/completions"
+    batch_line = orjson.dumps({
+        "custom_id": "verification",
+        "method": "POST",
+        "url": endpoint,
+        "body": request_body
+    })
+
+    batch_file = client.files.create(file=("verification.jsonl", batch_line + b"\n"), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=endpoint,
+        completion_window="24h"
+    )
+    print(f"Verification submitted as batch {batch.id}")
+    if api_config.get('on_batch_submitted'):
+        api_config['on_batch_submitted'](batch.id)
+
+    while batch.status not in BATCH_TERMINAL_STATUSES:
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise VerificationBatchError(f"Verification batch {batch.id} ended with status '{batch.status}'")
+
+    output = client.files.content(batch.output_file_id).text
+    result = orjson.loads(output.splitlines()[0])
+    if result.get("error") or result["response"]["status_code"] != 200:
+        raise VerificationBatchError(f"Verification batch {batch.id} request failed: {result.get('error') or result['response']['body']}")
+    return result["response"]["body"]["choices"][0]["message"]["content"]
@@ -1,30 +1,27 @@
-from typing import Optional
+from pathlib import Path
+from typing import Literal, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse, HTMLResponse
+import anyio
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 
-from app.core.storage import REPORT_STORE
+from app.core.storage import ReportStore, get_output_dir, get_report_slots, get_report_store
 from app.core.security import require_auth
-from app.formatting.formatter import format_report_as_html
+from app.formatting.word_doc import safe_report_filename
 from app.services.report_service import (
+    CompanyInfo,
     create_report_from_recording,
     create_report_from_transcript,
+    ensure_report_file,
     parse_company_data,
 )
 
 
-router = APIRouter(prefix="/reports", tags=["reports"])
-
-
-class CompanyInfo(BaseModel):
-    company_name: str
-    country: str
-    consultation_date: str
-    experts: str
-    customer_manager: str
-    consultation_type: str
+# Report payloads carry the full verification/revision history, so serialize them with orjson
+router = APIRouter(prefix="/reports", tags=["reports"], default_response_class=ORJSONResponse)
 
 
 class TranscriptReportRequest(BaseModel):
@@ -36,14 +33,23 @@ class TranscriptReportRequest(BaseModel):
     selected_model: str = "gpt-5.1"
     verification_rounds: int = 5
     use_langgraph: bool = True
+    verification_mode: Literal["sync", "batch"] = "sync"
 
 
 @router.post("/from-transcript")
-async def report_from_transcript(request: TranscriptReportRequest, _: str = Depends(require_auth)):
+async def report_from_transcript(
+    request: TranscriptReportRequest,
+    _: str = Depends(require_auth),
+    store: ReportStore = Depends(get_report_store),
+    output_dir: Path = Depends(get_output_dir),
+    slots: anyio.Semaphore = Depends(get_report_slots),
+):
     report_id = str(uuid4())
     payload = request.model_dump()
     payload["report_id"] = report_id
-    store_entry = create_report_from_transcript(payload)
+    store_entry = await _run_report_workflow(
+        slots, request.verification_mode, create_report_from_transcript, payload, store, output_dir
+    )
     return {"report_id": report_id, **store_entry}
 
 
@@ -58,14 +64,21 @@ async def report_from_recording(
     verification_rounds: int = Form(5),
     compress_audio: bool = Form(True),
     use_langgraph: bool = Form(True),
+    verification_mode: Literal["sync", "batch"] = Form("sync"),
     _: str = Depends(require_auth),
+    store: ReportStore = Depends(get_report_store),
+    output_dir: Path = Depends(get_output_dir),
+    slots: anyio.Semaphore = Depends(get_report_slots),
 ):
     if not file.filename:
         raise HTTPException(status_code=400, detail="No file uploaded")
 
     company_payload = parse_company_data(company_data)
     report_id = str(uuid4())
-    store_entry = create_report_from_recording(
+    store_entry = await _run_report_workflow(
+        slots,
+        verification_mode,
+        create_report_from_recording,
         report_id=report_id,
         file=file,
         company_payload=company_payload,
@@ -76,41 +89,65 @@ async def report_from_recording(
         verification_rounds=verification_rounds,
         compress_audio=compress_audio,
         use_langgraph=use_langgraph,
+        verification_mode=verification_mode,
+        store=store,
+        output_dir=output_dir,
     )
     return {"report_id": report_id, **store_entry}
 
 
+async def _run_report_workflow(slots: anyio.Semaphore, verification_mode: str, create, /, *args, **kwargs):
+    """Run a report workflow off the event loop once a report slot is free."""
+    # Batch reports spend most of their time waiting on Batch API results, so they
+    # would hold a slot for hours; they are bounded by the batch worker pool instead
+    if verification_mode == "batch":
+        return await run_in_threadpool(create, *args, **kwargs)
+    # The workflow blocks on transcription and LLM calls, so it runs in the threadpool.
+    # Waiting for the slot here keeps queued reports from holding threadpool tokens
+    async with slots:
+        return await run_in_threadpool(create, *args, **kwargs)
+
+
 @router.get("/{report_id}")
-async def get_report(report_id: str, _: str = Depends(require_auth)):
-    report = REPORT_STORE.get(report_id)
+async def get_report(report_id: str, _: str = Depends(require_auth),
+                     store: ReportStore = Depends(get_report_store)):
+    report = store.get(report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     return report
 
 
 @router.get("/{report_id}/download")
-async def download_report(report_id: str):
-    report = REPORT_STORE.get(report_id)
+async def download_report(report_id: str, request: Request, store: ReportStore = Depends(get_report_store)):
+    report = store.get(report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    doc_path = report.get("results", {}).get("final_report_path")
+    # Waits for a background DOCX render to finish if the report was just created
+    doc_path = await run_in_threadpool(ensure_report_file, report)
     if not doc_path:
         raise HTTPException(status_code=404, detail="Report file not found")
 
-    return FileResponse(doc_path)
+    headers = {"Cache-Control": "private, max-age=3600"}
+    etag = report.get("etag")
+    if etag:
+        headers["ETag"] = etag
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+
+    # The stored file name carries the report id; the download is named after the company
+    filename = safe_report_filename(report.get("results", {}).get("company_data") or {})
+    return FileResponse(doc_path, headers=headers, filename=filename)
 
 
 @router.get("/{report_id}/html")
-async def report_html(report_id: str):
-    report = REPORT_STORE.get(report_id)
+async def report_html(report_id: str, store: ReportStore = Depends(get_report_store)):
+    report = store.get(report_id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
 
-    report_content = report.get("results", {}).get("final_report_content")
-    company_data = report.get("results", {}).get("company_data")
-    if not report_content or not company_data:
+    html_report = report.get("results", {}).get("final_report_html")
+    if not html_report:
         raise HTTPException(status_code=404, detail="Report content not found")
 
-    html_report = format_report_as_html(report_content, company_data)
     return HTMLResponse(content=html_report)
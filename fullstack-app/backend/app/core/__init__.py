@@ -1 +1,3 @@
 """Core configuration and shared state."""
+# Gives the "app" loggers a stdout handler as soon as any of the app is imported
+from app.core import log  # noqa: F401
@@ -0,0 +1,55 @@
+"""Shared OpenAI / Azure OpenAI clients."""
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+
+import httpx
+from openai import AzureOpenAI, OpenAI
+
+
+# One bounded connection pool shared by every client in the process
+HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    timeout=httpx.Timeout(600, connect=5),
+)
+
+
+def get_openai_client(api_config: Dict[str, Any]) -> Union[AzureOpenAI, OpenAI]:
+    """Return a process-wide client for the given API configuration.
+
+    Clients are reused so their connection pool keeps TLS sessions to the
+    endpoint alive between calls.
+    """
+    if api_config.get("use_azure", False):
+        return _build_client(
+            True,
+            api_config.get("api_key"),
+            api_config.get("azure_endpoint", ""),
+            api_config.get("api_version", "2025-03-01-preview"),
+        )
+    return _build_client(False, api_config.get("api_key"), None, None)
+
+
+def get_azure_client(api_key: Optional[str], azure_endpoint: str, api_version: str) -> AzureOpenAI:
+    """Return a process-wide Azure client for an explicit endpoint.
+
+    Used where a deployment lives on its own endpoint, such as audio
+    transcription, so it still shares the process connection pool.
+    """
+    return _build_client(True, api_key, azure_endpoint, api_version)
+
+
+@lru_cache(maxsize=16)
+def _build_client(
+    use_azure: bool,
+    api_key: Optional[str],
+    azure_endpoint: Optional[str],
+    api_version: Optional[str],
+) -> Union[AzureOpenAI, OpenAI]:
+    if use_azure:
+        return AzureOpenAI(
+            api_key=api_key,
+            azure_endpoint=azure_endpoint,
+            api_version=api_version,
+            http_client=HTTP_CLIENT,
+        )
+    return OpenAI(api_key=api_key, http_client=HTTP_CLIENT)
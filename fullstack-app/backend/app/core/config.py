@@ -1,8 +1,15 @@
 import os
+from functools import lru_cache
 from typing import Any, Dict
 
 
+@lru_cache(maxsize=16)
 def build_api_config(use_azure: bool, selected_model: str) -> Dict[str, Any]:
+    """Build the API configuration for a provider/model pair.
+
+    The result is memoized per (use_azure, selected_model) and shared between
+    requests, so callers must treat it as read-only.
+    """
     openai_model_mapping = {
         "gpt-4.1": "gpt-4.1-2025-04-14",
         "gpt-5.1": "gpt-5-2025-08-07",
@@ -0,0 +1,165 @@
+"""Deterministic response cache for the report generation agents.
+
+Generation, verification and revision run at temperature 0, so a rerun with the
+same inputs (dev reloads, CI, retried jobs) can replay the stored result instead
+of calling the model again. Disabled unless LLM_CACHE is set to "memory" or "file".
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Protocol, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.core.storage import OUTPUT_DIR
+
+# Bump when agent prompts change so stale results stop matching
+PROMPT_VERSION = "v2"
+
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", str(OUTPUT_DIR / ".llm_cache")))
+
+ResultT = TypeVar("ResultT", bound=BaseModel)
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[str]: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class MemoryBackend:
+    """Process-local backend; entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+
+
+class FileBackend:
+    """One JSON file per key, so cached results survive restarts."""
+
+    def __init__(self, directory: Path, ttl: int):
+        self.directory = directory
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.directory / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        path = self.directory / f"{key}.json"
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(value, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+class LLMCache:
+    """Keys agent calls by a SHA-256 of model, step and inputs."""
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+
+    @staticmethod
+    def cache_key(model: str, step: str, inputs: Dict[str, Any], temperature: float = 0.0) -> str:
+        payload = json.dumps(
+            {
+                "prompt_version": PROMPT_VERSION,
+                "model": model,
+                "step": step,
+                "inputs": inputs,
+                "temperature": temperature,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, step: str, api_config: Dict[str, Any], inputs: Dict[str, Any]) -> Optional[str]:
+        """Stored JSON for this step and inputs, or None on a miss or when disabled."""
+        if self.backend is None:
+            return None
+        return self.backend.get(self.cache_key(api_config.get("model", ""), step, inputs))
+
+    def store(self, step: str, api_config: Dict[str, Any], inputs: Dict[str, Any], value: str) -> None:
+        if self.backend is None:
+            return
+        self.backend.set(self.cache_key(api_config.get("model", ""), step, inputs), value)
+
+    @staticmethod
+    def context_hash(context: Optional[Dict[str, Any]]) -> Optional[str]:
+        if context is None:
+            return None
+        return hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def cached_call(self, step: str, api_config: Dict[str, Any], inputs: Dict[str, Any],
+                    result_type: Type[ResultT], call: Callable[[], ResultT],
+                    context: Optional[Dict[str, Any]] = None,
+                    store_if: Optional[Callable[[ResultT], bool]] = None) -> ResultT:
+        """
+        Return the stored ``result_type`` for these inputs, or run ``call`` and store it.
+
+        ``context`` is the chain of earlier feedback the call depends on. It is stored next
+        to the result and must match too, so an entry for the same inputs reached through a
+        different chain is treated as a miss instead of being replayed. A result for
+        which ``store_if`` returns False is returned without being stored.
+        """
+        if self.backend is None:
+            return call()
+
+        chain = self.context_hash(context)
+        cached = self.lookup(step, api_config, inputs)
+        if cached is not None:
+            entry = json.loads(cached)
+            if entry["context_hash"] == chain:
+                print(f"♻️  LLM cache hit for {step}")
+                return result_type.model_validate_json(entry["result"])
+            print(f"LLM cache entry for {step} skipped: context chain differs")
+
+        result = call()
+        if store_if is not None and not store_if(result):
+            return result
+        self.store(step, api_config, inputs, json.dumps({
+            "context_hash": chain,
+            "result": result.model_dump_json(),
+        }))
+        return result
+
+
+def _build_backend() -> Optional[CacheBackend]:
+    mode = os.getenv("LLM_CACHE", "off").lower()
+    if mode == "memory":
+        return MemoryBackend(LLM_CACHE_TTL_SECONDS)
+    if mode == "file":
+        return FileBackend(LLM_CACHE_DIR, LLM_CACHE_TTL_SECONDS)
+    return None
+
+
+LLM_CACHE = LLMCache(_build_backend())
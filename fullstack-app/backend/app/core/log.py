@@ -0,0 +1,60 @@
+"""Non-blocking log output for the application's worker threads.
+
+Records are handed to a queue and written to stdout by one listener thread, so
+concurrent transcription workers never wait on each other for the stream. Until
+start_logging runs, and again after stop_logging, the ``app`` loggers write to
+stdout directly so nothing is lost outside the server's lifespan.
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+_direct_handler = logging.StreamHandler(sys.stdout)
+_direct_handler.setFormatter(logging.Formatter("%(message)s"))
+
+
+def _use_direct_output() -> None:
+    app_logger = logging.getLogger("app")
+    for handler in list(app_logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            app_logger.removeHandler(handler)
+    app_logger.addHandler(_direct_handler)
+    app_logger.propagate = False
+
+
+def start_logging(level: int = logging.INFO) -> None:
+    """Route the ``app`` loggers through a queue to stdout; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(level)
+    app_logger.removeHandler(_direct_handler)
+    app_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    app_logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records, stop the listener thread and go back to direct output."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    _use_direct_output()
+
+
+logging.getLogger("app").setLevel(logging.INFO)
+_use_direct_output()
@@ -0,0 +1,82 @@
+"""Ordered, non-blocking delivery of workflow progress events.
+
+Progress callbacks typically push to a WebSocket, so they run on a background
+thread instead of the orchestrator's thread. Each callback has its own bounded
+queue and delivery thread, so a slow client never stalls a report, its own or
+anyone else's.
+"""
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+# Past this backlog a callback's new events are dropped rather than waited on, so a
+# lagging client misses updates instead of holding up the workflow
+PROGRESS_QUEUE_MAX_SIZE = int(os.getenv("PROGRESS_QUEUE_MAX_SIZE", "1000"))
+
+# A callback's delivery thread exits after this long without events
+PROGRESS_CHANNEL_IDLE_SECONDS = 30
+
+
+class _ProgressChannel:
+    """Bounded event queue for one callback, drained in order by its own thread."""
+
+    def __init__(self, callback: ProgressCallback) -> None:
+        self.callback = callback
+        self.events: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=PROGRESS_QUEUE_MAX_SIZE)
+        threading.Thread(target=self._deliver, name="progress-delivery", daemon=True).start()
+
+    def _deliver(self) -> None:
+        while True:
+            try:
+                event = self.events.get(timeout=PROGRESS_CHANNEL_IDLE_SECONDS)
+            except queue.Empty:
+                # Retire under the lock so no event is queued to a channel that has stopped
+                with _channels_lock:
+                    if self.events.empty():
+                        if _channels.get(self.callback) is self:
+                            del _channels[self.callback]
+                        return
+                continue
+            try:
+                self.callback(event)
+            except Exception as err:
+                print(f"Progress callback failed for step '{event['step']}': {err}")
+            finally:
+                self.events.task_done()
+
+
+_channels: Dict[ProgressCallback, _ProgressChannel] = {}
+_channels_lock = threading.Lock()
+
+
+def queue_progress(callback: Optional[ProgressCallback], step: str, status: str,
+                   message: Optional[str] = None) -> None:
+    """Queue a progress update for ``callback``; a no-op when there is no callback."""
+    if not callback:
+        return
+    event = {
+        'step': step,
+        'status': status,
+        'message': message
+    }
+    with _channels_lock:
+        channel = _channels.get(callback)
+        if channel is None:
+            channel = _channels[callback] = _ProgressChannel(callback)
+        try:
+            channel.events.put_nowait(event)
+        except queue.Full:
+            pass
+
+
+def flush_progress(callback: Optional[ProgressCallback]) -> None:
+    """Wait until the events queued so far for this callback have been delivered."""
+    if not callback:
+        return
+    with _channels_lock:
+        channel = _channels.get(callback)
+    if channel is not None:
+        channel.events.join()
@@ -0,0 +1,40 @@
+"""Process-wide request budgets for rate-limited API endpoints."""
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket that lets bursts through and blocks only once the budget is spent.
+
+    Tokens refill continuously at ``rate_per_sec`` up to ``capacity``; ``acquire``
+    waits for a token, and ``penalize`` empties the bucket when the provider
+    answers with a rate-limit error so every caller backs off together.
+    """
+
+    def __init__(self, rate_per_sec: float, capacity: float) -> None:
+        self.rate_per_sec = rate_per_sec
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_sec)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate_per_sec
+            time.sleep(wait)
+
+    def penalize(self, retry_after: float) -> None:
+        """Drain the bucket so no token is available for ``retry_after`` seconds."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0) - retry_after * self.rate_per_sec
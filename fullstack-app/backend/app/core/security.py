@@ -1,5 +1,8 @@
+import hashlib
+import hmac
 import os
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
 
 import jwt
@@ -19,8 +22,20 @@ def _get_env(name: str) -> str:
     return value.strip()
 
 
+def _digest(value: str) -> bytes:
+    return hashlib.sha256(value.strip().encode()).digest()
+
+
+@lru_cache(maxsize=None)
+def _get_env_digest(name: str) -> bytes:
+    return _digest(_get_env(name))
+
+
 def verify_credentials(username: str, password: str) -> bool:
-    return username.strip() == _get_env("ADMIN_USER") and password.strip() == _get_env("ADMIN_PASSWORD")
+    # Compare fixed-length digests in constant time; evaluate both to avoid leaking which one failed
+    user_ok = hmac.compare_digest(_digest(username), _get_env_digest("ADMIN_USER"))
+    password_ok = hmac.compare_digest(_digest(password), _get_env_digest("ADMIN_PASSWORD"))
+    return user_ok and password_ok
 
 
 def create_access_token(username: str) -> str:
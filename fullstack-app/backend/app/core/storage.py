@@ -1,7 +1,76 @@
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict
 
+import anyio
+
 OUTPUT_DIR = Path(__file__).resolve().parents[2] / "output"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-REPORT_STORE: Dict[str, Dict[str, Any]] = {}
+REPORT_STORE_MAX_SIZE = int(os.getenv("REPORT_STORE_MAX_SIZE", "1000"))
+
+# Server-wide cap on synchronous report workflows running at once (transcription,
+# LLM rounds); further requests wait on the event loop for a free slot before starting
+MAX_CONCURRENT_REPORTS = int(os.getenv("MAX_CONCURRENT_REPORTS", "2"))
+REPORT_SLOTS = anyio.Semaphore(MAX_CONCURRENT_REPORTS)
+
+
+class ReportStore(OrderedDict):
+    """In-memory report store capped at ``max_size`` entries.
+
+    Reads and writes mark an entry as recently used; once the cap is exceeded the
+    least recently used report is evicted and its DOCX file removed. Reports are
+    written from worker threads while the event loop reads them, so both go
+    through one lock.
+    """
+
+    def __init__(self, max_size: int):
+        self._lock = threading.RLock()
+        super().__init__()
+        self.max_size = max_size
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self:
+                return default
+            self.move_to_end(key)
+            return self[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.max_size:
+                _, evicted = self.popitem(last=False)
+                self._remove_report_file(evicted)
+
+    def _remove_report_file(self, entry: Dict[str, Any]) -> None:
+        doc_path = entry.get("results", {}).get("final_report_path")
+        if not doc_path:
+            return
+        # Keep the file while another entry still points at it
+        if any(other.get("results", {}).get("final_report_path") == doc_path for other in self.values()):
+            return
+        from app.formatting.formatter import discard_word_doc
+        discard_word_doc(doc_path)
+        Path(doc_path).unlink(missing_ok=True)
+
+
+REPORT_STORE: ReportStore = ReportStore(REPORT_STORE_MAX_SIZE)
+
+
+def get_report_store() -> ReportStore:
+    """FastAPI dependency for the report store; tests override it with a fresh store."""
+    return REPORT_STORE
+
+
+def get_report_slots() -> anyio.Semaphore:
+    """FastAPI dependency for the report slots; tests override it with their own semaphore."""
+    return REPORT_SLOTS
+
+
+def get_output_dir() -> Path:
+    """FastAPI dependency for where reports are written; tests override it with a temp dir."""
+    return OUTPUT_DIR
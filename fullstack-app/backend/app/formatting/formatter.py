@@ -1,221 +1,99 @@
 import os
-import openai
-from openai import AzureOpenAI
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-import re
-from datetime import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from pathlib import Path
 
-def format_title_case(text):
-    """Format text in proper title case, keeping small words lowercase except at the beginning"""
-    small_words = {'of', 'and', 'for', 'the', 'in', 'on', 'at', 'to', 'a', 'an', 'as', 'but', 'or', 'nor', 'with', 'by', 'from'}
-    words = text.split()
-    formatted_words = []
-    
-    for i, word in enumerate(words):
-        # Always capitalize the first word and words not in small_words list
-        if i == 0 or word.lower() not in small_words:
-            # Handle AI specifically
-            if word.lower() == 'ai':
-                formatted_words.append('AI')
-            else:
-                formatted_words.append(word.capitalize())
-        else:
-            formatted_words.append(word.lower())
-    
-    return ' '.join(formatted_words)
+from app.formatting.sections import _COMPANY_FIELDS, _split_bold, format_title_case, parse_report_sections
+from app.formatting.word_doc import render_word_doc
+
+# Rendered HTML / DOCX for recently formatted reports, keyed by a digest of the inputs
+_RENDER_CACHE_SIZE = 32
+_HTML_RENDER_CACHE = OrderedDict()
+_DOCX_RENDER_CACHE = OrderedDict()
+_RENDER_CACHE_LOCK = threading.Lock()
+
+def _render_key(report_content, company_data):
+    """Digest of the report text and company data used as the render cache key"""
+    raw = report_content + repr(sorted(company_data.items()))
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+def _cached_render(cache, report_content, company_data, render):
+    """Return the cached rendering for these inputs, rendering and storing it on a miss"""
+    key = _render_key(report_content, company_data)
+    with _RENDER_CACHE_LOCK:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    
+    rendered = render(report_content, company_data)
+    with _RENDER_CACHE_LOCK:
+        cache[key] = rendered
+        if len(cache) > _RENDER_CACHE_SIZE:
+            cache.popitem(last=False)
+    return rendered
 
 def convert_markdown_to_html(text):
     """Convert markdown formatting to HTML"""
     # Convert **text** to <strong>text</strong> - make sure to handle multiple occurrences
-    text = re.sub(r'\*\*([^*]+?)\*\*', r'<strong>\1</strong>', text)
-    return text
+    return "".join(f"<strong>{part}</strong>" if bold else part for part, bold in _split_bold(text))
 
-def remove_markdown_formatting(text):
-    """Remove markdown formatting markers"""
-    # Remove ** markers
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-    return text
-
-def add_formatted_text_to_paragraph(paragraph, text):
-    """Add text with markdown formatting to a Word paragraph"""
-    # Split text by markdown bold patterns
-    parts = re.split(r'(\*\*.*?\*\*)', text)
-    
-    for part in parts:
-        if part.startswith('**') and part.endswith('**'):
-            # This is bold text - remove ** and add as bold run
-            bold_text = part[2:-2]  # Remove ** from both ends
-            run = paragraph.add_run(bold_text)
-            run.bold = True
+def _render_html_blocks(blocks):
+    """Render parsed section blocks as HTML paragraphs and lists"""
+    fmt_parts = []
+    for block in blocks:
+        if block.kind == "bullets":
+            fmt_parts.append("<ul>")
+            fmt_parts.extend(f"<li>{convert_markdown_to_html(item)}</li>" for item in block.content)
+            fmt_parts.append("</ul>")
         else:
-            # Regular text
-            if part:  # Only add if not empty
-                paragraph.add_run(part)
-
-def add_content_with_bullets(doc, content):
-    """Add content to document, handling bullet points properly"""
-    # Check if content contains bullet points
-    if '- ' in content and '\n- ' in content:
-        # Split into lines and process
-        lines = content.split('\n')
-        current_paragraph_lines = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('- '):
-                # First, add any accumulated non-bullet content
-                if current_paragraph_lines:
-                    para_text = '\n'.join(current_paragraph_lines).strip()
-                    if para_text:
-                        content_paragraph = doc.add_paragraph()
-                        add_formatted_text_to_paragraph(content_paragraph, para_text)
-                    current_paragraph_lines = []
-                
-                # Add bullet point
-                bullet_text = line[2:].strip()  # Remove '- ' prefix
-                bullet_paragraph = doc.add_paragraph(style='List Bullet')
-                add_formatted_text_to_paragraph(bullet_paragraph, bullet_text)
-            else:
-                # Regular line, accumulate it
-                if line:  # Only add non-empty lines
-                    current_paragraph_lines.append(line)
-        
-        # Add any remaining non-bullet content
-        if current_paragraph_lines:
-            para_text = '\n'.join(current_paragraph_lines).strip()
-            if para_text:
-                content_paragraph = doc.add_paragraph()
-                add_formatted_text_to_paragraph(content_paragraph, para_text)
-    else:
-        # No bullet points, handle as regular paragraphs
-        paragraphs = content.split('\n\n')
-        for para_text in paragraphs:
-            if para_text.strip():
-                content_paragraph = doc.add_paragraph()
-                add_formatted_text_to_paragraph(content_paragraph, para_text.strip())
+            fmt_parts.append(f"<p>{convert_markdown_to_html(block.content)}</p>")
+    return "".join(fmt_parts)
 
 def format_report_as_html(report_content, company_data):
     """Convert the raw report to formatted HTML using a simple approach"""
+    return _cached_render(_HTML_RENDER_CACHE, report_content, company_data, _render_report_html)
+
+def _render_report_html(report_content, company_data):
+    
+    company_name, country, consultation_date, experts, customer_manager, consultation_type = (
+        company_data[key] for key in _COMPANY_FIELDS
+    )
     
     # Start with the title and basic HTML structure
-    html = f"""
+    html_parts = [f"""
     <div style="font-family: Arial, sans-serif; max-width: 1200px; margin: 0 auto; padding: 20px; line-height: 1.6;">
         <h1 style="text-align: center; margin-bottom: 30px; color: #2c3e50;">AI ASSESSMENT AND CONSULTATION</h1>
         
         <!-- Company Info Section -->
         <div style="margin-bottom: 30px;">
-            <p><strong>Company Name:</strong> {company_data['company_name']}</p>
-            <p><strong>Country:</strong> {company_data['country']}</p>
-            <p><strong>Consultation Date:</strong> {company_data['consultation_date']}</p>
-            <p><strong>Expert(s):</strong> {company_data['experts']}</p>
-            <p><strong>Customer manager:</strong> {company_data['customer_manager']}</p>
-            <p><strong>Consultation Type:</strong> {company_data['consultation_type']}</p>
+            <p><strong>Company Name:</strong> {company_name}</p>
+            <p><strong>Country:</strong> {country}</p>
+            <p><strong>Consultation Date:</strong> {consultation_date}</p>
+            <p><strong>Expert(s):</strong> {experts}</p>
+            <p><strong>Customer manager:</strong> {customer_manager}</p>
+            <p><strong>Consultation Type:</strong> {consultation_type}</p>
         </div>
-    """
-    
-    # Find each section in the report
-    section_patterns = [
-        ("AI Maturity Level", r"\*\*AI Maturity Level:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Current Solution Development Stage", r"\*\*Current Solution Development Stage:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Validity of Concept and Authenticity of Problem Addressed", r"\*\*Validity of Concept and Authenticity of Problem Addressed:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Integration and Importance of AI in the Idea", r"\*\*Integration and Importance of AI.*?:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Identified Target Market and Customer Segments", r"\*\*Identified Target Market.*?:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Data Requirement Assessment", r"\*\*Data Requirement Assessment:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Data Collection Strategy", r"\*\*Data Collection Strategy:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Technical Expertise and Capability", r"\*\*Technical Expertise.*?:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Expectations from FAIR Services", r"\*\*Expectations from FAIR Services:\*\*(.*?)(?=\*\*|\Z)"),
-        ("Recommendations", r"\*\*Recommendations:\*\*(.*?)(?=\*\*|\Z)")
-        ]
+    """]
     
-    # Extract and add each section
-    for section_title, pattern in section_patterns:
-        matches = re.search(pattern, report_content, re.DOTALL | re.IGNORECASE)
-        if matches:
-            content = matches.group(1).strip()
-            
-            # Convert markdown formatting to HTML
-            content = convert_markdown_to_html(content)
-            
-            # Format bullet points for any section that has them
-            if "- " in content:
-                # Split content into paragraphs and bullet sections
-                formatted_content = ""
-                lines = content.split('\n')
-                current_paragraph = []
-                bullet_items = []
-                in_bullets = False
-                
-                for line in lines:
-                    line = line.strip()
-                    if line.startswith('- '):
-                        # Starting bullet section
-                        if current_paragraph:
-                            # Add accumulated paragraph
-                            para_text = ' '.join(current_paragraph).strip()
-                            if para_text:
-                                formatted_content += f"<p>{para_text}</p>"
-                            current_paragraph = []
-                        
-                        # Add bullet item
-                        bullet_text = line[2:].strip()  # Remove '- '
-                        bullet_items.append(bullet_text)
-                        in_bullets = True
-                    elif line == "" and in_bullets:
-                        # Empty line after bullets - end bullet section
-                        if bullet_items:
-                            formatted_content += "<ul>"
-                            for item in bullet_items:
-                                formatted_content += f"<li>{item}</li>"
-                            formatted_content += "</ul>"
-                            bullet_items = []
-                        in_bullets = False
-                    elif line == "":
-                        # Empty line - paragraph break
-                        if current_paragraph:
-                            para_text = ' '.join(current_paragraph).strip()
-                            if para_text:
-                                formatted_content += f"<p>{para_text}</p>"
-                            current_paragraph = []
-                    else:
-                        # Regular text line
-                        if in_bullets:
-                            # This might be continuation of bullet item
-                            if bullet_items:
-                                bullet_items[-1] += " " + line
-                        else:
-                            current_paragraph.append(line)
-                
-                # Handle remaining content
-                if bullet_items:
-                    formatted_content += "<ul>"
-                    for item in bullet_items:
-                        formatted_content += f"<li>{item}</li>"
-                    formatted_content += "</ul>"
-                
-                if current_paragraph:
-                    para_text = ' '.join(current_paragraph).strip()
-                    if para_text:
-                        formatted_content += f"<p>{para_text}</p>"
-                
-                content = formatted_content if formatted_content else f"<p>{content}</p>"
-            else:
-                # No bullet points - handle as regular paragraphs
-                content = content.replace("\n\n", "</p><p>")
-                content = f"<p>{content}</p>"
-            
-            # Format section title for HTML
-            formatted_title = format_title_case(section_title)
-            html += f"""
+    # Add each section from the shared parse
+    for section_title, blocks in parse_report_sections(report_content):
+        content = _render_html_blocks(blocks)
+        
+        # Format section title for HTML
+        formatted_title = format_title_case(section_title)
+        html_parts.append(f"""
             <div style="margin-bottom: 15px;">
                 <h3 style="color: #2c3e50; border-bottom: 1px solid #eee;">{formatted_title}</h3>
                 {content}
             </div>
-            """
+            """)
     
     # Add AI Maturity Levels section with smaller font
-    html += """
+    html_parts.append("""
     <hr style="margin: 30px 0; border: 0; border-top: 1px solid #eee;">
     
     <div style="font-size: 0.8em; color: #666;">
@@ -228,150 +106,76 @@ def format_report_as_html(report_content, company_data):
         <p><strong>High:</strong> Companies with advanced AI products and established customer base. AI is integrated into workflows with established data management processes and AI roadmap. They require assistance with specific technical details or developing new AI applications.</p>
     </div>
     </div>
-    """
+    """)
     
-    return html
+    return "".join(html_parts)
 
-def create_word_doc(report_content, file_path, company_data):
-    """Create a Word document from the report content using a non-tabular format"""
-    from docx import Document
-    from docx.shared import Pt, Inches, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH
-    
-    doc = Document()
-    
-    # Set margins
-    sections = doc.sections
-    for section in sections:
-        section.top_margin = Inches(0.8)
-        section.bottom_margin = Inches(0.8)
-        section.left_margin = Inches(0.8)
-        section.right_margin = Inches(0.8)
-    
-    # Add title
-    title = doc.add_heading('AI ASSESSMENT AND CONSULTATION', level=0)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    # Set title text to black
-    for run in title.runs:
-        run.font.color.rgb = RGBColor(0, 0, 0)
-    
-    # Add company info
-    company_info = [
-        f"Company Name: {company_data['company_name']}",
-        f"Country: {company_data['country']}",
-        f"Consultation Date: {company_data['consultation_date']}",
-        f"Expert(s): {company_data['experts']}",
-        f"Customer manager: {company_data['customer_manager']}",
-        f"Consultation Type: {company_data['consultation_type']}"
-    ]
-    
-    for info in company_info:
-        doc.add_paragraph(info)
-    
-    doc.add_paragraph()  # Add spacing
-    
-    # Extract sections from the report content
-    sections = [
-            "AI Maturity Level",
-            "Current Solution Development Stage",
-            "Validity of Concept and Authenticity of Problem Addressed",
-            "Integration and Importance of AI in the Idea",
-            "Identified Target Market and Customer Segments",
-            "Data Requirement Assessment",
-            "Data Collection Strategy",
-            "Technical Expertise and Capability", 
-            "Expectations from FAIR Services",
-            "Recommendations"
-            ]
-    
-    # Try to extract content for each section
-    for section in sections:
-        section_title = section.strip()
-        
-        # Format the section title correctly (proper title case)
-        formatted_section_title = format_title_case(section_title)
-        
-        # Find section in the report content with improved pattern matching
-        pattern = rf"(?i)\*\*\s*{re.escape(section)}:?\*\*\s*(.*?)(?=\n\s*\*\*|\n\s*-{10,}|\Z)"
-        matches = re.findall(pattern, report_content, re.DOTALL | re.IGNORECASE | re.MULTILINE)
-        
-        content = ""
-        if matches:
-            # Handle the case where matches is a list
-            if isinstance(matches, list) and len(matches) > 0:
-                content = matches[0]
-                # Handle if content is a tuple
-                if isinstance(content, tuple) and len(content) > 0:
-                    content = content[0]
-        
-        # If we didn't find content with the pattern above, try an alternative approach
-        if not content:
-            pattern = rf"(?i)\b{re.escape(section)}\s*:\s*(.*?)(?=\n\s*\*\*|\n\s*[A-Z]|\n\s*-{10,}|\Z)"
-            matches = re.findall(pattern, report_content, re.DOTALL | re.IGNORECASE | re.MULTILINE)
-            if matches and len(matches) > 0:
-                content = matches[0]
-                # Handle if content is a tuple
-                if isinstance(content, tuple) and len(content) > 0:
-                    content = content[0]
-        
-        # Ensure content is a string
-        if not isinstance(content, str):
-            if isinstance(content, (list, tuple)) and len(content) > 0:
-                content = content[0]
-            else:
-                content = str(content)
-        
-        content = content.strip()
-        
-        # Add the section to the document
-        if content:
-            # Add section heading - Remove the asterisks
-            heading = doc.add_heading(level=2)
-            heading_run = heading.add_run(formatted_section_title)
-            heading_run.bold = True
-            # Set heading text to black
-            heading_run.font.color.rgb = RGBColor(0, 0, 0)
-            
-            # Add section content with proper formatting including bullets
-            add_content_with_bullets(doc, content)
-    
-    # Add horizontal line
-    doc.add_paragraph("----------------------------------------------------------------------------")
-    
-    # Add AI Maturity Levels section (footer) - Remove the asterisks
-    maturity_heading = doc.add_heading(level=2)
-    maturity_heading_run = maturity_heading.add_run("AI Maturity Levels")
-    maturity_heading_run.bold = True
-    # Set heading text to black
-    maturity_heading_run.font.color.rgb = RGBColor(0, 0, 0)
-    
-    # Low maturity level - with smaller font
-    p = doc.add_paragraph()
-    low_label = p.add_run("Low: ")
-    low_label.bold = True
-    low_label.font.size = Pt(9)  # Smaller font size
-    low_text = p.add_run("Companies that are in the early stages of AI integration or development and/or typically in the ideation phase and/or with only a proof of concept. They have limited data, resources, and expertise, and a minimal understanding of AI. AI is minimally or not at all used in workflows, with no data management processes or AI roadmap in place.")
-    low_text.font.size = Pt(9)  # Smaller font size
-    
-    # Moderate maturity level - with smaller font
-    p = doc.add_paragraph()
-    moderate_label = p.add_run("Moderate: ")
-    moderate_label.bold = True
-    moderate_label.font.size = Pt(9)  # Smaller font size
-    moderate_text = p.add_run("Companies that are progressing in their AI journey, moving beyond the proof of concept stage with functional solutions. They have adequate data, resources, expertise, and understanding of AI. AI is either fully or partially integrated into their workflows, supported by established or developing data management processes, and guided by a partially or fully formulated AI roadmap.")
-    moderate_text.font.size = Pt(9)  # Smaller font size
-    
-    # High maturity level - with smaller font
-    p = doc.add_paragraph()
-    high_label = p.add_run("High: ")
-    high_label.bold = True
-    high_label.font.size = Pt(9)  # Smaller font size
-    high_text = p.add_run("Companies that have already developed advanced AI products and have an established customer base. AI is fully or partially integrated into their workflows, supported by established data management processes, and guided by an AI roadmap. They require assistance with specific technical details or when developing new AI applications on top of their existing solutions.")
-    high_text.font.size = Pt(9)  # Smaller font size
-    
-    # Save the document
-    doc.save(file_path)
-    
-    return file_path
+# Background DOCX rendering so workflows can return before the file is written.
+# python-docx serialisation is pure-Python CPU work, so the render itself runs in
+# worker processes (spawned, since the server process is multi-threaded) and the
+# threads only wait for it, cache the bytes and write the file. Workers import only
+# app.formatting.word_doc, and the pools are started on the first render.
+DOCX_RENDER_PROCESSES = int(os.getenv("DOCX_RENDER_PROCESSES", str(min(4, os.cpu_count() or 1))))
+_DOCX_EXECUTOR = None
+_DOCX_PROCESS_POOL = None
+_DOCX_POOL_LOCK = threading.Lock()
+_PENDING_DOCX = {}
+
+def _docx_pools():
+    """The render thread and process pools, started on first use"""
+    global _DOCX_EXECUTOR, _DOCX_PROCESS_POOL
+    with _DOCX_POOL_LOCK:
+        if _DOCX_EXECUTOR is None:
+            _DOCX_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="docx-render")
+            _DOCX_PROCESS_POOL = ProcessPoolExecutor(max_workers=DOCX_RENDER_PROCESSES, mp_context=get_context("spawn"))
+        return _DOCX_EXECUTOR, _DOCX_PROCESS_POOL
+
+def _render_word_doc_in_process(report_content, company_data):
+    _, process_pool = _docx_pools()
+    try:
+        return process_pool.submit(render_word_doc, report_content, dict(company_data)).result()
+    except BrokenProcessPool as err:
+        # A lost worker shouldn't lose the report; render in this thread instead
+        print(f"DOCX render process unavailable ({err}), rendering in-thread")
+        return render_word_doc(report_content, company_data)
+
+def _write_word_doc(report_content, company_data, file_path):
+    data = _cached_render(_DOCX_RENDER_CACHE, report_content, company_data, _render_word_doc_in_process)
+    Path(file_path).write_bytes(data)
+    return data
+
+def submit_word_doc(report_content, company_data, file_path):
+    """Render and write the Word document in the background; see wait_for_word_doc"""
+    executor, _ = _docx_pools()
+    future = executor.submit(_write_word_doc, report_content, company_data, file_path)
+    with _RENDER_CACHE_LOCK:
+        _PENDING_DOCX[file_path] = future
+    future.add_done_callback(lambda done: _finish_word_doc(file_path, done))
+    return future
+
+def _finish_word_doc(file_path, future):
+    # A failed render stays registered so downloads keep reporting its error
+    # until discard_word_doc is called for the path
+    if future.exception() is not None:
+        print(f"Background DOCX render failed for {file_path}: {future.exception()}")
+        return
+    with _RENDER_CACHE_LOCK:
+        if _PENDING_DOCX.get(file_path) is future:
+            del _PENDING_DOCX[file_path]
+
+def discard_word_doc(file_path):
+    """Forget the background render of file_path, including a failed one"""
+    with _RENDER_CACHE_LOCK:
+        _PENDING_DOCX.pop(file_path, None)
 
+def pending_word_doc(file_path):
+    """The background render of file_path while it is running or after it failed, otherwise None"""
+    with _RENDER_CACHE_LOCK:
+        return _PENDING_DOCX.get(file_path)
 
+def wait_for_word_doc(file_path, timeout=None):
+    """Block until a background render of file_path (if any) has been written; raises if it failed"""
+    with _RENDER_CACHE_LOCK:
+        future = _PENDING_DOCX.get(file_path)
+    if future is not None:
+        future.result(timeout)
@@ -0,0 +1,163 @@
+"""Parsing of generated reports into titled sections of paragraph and bullet blocks.
+
+Shared by the HTML preview and the Word export; kept free of rendering
+dependencies so DOCX worker processes can import it cheaply.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Report sections in output order
+SECTION_TITLES = (
+    "AI Maturity Level",
+    "Current Solution Development Stage",
+    "Validity of Concept and Authenticity of Problem Addressed",
+    "Integration and Importance of AI in the Idea",
+    "Identified Target Market and Customer Segments",
+    "Data Requirement Assessment",
+    "Data Collection Strategy",
+    "Technical Expertise and Capability",
+    "Expectations from FAIR Services",
+    "Recommendations",
+)
+
+
+# Heading prefix matched for each section; long titles are often shortened in the report
+_SECTION_PREFIXES = {
+    "Integration and Importance of AI in the Idea": "Integration and Importance of AI",
+    "Identified Target Market and Customer Segments": "Identified Target Market",
+    "Technical Expertise and Capability": "Technical Expertise",
+}
+_PREFIX_TO_TITLE = {_SECTION_PREFIXES.get(title, title).lower(): title for title in SECTION_TITLES}
+
+# One pass over the report for all "**Title:**" headings; a section runs until the next
+# heading line, a horizontal rule or the end of the report
+_SECTION_SCAN = re.compile(
+    r"\*\*\s*(" + "|".join(re.escape(_SECTION_PREFIXES.get(t, t)) for t in SECTION_TITLES) + r")[^*\n]*?:?\*\*\s*"
+    r"(.*?)(?=\n\s*\*\*|\n\s*-{10,}|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+
+# Fallback for plain "Title:" headings when the report was not written with bold headings
+_PLAIN_SECTION_SCAN = re.compile(
+    r"\b(" + "|".join(re.escape(t) for t in SECTION_TITLES) + r")\s*:\s*"
+    r"(.*?)(?=\n\s*\*\*|\n\s*[A-Z]|\n\s*-{10,}|\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+
+
+def _scan_sections(scan_re, report_content, key_to_title):
+    """Map section titles to their content, keeping the first occurrence of each."""
+    sections = {}
+    for match in scan_re.finditer(report_content):
+        title = key_to_title[match.group(1).lower()]
+        content = match.group(2).strip()
+        if content and title not in sections:
+            sections[title] = content
+    return sections
+
+
+def extract_report_sections(report_content):
+    """Extract the content of each known section from the report in a single pass."""
+    sections = _scan_sections(_SECTION_SCAN, report_content, _PREFIX_TO_TITLE)
+    if len(sections) < len(SECTION_TITLES):
+        plain_sections = _scan_sections(_PLAIN_SECTION_SCAN, report_content,
+                                        {title.lower(): title for title in SECTION_TITLES})
+        for title, content in plain_sections.items():
+            sections.setdefault(title, content)
+    return sections
+
+# Company fields shown at the top of every report, in display order
+_COMPANY_FIELDS = ('company_name', 'country', 'consultation_date', 'experts', 'customer_manager', 'consultation_type')
+
+# Paragraph break: a line that is empty or whitespace only
+_BLANK_LINE_RE = re.compile(r'\n\s*\n')
+
+# Bullet list: a "- item" line plus every following non-blank line, up to a blank line
+_BULLET_LIST_RE = re.compile(r'^[^\S\n]*- [^\n]*?\S[^\n]*(?:\n(?![^\S\n]*$)[^\n]*)*', re.MULTILINE)
+
+# A run of content inside a section: kind is "para" (text) or "bullets" (tuple of items)
+Block = namedtuple("Block", ["kind", "content"])
+
+
+def _paragraph_blocks(text):
+    """Paragraph blocks for text without bullets: runs of non-blank lines joined by spaces."""
+    paragraphs = (
+        ' '.join(stripped for stripped in map(str.strip, chunk.split('\n')) if stripped)
+        for chunk in _BLANK_LINE_RE.split(text)
+    )
+    return [Block("para", para_text) for para_text in paragraphs if para_text]
+
+
+def _bullet_block(text):
+    """Bullet block for a matched bullet list; non-bullet lines continue the previous item."""
+    items = []
+    for stripped in map(str.strip, text.split('\n')):
+        if stripped.startswith('- '):
+            items.append(stripped[2:].strip())  # Remove '- '
+        else:
+            items[-1] += " " + stripped
+    return Block("bullets", tuple(items))
+
+
+def _segment_section(content):
+    """Split section content into paragraph and bullet blocks."""
+    if '- ' not in content:
+        # No bullet markers anywhere: only paragraphs separated by blank lines
+        return tuple(_paragraph_blocks(content))
+
+    blocks = []
+    position = 0
+    for match in _BULLET_LIST_RE.finditer(content):
+        blocks.extend(_paragraph_blocks(content[position:match.start()]))
+        blocks.append(_bullet_block(match.group()))
+        position = match.end()
+    blocks.extend(_paragraph_blocks(content[position:]))
+    return tuple(blocks)
+
+
+@lru_cache(maxsize=8)
+def parse_report_sections(report_content):
+    """
+    Parse the report once into (title, blocks) pairs in section order.
+
+    Both the HTML preview and the Word export render from this structure, and the
+    result is cached so the second renderer of the same report reuses it.
+    """
+    report_sections = extract_report_sections(report_content)
+    return tuple(
+        (title, _segment_section(report_sections[title]))
+        for title in SECTION_TITLES
+        if title in report_sections
+    )
+
+
+# Words kept lowercase in titles unless they start the title
+_SMALL_WORDS = frozenset({'of', 'and', 'for', 'the', 'in', 'on', 'at', 'to', 'a', 'an', 'as', 'but', 'or', 'nor', 'with', 'by', 'from'})
+
+@lru_cache(maxsize=256)
+def format_title_case(text):
+    """Format text in proper title case, keeping small words lowercase except at the beginning"""
+    words = text.split()
+    formatted_words = []
+    
+    for i, word in enumerate(words):
+        # Always capitalize the first word and words not in _SMALL_WORDS list
+        if i == 0 or word.lower() not in _SMALL_WORDS:
+            # Handle AI specifically
+            if word.lower() == 'ai':
+                formatted_words.append('AI')
+            else:
+                formatted_words.append(word.capitalize())
+        else:
+            formatted_words.append(word.lower())
+    
+    return ' '.join(formatted_words)
+
+def _split_bold(text):
+    """Split text on ** markers into (segment, is_bold) pairs; an unpaired trailing marker stays literal"""
+    parts = text.split('**')
+    if len(parts) % 2 == 0:
+        # Odd number of markers - the last one has no closing pair
+        parts[-2:] = [parts[-2] + '**' + parts[-1]]
+    return [(part, bool(i & 1)) for i, part in enumerate(parts) if part]
@@ -0,0 +1,162 @@
+"""Word rendering of a generated report.
+
+This is the entry point of the DOCX render worker processes, so importing it
+only loads python-docx and the report parser; the fixed template and footer are
+built on first use in each process.
+"""
+import copy
+import io
+import re
+from functools import lru_cache
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Inches, Pt, RGBColor
+
+from app.formatting.sections import _COMPANY_FIELDS, _split_bold, format_title_case, parse_report_sections
+
+# AI maturity level descriptions for the Word report footer
+_MATURITY_TEXTS = (
+    ("Low: ", "Companies that are in the early stages of AI integration or development and/or typically in the ideation phase and/or with only a proof of concept. They have limited data, resources, and expertise, and a minimal understanding of AI. AI is minimally or not at all used in workflows, with no data management processes or AI roadmap in place."),
+    ("Moderate: ", "Companies that are progressing in their AI journey, moving beyond the proof of concept stage with functional solutions. They have adequate data, resources, expertise, and understanding of AI. AI is either fully or partially integrated into their workflows, supported by established or developing data management processes, and guided by a partially or fully formulated AI roadmap."),
+    ("High: ", "Companies that have already developed advanced AI products and have an established customer base. AI is fully or partially integrated into their workflows, supported by established data management processes, and guided by an AI roadmap. They require assistance with specific technical details or when developing new AI applications on top of their existing solutions."),
+)
+
+_BLACK = RGBColor(0, 0, 0)
+
+# Characters dropped from company names when building the report file name
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s-]')
+_SPACE_TO_UNDERSCORE = str.maketrans(' ', '_')
+
+def safe_report_filename(company_data, report_id=None):
+    """DOCX file name for a report, built from the company name and, when given, the report id"""
+    company_name_safe = _UNSAFE_FILENAME_CHARS.sub(
+        '', company_data.get('company_name', 'Unknown')
+    ).strip().translate(_SPACE_TO_UNDERSCORE)
+    # The id keeps reports for the same company from overwriting each other's file
+    if report_id:
+        return f"{company_name_safe}_{report_id}.docx"
+    return f"{company_name_safe}.docx"
+
+def add_formatted_text_to_paragraph(paragraph, text):
+    """Add text with markdown formatting to a Word paragraph"""
+    # Alternate plain and bold runs between ** markers
+    for part, bold in _split_bold(text):
+        run = paragraph.add_run(part)
+        if bold:
+            run.bold = True
+
+def add_blocks_to_document(doc, blocks):
+    """Add parsed section blocks to a Word document as paragraphs and bullet points"""
+    for block in blocks:
+        if block.kind == "bullets":
+            for item in block.content:
+                bullet_paragraph = doc.add_paragraph(style='List Bullet')
+                add_formatted_text_to_paragraph(bullet_paragraph, item)
+        else:
+            content_paragraph = doc.add_paragraph()
+            add_formatted_text_to_paragraph(content_paragraph, block.content)
+
+@lru_cache(maxsize=1)
+def _template_bytes():
+    """Build the fixed part of every Word report (margins and title) once and serialize it"""
+    doc = Document()
+    
+    # Set margins
+    sections = doc.sections
+    for section in sections:
+        section.top_margin = Inches(0.8)
+        section.bottom_margin = Inches(0.8)
+        section.left_margin = Inches(0.8)
+        section.right_margin = Inches(0.8)
+    
+    # Add title
+    title = doc.add_heading('AI ASSESSMENT AND CONSULTATION', level=0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    # Set title text to black
+    for run in title.runs:
+        run.font.color.rgb = _BLACK
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+@lru_cache(maxsize=1)
+def _footer_elements():
+    """Build the fixed report footer once in a throwaway document and keep its <w:p> elements"""
+    doc = Document()
+    body = doc.element.body
+    start = len(body) - 1  # New paragraphs are inserted before sectPr
+    
+    # Add horizontal line
+    doc.add_paragraph("----------------------------------------------------------------------------")
+    
+    # Add AI Maturity Levels section (footer) - Remove the asterisks
+    maturity_heading = doc.add_heading(level=2)
+    maturity_heading_run = maturity_heading.add_run("AI Maturity Levels")
+    maturity_heading_run.bold = True
+    # Set heading text to black
+    maturity_heading_run.font.color.rgb = _BLACK
+    
+    # Maturity level descriptions - with smaller font
+    for label, description in _MATURITY_TEXTS:
+        p = doc.add_paragraph()
+        label_run = p.add_run(label)
+        label_run.bold = True
+        label_run.font.size = Pt(9)  # Smaller font size
+        text_run = p.add_run(description)
+        text_run.font.size = Pt(9)  # Smaller font size
+    
+    return tuple(body[start:len(body) - 1])
+
+def render_word_doc(report_content, company_data):
+    """Render the Word report in memory and return the DOCX bytes"""
+    company_name, country, consultation_date, experts, customer_manager, consultation_type = (
+        company_data[key] for key in _COMPANY_FIELDS
+    )
+    
+    # Start from the prebuilt template with margins and title already set
+    doc = Document(io.BytesIO(_template_bytes()))
+    
+    # Add company info
+    company_info = [
+        f"Company Name: {company_name}",
+        f"Country: {country}",
+        f"Consultation Date: {consultation_date}",
+        f"Expert(s): {experts}",
+        f"Customer manager: {customer_manager}",
+        f"Consultation Type: {consultation_type}"
+    ]
+    
+    for info in company_info:
+        doc.add_paragraph(info)
+    
+    doc.add_paragraph()  # Add spacing
+    
+    # Add each section from the shared parse
+    for section_title, blocks in parse_report_sections(report_content):
+        # Format the section title correctly (proper title case)
+        formatted_section_title = format_title_case(section_title)
+        
+        # Add section heading - Remove the asterisks
+        heading = doc.add_heading(level=2)
+        heading_run = heading.add_run(formatted_section_title)
+        heading_run.bold = True
+        # Set heading text to black
+        heading_run.font.color.rgb = _BLACK
+        
+        # Add section content with proper formatting including bullets
+        add_blocks_to_document(doc, blocks)
+    
+    # Add the fixed footer (horizontal line and AI Maturity Levels) from prebuilt XML
+    sect_pr = doc.element.body.sectPr
+    for element in _footer_elements():
+        # Keep the section properties as the last child of the body
+        sect_pr.addprevious(copy.deepcopy(element))
+    
+    # Save the document
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
@@ -1,15 +1,37 @@
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+import os
 from pathlib import Path
 
 from app.api.routes.auth import router as auth_router
 from app.api.routes.reports import router as reports_router
-
-ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
-load_dotenv(ENV_PATH)
-
-app = FastAPI()
+from app.core.config import build_api_config, validate_api_keys
+from app.core.log import start_logging, stop_logging
+
+ENV_PATH = Path(__file__).parent.parent / ".env"
+# Worker processes inherit the environment, so the .env file is read once per deployment
+if not os.environ.get("APP_ENV_LOADED"):
+    load_dotenv(ENV_PATH)
+    os.environ["APP_ENV_LOADED"] = "1"
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_logging()
+    # Warm the API config cache and surface missing keys at startup instead of on the first report
+    for use_azure in (True, False):
+        try:
+            validate_api_keys(build_api_config(use_azure, "gpt-5.1"))
+        except ValueError as exc:
+            print(f"Warning: {exc}")
+    yield
+    stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -6,83 +6,145 @@ Implements the same generation-verification-revision workflow as the procedural
 but using LangGraph's state machine for agentic workflow management.
 """
 
+import asyncio
+import importlib
+import json
+import logging
+import operator
 import os
-import re
-from typing import Dict, Any, List, Optional, TypedDict, Callable
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Annotated, Dict, Any, List, Optional, Callable
+from functools import lru_cache, partial
+import anyio
 from langgraph.graph import StateGraph, END
 
+from app.core.llm_cache import LLM_CACHE
+from app.core.progress import flush_progress, queue_progress
+from app.formatting.word_doc import safe_report_filename
+
+logger = logging.getLogger(__name__)
+
+# Background worker that readies the post-transcription stages while a recording is transcribed
+_PREWARM_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="report-prewarm")
+
 
 def notify_progress(state: "WorkflowState", step: str, status: str,
                     message: Optional[str] = None) -> None:
-    """Send progress updates back to the caller when available."""
-    callback = state.get('progress_callback')
-    if not callback:
-        return
-    try:
-        callback({
-            'step': step,
-            'status': status,
-            'message': message
-        })
-    except Exception as err:
-        print(f"Progress callback failed for step '{step}': {err}")
+    """Queue a progress update for the caller when a callback is set."""
+    queue_progress(state.progress_callback, step, status, message)
+
+
+def _issue_trend(previous: int, current: int) -> str:
+    """Arrow describing how the issue count moved between two rounds."""
+    if current < previous:
+        return "↓"
+    if current > previous:
+        return "↑"
+    return "→"
 
 
 # ========================================
 # State Schema
 # ========================================
 
-class WorkflowState(TypedDict):
+@dataclass(slots=True)
+class WorkflowState:
     """
     State maintained throughout the LangGraph workflow for V6.
     This matches the procedural workflow's state tracking but in a structured format.
+    Nodes read fields as attributes and return only the fields they change; fields
+    annotated with operator.add are appended to, so nodes return just the new items.
     """
     # Input data (immutable throughout workflow)
-    audio_file_path: Optional[str]        # If processing recording
-    transcript: Optional[str]             # If processing existing transcript
     output_dir: str
     company_data: Dict[str, Any]
-    meeting_notes: str
-    additional_instructions: str
-    compress_audio: bool
     api_config: Dict[str, Any]
-    progress_callback: Optional[Callable[[Dict[str, Any]], None]]
+    audio_file_path: Optional[str] = None        # If processing recording
+    transcript: Optional[str] = None             # If processing existing transcript
+    meeting_notes: str = ""
+    additional_instructions: str = ""
+    compress_audio: bool = True
+    progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    report_id: Optional[str] = None              # Included in the DOCX file name
 
     # Workflow configuration
-    verification_rounds: int              # max rounds
+    verification_rounds: int = 5              # max rounds
 
     # Processed data
-    transcript_path: Optional[str]        # Saved transcript path
+    transcript_path: Optional[str] = None        # Saved transcript path
 
     # Report tracking
-    current_report: str
-    report_history: List[str]
+    current_report: str = ""
+    report_history: Annotated[List[str], operator.add] = field(default_factory=list)
 
     # Verification tracking
-    verification_round: int
-    verification_history: List[Dict[str, Any]]
+    verification_round: int = 1
+    verification_history: Annotated[List[Dict[str, Any]], operator.add] = field(default_factory=list)
+    total_issues_reported: Annotated[int, operator.add] = 0   # Running sum of issues over verification_history
 
     # Revision tracking
-    revision_history: List[Dict[str, Any]]
+    revision_history: Annotated[List[Dict[str, Any]], operator.add] = field(default_factory=list)
+    revision_notes: Annotated[List[str], operator.add] = field(default_factory=list)   # revision_notes of each revision_history entry
 
     # Workflow control
-    needs_revision: bool
-    status: str
-    error_message: Optional[str]
-    last_verification_result: Optional[Any]
+    needs_revision: bool = False
+    status: str = "initialized"
+    error_message: Optional[str] = None
+    last_verification_result: Optional[Any] = None
 
     # Final outputs
-    final_report_content: str
-    final_report_path: str
-    sample_report: Optional[str]
+    final_report_content: str = ""
+    final_report_path: str = ""
+    sample_report: Optional[str] = None
+    sample_report_future: Optional[Future] = None   # Set by process_recording's prewarm
+
+
+def _as_workflow_state(values: Any) -> WorkflowState:
+    """LangGraph returns the final channel values as a mapping; rebuild the state object from it."""
+    if isinstance(values, WorkflowState):
+        return values
+    return WorkflowState(**values)
+
+
+_AGENT_MODULES = (
+    "app.agents.transcription_agent",
+    "app.agents.report_agent",
+    "app.agents.verification_agent",
+    "app.agents.revision_agent",
+    "app.formatting.formatter",
+)
+
+
+def _prepare_report_stage() -> str:
+    """
+    Import the modules the nodes import lazily and return the sample report, so neither
+    the first request nor the stages after transcription wait for the imports.
+    """
+    for module_name in _AGENT_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            # The node's own import will surface the error when it runs
+            logger.exception("Preloading %s failed", module_name)
+    from app.agents.report_agent import get_sample_report
+    return get_sample_report()
+
+
+def _prefill_report_prompt(api_config: Dict[str, Any]) -> None:
+    """Warm the provider's prompt cache for report generation; a failure only loses the warm-up."""
+    try:
+        from app.agents.report_agent import prefill_report_context
+        prefill_report_context(api_config)
+    except Exception as err:
+        print(f"Report prompt prefill failed: {err}")
 
 
 # ========================================
 # Node Functions
 # ========================================
 
-def transcribe_audio_node(state: WorkflowState) -> WorkflowState:
+def transcribe_audio_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node 1: Transcribe audio/video file.
     Only executes if audio_file_path is provided.
@@ -94,8 +156,8 @@ def transcribe_audio_node(state: WorkflowState) -> WorkflowState:
     try:
         from app.agents.transcription_agent import transcribe_audio_file
 
-        audio_file = state.get('audio_file_path')
-        transcript_present = state.get('transcript')
+        audio_file = state.audio_file_path
+        transcript_present = state.transcript
         if audio_file:
             notify_progress(state, 'analysis', 'start', 'Transcribing recording...')
         elif transcript_present:
@@ -106,20 +168,19 @@ def transcribe_audio_node(state: WorkflowState) -> WorkflowState:
             print("="*70)
             notify_progress(state, 'analysis', 'complete', 'Transcript ready for analysis.')
             return {
-                **state,
                 'status': 'transcription_skipped'
             }
 
         print(f"🤖 Orchestrator invoking Transcription agent...")
         print(f"📁 File: {os.path.basename(audio_file)}")
-        print(f"⚙️  Compress audio: {state.get('compress_audio', True)}")
+        print(f"⚙️  Compress audio: {state.compress_audio}")
 
         # Execute transcription
         result = transcribe_audio_file(
             audio_file,
-            state['output_dir'],
-            state['api_config'],
-            state.get('compress_audio', True)
+            state.output_dir,
+            state.api_config,
+            state.compress_audio
         )
 
         print(f"\n✅ Transcription complete!")
@@ -129,7 +190,6 @@ def transcribe_audio_node(state: WorkflowState) -> WorkflowState:
         notify_progress(state, 'analysis', 'complete', 'Transcript ready for analysis.')
 
         return {
-            **state,
             'transcript': result.transcript,
             'transcript_path': result.transcript_path,
             'status': 'transcribed'
@@ -140,13 +200,26 @@ def transcribe_audio_node(state: WorkflowState) -> WorkflowState:
         print("="*70)
         notify_progress(state, 'analysis', 'complete', 'Transcription failed.')
         return {
-            **state,
             'status': 'error',
             'error_message': f'Transcription failed: {str(e)}'
         }
 
 
-def generate_report_node(state: WorkflowState) -> WorkflowState:
+# LLM cache step under which approved (report, final verification) pairs are stored
+APPROVED_REPORT_STEP = 'approved_report'
+
+
+def _report_inputs(state: WorkflowState) -> Dict[str, Any]:
+    """Inputs that fully determine the generated report, used as cache key material."""
+    return {
+        'transcript': state.transcript,
+        'company_data': state.company_data,
+        'meeting_notes': state.meeting_notes,
+        'additional_instructions': state.additional_instructions,
+    }
+
+
+def generate_report_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node 2: Generate initial AI consultancy report.
     Wraps generate_report_content()
@@ -157,16 +230,38 @@ def generate_report_node(state: WorkflowState) -> WorkflowState:
     print(f"🤖 Orchestrator invoking Report Generation agent...")
 
     try:
-        from app.agents.report_agent import generate_report_content
+        from app.agents.report_agent import ReportResult, generate_report_content
 
         notify_progress(state, 'report_generation', 'start', 'Generating draft report...')
+
+        # Identical inputs that were approved before go straight to saving
+        approved = LLM_CACHE.lookup(APPROVED_REPORT_STEP, state.api_config, _report_inputs(state))
+        if approved is not None:
+            snapshot = json.loads(approved)
+            print(f"\n♻️  Inputs match a previously approved report - skipping verification")
+            print("="*70)
+            notify_progress(state, 'report_generation', 'complete', 'Initial report ready.')
+            return {
+                'current_report': snapshot['report'],
+                'report_history': [snapshot['report']],
+                'verification_history': [snapshot['verification']],
+                'needs_revision': False,
+                'status': 'approved_from_cache'
+            }
+
         # Execute report generation
-        result = generate_report_content(
-            state['transcript'],
-            state['company_data'],
-            state.get('meeting_notes', ''),
-            state.get('additional_instructions', ''),
-            state['api_config']
+        result = LLM_CACHE.cached_call(
+            'generate',
+            state.api_config,
+            _report_inputs(state),
+            ReportResult,
+            lambda: generate_report_content(
+                state.transcript,
+                state.company_data,
+                state.meeting_notes,
+                state.additional_instructions,
+                state.api_config
+            ),
         )
 
         print(f"\n✅ Report generation complete!")
@@ -175,7 +270,6 @@ def generate_report_node(state: WorkflowState) -> WorkflowState:
 
         notify_progress(state, 'report_generation', 'complete', 'Initial report ready.')
         return {
-            **state,
             'current_report': result.report_content,
             'report_history': [result.report_content],
             'status': 'report_generated'
@@ -186,62 +280,82 @@ def generate_report_node(state: WorkflowState) -> WorkflowState:
         print("="*70)
         notify_progress(state, 'report_generation', 'complete', 'Report generation failed.')
         return {
-            **state,
             'status': 'error',
             'error_message': f'Report generation failed: {str(e)}'
         }
 
 
-def verify_report_node(state: WorkflowState) -> WorkflowState:
+async def verify_report_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node 3: Verify report quality and compliance.
-    Wraps verify_report_content()
+    Runs verify_report_content() and the deterministic structure check concurrently
+    and merges their issues.
     """
-    round_num = state.get('verification_round', 1)
+    round_num = state.verification_round
 
     print("\n" + "="*70)
-    print(f"🔍 NODE 3: VERIFICATION (Round {round_num}/{state['verification_rounds']})")
+    print(f"🔍 NODE 3: VERIFICATION (Round {round_num}/{state.verification_rounds})")
     print("="*70)
     print(f"🤖 Orchestrator invoking Verification agent...")
 
     try:
         from app.agents.report_agent import get_sample_report
-        from app.agents.verification_agent import verify_report_content
-
-        # Prepare context
-        previous_verifications = [
-            v for v in state['verification_history']
-            if v.get('round', 0) < round_num
-        ]
-        previous_revisions = [
-            r.get('revision_notes', '')
-            for r in state['revision_history']
-            if r.get('round', 0) < round_num
-        ]
+        from app.agents.verification_agent import (
+            VerificationResult, check_report_structure, merge_structure_issues, verify_report_content
+        )
+
+        # Prepare context; histories only hold earlier rounds because the round
+        # advances after each revision
+        previous_verifications = state.verification_history
+        previous_revisions = state.revision_notes
 
         # Enhanced context logging
         if previous_verifications:
-            total_prev_issues = sum(len(v.get('issues', [])) for v in previous_verifications)
-            print(f"Context memory: {len(previous_verifications)} previous rounds with {total_prev_issues} total issues")
+            print(f"Context memory: {len(previous_verifications)} previous rounds with {state.total_issues_reported} total issues")
         if previous_revisions:
             print(f"Revision context: {len([r for r in previous_revisions if r])} revision notes available")
 
-        # Get sample report for format checking
-        sample_report = get_sample_report()
+        # Get sample report for format checking; already resolved if prewarmed during transcription
+        if state.sample_report_future is not None:
+            sample_report = state.sample_report_future.result()
+        else:
+            sample_report = get_sample_report()
 
         # Execute verification
         notify_progress(state, f'verification_{round_num}', 'start', f'Running verification round {round_num}...')
-        result = verify_report_content(
-            state['current_report'],
-            state['transcript'],
-            state.get('meeting_notes', ''),
-            state.get('additional_instructions', ''),
-            round_num,
-            state['api_config'],
-            previous_verification_results=previous_verifications,
-            previous_revision_notes=previous_revisions,
-            sample_report=sample_report
+        content_result, structure_issues = await asyncio.gather(
+            asyncio.to_thread(
+                LLM_CACHE.cached_call,
+                'verify',
+                state.api_config,
+                {
+                    'report': state.current_report,
+                    'transcript': state.transcript,
+                    'meeting_notes': state.meeting_notes,
+                    'additional_instructions': state.additional_instructions,
+                    'round': round_num,
+                    'previous_verifications': previous_verifications,
+                    'previous_revisions': previous_revisions,
+                    'sample_report': sample_report,
+                },
+                VerificationResult,
+                lambda: verify_report_content(
+                    state.current_report,
+                    state.transcript,
+                    state.meeting_notes,
+                    state.additional_instructions,
+                    round_num,
+                    state.api_config,
+                    previous_verification_results=previous_verifications,
+                    previous_revision_notes=previous_revisions,
+                    sample_report=sample_report
+                ),
+                # Fallback and truncated results stand in for a failed or partial call
+                store_if=lambda verified: verified.status == 'completed',
+            ),
+            asyncio.to_thread(check_report_structure, state.current_report, sample_report),
         )
+        result = merge_structure_issues(content_result, structure_issues)
 
         # Extract verification details
         issues = [issue.dict() if hasattr(issue, 'dict') else issue
@@ -255,7 +369,8 @@ def verify_report_node(state: WorkflowState) -> WorkflowState:
             'needs_revision': result.needs_revision,
             'summary': result.summary,
             'strengths': result.strengths,
-            'decision_explanation': result.decision_explanation
+            'decision_explanation': result.decision_explanation,
+            'status': result.status
         }
 
         print(f"\n📊 VERIFICATION RESULTS:")
@@ -266,8 +381,7 @@ def verify_report_node(state: WorkflowState) -> WorkflowState:
         # Print issue trend if not first round
         if round_num > 1 and previous_verifications:
             prev_issues = len(previous_verifications[-1].get('issues', []))
-            trend = "↓" if len(issues) < prev_issues else "↑" if len(issues) > prev_issues else "→"
-            print(f"   └─ Issue trend: {prev_issues} → {len(issues)} {trend}")
+            print(f"   └─ Issue trend: {prev_issues} → {len(issues)} {_issue_trend(prev_issues, len(issues))}")
 
         print(f"Decision: {result.decision_explanation}")
         print(f"🔀 Orchestrator routing to: {'Revision Agent' if result.needs_revision else 'Save Report'}")
@@ -275,9 +389,9 @@ def verify_report_node(state: WorkflowState) -> WorkflowState:
         notify_progress(state, f'verification_{round_num}', 'complete', f'Completed verification round {round_num}.')
 
         return {
-            **state,
             # DO NOT increment round here - matches procedural logic where round increments AFTER revise
-            'verification_history': state['verification_history'] + [verification_entry],
+            'verification_history': [verification_entry],
+            'total_issues_reported': len(issues),
             'needs_revision': result.needs_revision,
             'last_verification_result': result,
             'status': 'verified'
@@ -288,19 +402,18 @@ def verify_report_node(state: WorkflowState) -> WorkflowState:
         print("="*70)
         notify_progress(state, f'verification_{round_num}', 'complete', f'Verification failed in round {round_num}.')
         return {
-            **state,
             'status': 'error',
             'error_message': f'Verification failed: {str(e)}'
         }
 
 
-def revise_report_node(state: WorkflowState) -> WorkflowState:
+def revise_report_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node 4: Revise report based on verification feedback.
     Wraps revise_report_content()
     """
     # After fix: verification doesn't increment, so use current round directly
-    round_num = state.get('verification_round', 1)  # Current revision round
+    round_num = state.verification_round  # Current revision round
 
     print("\n" + "="*70)
     print(f"🔧 NODE 4: REVISION (Round {round_num})")
@@ -308,10 +421,10 @@ def revise_report_node(state: WorkflowState) -> WorkflowState:
     print(f"🤖 Orchestrator invoking Revision agent...")
 
     try:
-        from app.agents.revision_agent import revise_report_content
+        from app.agents.revision_agent import RevisionResult, revise_report_content
 
         # Get last verification result
-        last_verification = state['last_verification_result']
+        last_verification = state.last_verification_result
         issues = [issue.dict() if hasattr(issue, 'dict') else issue
                   for issue in last_verification.issues]
 
@@ -328,13 +441,29 @@ def revise_report_node(state: WorkflowState) -> WorkflowState:
 
         # Execute revision
         notify_progress(state, f'revision_{round_num}', 'start', f'Applying revisions for round {round_num}...')
-        result = revise_report_content(
-            state['current_report'],
-            verification_dict,
-            state['company_data'],
-            state['transcript'],
-            round_num,
-            state['api_config']
+        result = LLM_CACHE.cached_call(
+            'revise',
+            state.api_config,
+            {
+                'report': state.current_report,
+                'company_data': state.company_data,
+                'transcript': state.transcript,
+            },
+            RevisionResult,
+            lambda: revise_report_content(
+                state.current_report,
+                verification_dict,
+                state.company_data,
+                state.transcript,
+                round_num,
+                state.api_config
+            ),
+            context={
+                'issues': issues,
+                'suggestions': last_verification.suggestions,
+                'round': round_num,
+                'revision_notes': state.revision_notes,
+            },
         )
 
         print(f"\n✅ Revision complete!")
@@ -354,10 +483,10 @@ def revise_report_node(state: WorkflowState) -> WorkflowState:
 
         notify_progress(state, f'revision_{round_num}', 'complete', f'Completed revisions for round {round_num}.')
         return {
-            **state,
             'current_report': result.revised_report,
-            'report_history': state['report_history'] + [result.revised_report],
-            'revision_history': state['revision_history'] + [revision_entry],
+            'report_history': [result.revised_report],
+            'revision_history': [revision_entry],
+            'revision_notes': [result.revision_notes],
             'verification_round': round_num + 1,  # Increment round AFTER revision (matches procedural)
             'status': 'revised'
         }
@@ -367,16 +496,16 @@ def revise_report_node(state: WorkflowState) -> WorkflowState:
         print("="*70)
         notify_progress(state, f'revision_{round_num}', 'complete', f'Revision failed in round {round_num}.')
         return {
-            **state,
             'status': 'error',
             'error_message': f'Revision failed: {str(e)}'
         }
 
 
-def save_report_node(state: WorkflowState) -> WorkflowState:
+def save_report_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node 5: Save final report to DOCX.
-    Wraps _ensure_report_saved() logic
+    The DOCX is rendered in the background so the workflow can return immediately;
+    readers of final_report_path call wait_for_word_doc() first.
     """
     print("\n" + "="*70)
     print("💾 NODE 5: SAVE REPORT")
@@ -384,27 +513,28 @@ def save_report_node(state: WorkflowState) -> WorkflowState:
     print(f"🤖 Orchestrator saving final report...")
 
     try:
-        from app.formatting.formatter import create_word_doc
+        from app.formatting.formatter import submit_word_doc
         notify_progress(state, 'finalization', 'start', 'Saving final report...')
-        # Create safe filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        company_name_safe = re.sub(
-            r'[^\w\s-]', '',
-            state['company_data'].get('company_name', 'Unknown')
-        ).strip().replace(' ', '_')
-
         # Save as DOCX
-        doc_path = os.path.join(state['output_dir'], f"{company_name_safe}.docx")
-        os.makedirs(state['output_dir'], exist_ok=True)
-        create_word_doc(state['current_report'], doc_path, state['company_data'])
-
-        print(f"\n✅ Report saved successfully!")
+        doc_path = os.path.join(state.output_dir, safe_report_filename(state.company_data, state.report_id))
+        os.makedirs(state.output_dir, exist_ok=True)
+        submit_word_doc(state.current_report, state.company_data, doc_path)
+
+        # Remember approved reports so a rerun with the same inputs skips straight here,
+        # unless the approving round was a fallback standing in for a failed verifier call
+        if (state.verification_history and not state.needs_revision and state.status != 'approved_from_cache'
+                and state.verification_history[-1].get('status', 'completed') == 'completed'):
+            LLM_CACHE.store(APPROVED_REPORT_STEP, state.api_config, _report_inputs(state), json.dumps({
+                'report': state.current_report,
+                'verification': state.verification_history[-1]
+            }, default=str))
+
+        print(f"\n✅ Report queued for saving!")
         print(f"   └─ Path: {doc_path}")
         print("="*70)
         notify_progress(state, 'finalization', 'complete', 'Report finalized.')
         return {
-            **state,
-            'final_report_content': state['current_report'],
+            'final_report_content': state.current_report,
             'final_report_path': doc_path,
             'status': 'completed'
         }
@@ -414,7 +544,6 @@ def save_report_node(state: WorkflowState) -> WorkflowState:
         print("="*70)
         notify_progress(state, 'finalization', 'complete', 'Failed to save report.')
         return {
-            **state,
             'status': 'error',
             'error_message': f'Save failed: {str(e)}'
         }
@@ -426,15 +555,17 @@ def save_report_node(state: WorkflowState) -> WorkflowState:
 
 def should_continue_after_transcription(state: WorkflowState) -> str:
     """Route after transcription node"""
-    if state['status'] == 'error':
+    if state.status == 'error':
         return END
     return "generate_report"
 
 
 def should_continue_after_report_generation(state: WorkflowState) -> str:
     """Route after report generation node"""
-    if state['status'] == 'error':
+    if state.status == 'error':
         return END
+    if state.status == 'approved_from_cache':
+        return "save_report"
     return "verify_report"
 
 
@@ -450,12 +581,12 @@ def should_continue_after_verification(state: WorkflowState) -> str:
     Key: Procedural increments round AFTER revise, so we revise on rounds 1,2,3
     when max_rounds=3, then the counter becomes 4 and loop exits.
     """
-    if state['status'] == 'error':
+    if state.status == 'error':
         return END
 
-    needs_revision = state.get('needs_revision', False)
-    current_round = state.get('verification_round', 1)
-    max_rounds = state.get('verification_rounds', 5)
+    needs_revision = state.needs_revision
+    current_round = state.verification_round
+    max_rounds = state.verification_rounds
 
     # Approved - no revision needed (matches: if not needs_revision: break)
     if not needs_revision:
@@ -480,12 +611,12 @@ def should_continue_after_revision(state: WorkflowState) -> str:
     Procedural increments AFTER revision, then checks while condition.
     If verification_round > max_rounds after increment, loop exits.
     """
-    if state['status'] == 'error':
+    if state.status == 'error':
         return END
 
     # After revision, round was incremented. Check if we exceeded max_rounds
-    current_round = state.get('verification_round', 1)
-    max_rounds = state.get('verification_rounds', 5)
+    current_round = state.verification_round
+    max_rounds = state.verification_rounds
 
     # If we've exceeded max rounds after revision, save (matches procedural loop exit)
     if current_round > max_rounds:
@@ -501,14 +632,21 @@ def should_continue_after_revision(state: WorkflowState) -> str:
 # Workflow Graph Builder
 # ========================================
 
+@lru_cache(maxsize=1)
 def build_workflow_graph():
     """
     Build the LangGraph workflow for V6.
+    Compiled once per process and shared by every orchestrator; nodes take all
+    configuration from the state, so the graph itself holds no per-run data.
 
     Graph Structure:
     START → transcribe → generate → verify ⇄ revise → save → END
     """
 
+    # Warm the agent imports in the background; a node importing the same module
+    # meanwhile just waits on the import lock
+    _PREWARM_EXECUTOR.submit(_prepare_report_stage)
+
     # Create state graph
     workflow = StateGraph(WorkflowState)
 
@@ -537,6 +675,7 @@ def build_workflow_graph():
         should_continue_after_report_generation,
         {
             "verify_report": "verify_report",
+            "save_report": "save_report",
             END: END
         }
     )
@@ -593,7 +732,8 @@ class LangGraphOrchestrator:
                          meeting_notes: str = "",
                          additional_instructions: str = "",
                          compress_audio: bool = True,
-                         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+                         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         report_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process an audio/video recording through LangGraph workflow.
 
@@ -604,6 +744,7 @@ class LangGraphOrchestrator:
             meeting_notes: Additional meeting notes
             additional_instructions: Additional instructions for report
             compress_audio: Whether to compress audio before transcription
+            report_id: Report id included in the DOCX file name
 
         Returns:
             Dict with workflow results (same format as SDKOrchestrator)
@@ -611,36 +752,29 @@ class LangGraphOrchestrator:
 
         print(f"\n🚀 Starting LangGraph workflow for: {os.path.basename(file_path)}")
 
+        # Ready the report stages in the background while the recording is transcribed
+        sample_report_future = _PREWARM_EXECUTOR.submit(_prepare_report_stage)
+        _PREWARM_EXECUTOR.submit(_prefill_report_prompt, self.api_config)
+
         # Initialize state
-        initial_state = {
-            'audio_file_path': file_path,
-            'transcript': None,
-            'output_dir': output_dir,
-            'company_data': company_data,
-            'meeting_notes': meeting_notes,
-            'additional_instructions': additional_instructions,
-            'compress_audio': compress_audio,
-            'api_config': self.api_config,
-            'verification_rounds': self.verification_rounds,
-            'transcript_path': None,
-            'current_report': '',
-            'report_history': [],
-            'verification_round': 1,
-            'verification_history': [],
-            'revision_history': [],
-            'needs_revision': False,
-            'status': 'initialized',
-            'error_message': None,
-            'last_verification_result': None,
-            'final_report_content': '',
-            'final_report_path': '',
-            'sample_report': None,
-            'progress_callback': progress_callback
-        }
+        initial_state = WorkflowState(
+            audio_file_path=file_path,
+            output_dir=output_dir,
+            company_data=company_data,
+            meeting_notes=meeting_notes,
+            additional_instructions=additional_instructions,
+            compress_audio=compress_audio,
+            api_config=self.api_config,
+            verification_rounds=self.verification_rounds,
+            progress_callback=progress_callback,
+            report_id=report_id,
+            sample_report_future=sample_report_future
+        )
 
         try:
-            # Execute workflow
-            final_state = self.workflow.invoke(initial_state)
+            # Execute workflow; the async runtime lets verification sub-checks run concurrently
+            final_state = _as_workflow_state(asyncio.run(self.workflow.ainvoke(initial_state)))
+            flush_progress(progress_callback)
 
             # Format results to match SDKOrchestrator output
             return self._format_workflow_results(final_state)
@@ -660,7 +794,8 @@ class LangGraphOrchestrator:
                           company_data: Dict[str, Any],
                           meeting_notes: str = "",
                           additional_instructions: str = "",
-                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          report_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process existing transcript through LangGraph workflow.
 
@@ -670,6 +805,7 @@ class LangGraphOrchestrator:
             company_data: Company information dictionary
             meeting_notes: Additional meeting notes
             additional_instructions: Additional instructions for report
+            report_id: Report id included in the DOCX file name
 
         Returns:
             Dict with workflow results (same format as SDKOrchestrator)
@@ -678,35 +814,23 @@ class LangGraphOrchestrator:
         print(f"\n🚀 Starting LangGraph workflow with existing transcript")
 
         # Initialize state (no audio file, use provided transcript)
-        initial_state = {
-            'audio_file_path': None,  # No audio file
-            'transcript': transcript,  # Use provided transcript
-            'output_dir': output_dir,
-            'company_data': company_data,
-            'meeting_notes': meeting_notes,
-            'additional_instructions': additional_instructions,
-            'compress_audio': True,  # N/A
-            'api_config': self.api_config,
-            'verification_rounds': self.verification_rounds,
-            'transcript_path': None,
-            'current_report': '',
-            'report_history': [],
-            'verification_round': 1,
-            'verification_history': [],
-            'revision_history': [],
-            'needs_revision': False,
-            'status': 'transcription_skipped',  # Skip transcription
-            'error_message': None,
-            'last_verification_result': None,
-            'final_report_content': '',
-            'final_report_path': '',
-            'sample_report': None,
-            'progress_callback': progress_callback
-        }
+        initial_state = WorkflowState(
+            transcript=transcript,  # Use provided transcript
+            output_dir=output_dir,
+            company_data=company_data,
+            meeting_notes=meeting_notes,
+            additional_instructions=additional_instructions,
+            api_config=self.api_config,
+            verification_rounds=self.verification_rounds,
+            status='transcription_skipped',  # Skip transcription
+            progress_callback=progress_callback,
+            report_id=report_id
+        )
 
         try:
-            # Execute workflow
-            final_state = self.workflow.invoke(initial_state)
+            # Execute workflow; the async runtime lets verification sub-checks run concurrently
+            final_state = _as_workflow_state(asyncio.run(self.workflow.ainvoke(initial_state)))
+            flush_progress(progress_callback)
 
             # Format results to match SDKOrchestrator output
             return self._format_workflow_results(final_state)
@@ -722,46 +846,101 @@ class LangGraphOrchestrator:
                 'final_report': None
             }
 
+    async def process_recordings_batch(self, file_paths: List[str], output_dir: str,
+                                       company_data_list: List[Dict[str, Any]],
+                                       meeting_notes: str = "",
+                                       additional_instructions: str = "",
+                                       compress_audio: bool = True,
+                                       report_ids: Optional[List[Optional[str]]] = None,
+                                       slots: Optional[anyio.Semaphore] = None) -> List[Dict[str, Any]]:
+        """
+        Process several recordings concurrently, each as its own report workflow.
+
+        Every recording holds one of the server's report slots while it is transcribed
+        and reported on, so a batch shares the MAX_CONCURRENT_REPORTS cap with the
+        report routes instead of starting every workflow at once. Must be awaited on
+        the server's event loop, where the slots live.
+
+        Args:
+            file_paths: Paths to audio/video files
+            output_dir: Directory to save outputs
+            company_data_list: Company information dictionary for each file (same order)
+            meeting_notes: Additional meeting notes
+            additional_instructions: Additional instructions for report
+            compress_audio: Whether to compress audio before transcription
+            report_ids: Report id for each file (same order), included in the DOCX file names
+            slots: Semaphore bounding the concurrent workflows; defaults to REPORT_SLOTS
+
+        Returns:
+            List of workflow results, one per file (same format as process_recording)
+        """
+        if len(file_paths) != len(company_data_list):
+            raise ValueError("file_paths and company_data_list must have the same length")
+        report_ids = report_ids or [None] * len(file_paths)
+        if len(report_ids) != len(file_paths):
+            raise ValueError("file_paths and report_ids must have the same length")
+        if slots is None:
+            from app.core.storage import REPORT_SLOTS
+            slots = REPORT_SLOTS
+
+        print(f"\n🚀 Starting LangGraph batch workflow for {len(file_paths)} recordings")
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(file_paths)
+
+        async def process(index: int) -> None:
+            # process_recording reports its own failures, so one file can't cancel the others
+            async with slots:
+                results[index] = await anyio.to_thread.run_sync(partial(
+                    self.process_recording, file_paths[index], output_dir, company_data_list[index],
+                    meeting_notes, additional_instructions, compress_audio, report_id=report_ids[index]
+                ))
+
+        async with anyio.create_task_group() as task_group:
+            for index in range(len(file_paths)):
+                task_group.start_soon(process, index)
+
+        return results
+
     def _format_workflow_results(self, final_state: WorkflowState) -> Dict[str, Any]:
         """Format LangGraph state into SDKOrchestrator-compatible results"""
 
-        if final_state['status'] == 'error':
+        if final_state.status == 'error':
             return {
                 'status': 'failed',
-                'error': final_state.get('error_message', 'Unknown error'),
-                'company_data': final_state['company_data'],
-                'verification_history': final_state['verification_history'],
-                'revision_history': final_state['revision_history'],
+                'error': final_state.error_message,
+                'company_data': final_state.company_data,
+                'verification_history': final_state.verification_history,
+                'revision_history': final_state.revision_history,
                 'final_report': None,
-                'transcript_path': final_state.get('transcript_path')
+                'transcript_path': final_state.transcript_path
             }
 
         # Success case - format results
         results = {
             'status': 'success',
-            'company_data': final_state['company_data'],
-            'verification_history': final_state['verification_history'],
-            'revision_history': final_state['revision_history'],
+            'company_data': final_state.company_data,
+            'verification_history': final_state.verification_history,
+            'revision_history': final_state.revision_history,
             'final_report': {
-                'content': final_state['final_report_content'],
-                'doc_path': final_state['final_report_path']
+                'content': final_state.final_report_content,
+                'doc_path': final_state.final_report_path
             },
-            'final_report_content': final_state['final_report_content'],
-            'final_report_path': final_state['final_report_path'],
-            'transcript_path': final_state.get('transcript_path')
+            'final_report_content': final_state.final_report_content,
+            'final_report_path': final_state.final_report_path,
+            'transcript_path': final_state.transcript_path
         }
 
         # Add individual verification results for compatibility
-        for i, ver_result in enumerate(final_state['verification_history'], 1):
+        for i, ver_result in enumerate(final_state.verification_history, 1):
             results[f'verification_{i}_results'] = ver_result
 
         # Add individual revision results for compatibility
-        for i, rev_result in enumerate(final_state['revision_history'], 1):
+        for i, rev_result in enumerate(final_state.revision_history, 1):
             results[f'revision_{i}_results'] = rev_result
 
         print(f"\n✅ LANGGRAPH WORKFLOW COMPLETED SUCCESSFULLY!")
-        print(f"📊 Final Score: {final_state['verification_history'][-1]['score']}/10")
-        print(f"🔄 Total Rounds: {len(final_state['verification_history'])}")
+        print(f"📊 Final Score: {final_state.verification_history[-1]['score']}/10")
+        print(f"🔄 Total Rounds: {len(final_state.verification_history)}")
 
         return results
 
@@ -4,14 +4,15 @@ This implements a sequential workflow using SDK-style functions for each step.
 """
 
 import os
-import re
 import json
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, Callable
-from datetime import datetime
 from app.agents.transcription_agent import transcribe_audio_file
-from app.agents.report_agent import generate_report_content, get_sample_report
-from app.agents.verification_agent import verify_report_content
+from app.agents.report_agent import generate_report_content, get_sample_report, prefill_report_context
+from app.agents.verification_agent import check_report_structure, merge_structure_issues, verify_report_content
 from app.agents.revision_agent import revise_report_content
+from app.core.progress import flush_progress, queue_progress
+from app.formatting.word_doc import safe_report_filename
 
 
 class SDKOrchestrator:
@@ -29,7 +30,8 @@ class SDKOrchestrator:
     
     def process_recording(self, file_path: str, output_dir: str, company_data: Dict[str, Any], 
                          meeting_notes: str = "", additional_instructions: str = "", compress_audio: bool = True,
-                         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+                         progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         report_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process an audio/video recording through the complete workflow.
         Maintains original orchestrator workflow logic using SDK functions.
@@ -40,14 +42,18 @@ class SDKOrchestrator:
             # Step 1: Transcription using SDK function
             print("Step 1: Transcribing audio file...")
             self._emit_progress(progress_callback, 'analysis', 'start', 'Transcribing recording...')
-            transcription_result = transcribe_audio_file(file_path, output_dir, self.api_config, compress_audio)
+            # Warm the report generation prompt cache while the transcription request is in flight
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(self._prefill_report_prompt)
+                transcription_result = transcribe_audio_file(file_path, output_dir, self.api_config, compress_audio)
             transcript = transcription_result.transcript
             transcript_path = transcription_result.transcript_path
             
             # Continue with transcript processing
             return self._process_transcript_internal(
                 transcript, output_dir, company_data, meeting_notes, 
-                additional_instructions, transcript_path, progress_callback, analysis_started=True
+                additional_instructions, transcript_path, progress_callback, analysis_started=True,
+                report_id=report_id
             )
             
         except Exception as e:
@@ -60,10 +66,14 @@ class SDKOrchestrator:
                 'revision_history': [],
                 'final_report': None
             }
+        finally:
+            # Deliver queued progress before the caller sees the result
+            flush_progress(progress_callback)
     
     def process_transcript(self, transcript: str, output_dir: str, company_data: Dict[str, Any], 
                           meeting_notes: str = "", additional_instructions: str = "",
-                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+                          progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          report_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process an existing transcript through the workflow.
         """
@@ -73,7 +83,7 @@ class SDKOrchestrator:
             # Continue with transcript processing
             return self._process_transcript_internal(
                 transcript, output_dir, company_data, meeting_notes, 
-                additional_instructions, None, progress_callback
+                additional_instructions, None, progress_callback, report_id=report_id
             )
             
         except Exception as e:
@@ -86,12 +96,15 @@ class SDKOrchestrator:
                 'revision_history': [],
                 'final_report': None
             }
+        finally:
+            # Deliver queued progress before the caller sees the result
+            flush_progress(progress_callback)
     
     def _process_transcript_internal(self, transcript: str, output_dir: str, 
                                    company_data: Dict[str, Any], meeting_notes: str, 
                                    additional_instructions: str, transcript_path: str,
                                    progress_callback: Optional[Callable[[Dict[str, Any]], None]],
-                                   analysis_started: bool = False) -> Dict[str, Any]:
+                                   analysis_started: bool = False, report_id: Optional[str] = None) -> Dict[str, Any]:
         """Internal method to process the transcript and generate the report using SDK functions."""
         
         print("Processing transcript through SDK workflow...")
@@ -115,33 +128,38 @@ class SDKOrchestrator:
             # Step 3: Verification and revision cycle
             verification_round = 1
             max_rounds = self.verification_rounds
+            # Same sample report every round, so the verifier's static prefix stays identical
+            sample_report = get_sample_report()
+            # Context from earlier rounds, extended at the end of each round
+            previous_verifications = []
+            previous_revisions = []
+            previous_issue_total = 0
             
             while verification_round <= max_rounds:
                 print(f"Step 3.{verification_round}: Verification round {verification_round}")
                 
                 # Execute verification using SDK function
-                # Prepare context for verification round
-                previous_verifications = [v for v in verification_history if v.get('round', 0) < verification_round]
-                previous_revisions = [r.get('revision_notes', '') for r in revision_history if r.get('round', 0) < verification_round]
-                
                 # Enhanced context logging
                 if previous_verifications:
-                    total_prev_issues = sum(len(v.get('issues', [])) for v in previous_verifications)
-                    print(f"Context memory: {len(previous_verifications)} previous rounds with {total_prev_issues} total issues")
+                    print(f"Context memory: {len(previous_verifications)} previous rounds with {previous_issue_total} total issues")
                 if previous_revisions:
                     print(f"Revision context: {len([r for r in previous_revisions if r])} revision notes available")
                 
                 # Execute context-aware verification with sample report for format checking
                 step_name = f'verification_{verification_round}'
                 self._emit_progress(progress_callback, step_name, 'start', f'Running verification round {verification_round}...')
-                sample_report = get_sample_report()
-                verification_result = verify_report_content(
-                    current_report, transcript, meeting_notes, additional_instructions, 
-                    verification_round, self.api_config,
-                    previous_verification_results=previous_verifications,
-                    previous_revision_notes=previous_revisions,
-                    sample_report=sample_report
-                )
+                # Structure check runs here while the content verification call is in flight
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    content_future = executor.submit(
+                        verify_report_content,
+                        current_report, transcript, meeting_notes, additional_instructions, 
+                        verification_round, self.api_config,
+                        previous_verification_results=previous_verifications,
+                        previous_revision_notes=previous_revisions,
+                        sample_report=sample_report
+                    )
+                    structure_issues = check_report_structure(current_report, sample_report)
+                    verification_result = merge_structure_issues(content_future.result(), structure_issues)
                 self._emit_progress(progress_callback, step_name, 'complete', f'Completed verification round {verification_round}.')
                 
                 # Extract verification details
@@ -158,7 +176,8 @@ class SDKOrchestrator:
                     'needs_revision': needs_revision,
                     'summary': verification_result.summary,
                     'strengths': verification_result.strengths,
-                    'decision_explanation': verification_result.decision_explanation
+                    'decision_explanation': verification_result.decision_explanation,
+                    'status': verification_result.status
                 })
                 
                 print(f"\n=== VERIFICATION ROUND {verification_round} RESULTS ===")
@@ -211,14 +230,17 @@ class SDKOrchestrator:
                     })
                     
                     print(f"Revision round {verification_round} completed")
+                    previous_revisions.append(revision_result.revision_notes)
                 
+                previous_verifications.append(verification_history[-1])
+                previous_issue_total += len(issues)
                 verification_round += 1
             
             # Step 4: Save final report
             print("Step 4: Finalizing and saving report...")
             self._emit_progress(progress_callback, 'finalization', 'start', 'Saving final report...')
             os.makedirs(output_dir, exist_ok=True)
-            doc_path = self._ensure_report_saved(current_report, output_dir, company_data)
+            doc_path = self._ensure_report_saved(current_report, output_dir, company_data, report_id)
             self._emit_progress(progress_callback, 'finalization', 'complete', 'Report finalized.')
             
             final_report = {
@@ -262,33 +284,28 @@ class SDKOrchestrator:
                 'transcript_path': transcript_path  
             }
 
+    def _prefill_report_prompt(self) -> None:
+        """Prefill the generation prompt cache; a failure only loses the warm-up."""
+        try:
+            prefill_report_context(self.api_config)
+        except Exception as err:
+            print(f"Report prompt prefill failed: {err}")
+
     @staticmethod
     def _emit_progress(callback: Optional[Callable[[Dict[str, Any]], None]], step: str,
                        status: str, message: Optional[str] = None) -> None:
-        """Safely emit progress updates without breaking the workflow."""
-        if not callback:
-            return
-        try:
-            callback({
-                'step': step,
-                'status': status,
-                'message': message
-            })
-        except Exception as err:
-            print(f"Progress callback failed for step '{step}': {err}")
+        """Queue a progress update; the callback runs on the delivery thread, off the workflow."""
+        queue_progress(callback, step, status, message)
     
-    def _ensure_report_saved(self, report_content: str, output_dir: str, company_data: Dict[str, Any]) -> str:
+    def _ensure_report_saved(self, report_content: str, output_dir: str, company_data: Dict[str, Any],
+                             report_id: Optional[str] = None) -> str:
         """Ensure the report is saved in DOCX format."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        company_name_safe = re.sub(r'[^\w\s-]', '', company_data.get('company_name', 'Unknown')).strip().replace(' ', '_')
-        base_filename = f"{company_name_safe}"
-        
-        # Save as DOCX using formatter
-        doc_path = os.path.join(output_dir, f"{base_filename}.docx")
+        # Save as DOCX using formatter; rendered in the background, downloads wait for it
+        doc_path = os.path.join(output_dir, safe_report_filename(company_data, report_id))
         try:
-            from app.formatting.formatter import create_word_doc
-            create_word_doc(report_content, doc_path, company_data)
-            print(f"DOCX report saved to {doc_path}")
+            from app.formatting.formatter import submit_word_doc
+            submit_word_doc(report_content, company_data, doc_path)
+            print(f"DOCX report queued for {doc_path}")
             return doc_path
         except Exception as e:
             print(f"Failed to save DOCX: {str(e)}")
@@ -1,10 +1,11 @@
 from typing import Any, Dict
 
-from app.orchestrators.langgraph_orchestrator import create_langgraph_orchestrator
-from app.orchestrators.sdk_orchestrator import create_sdk_orchestrator
-
 
 def get_orchestrator(api_config: Dict[str, Any], verification_rounds: int, use_langgraph: bool):
+    # Imported on first use: the orchestrators pull in langgraph and every agent,
+    # which the API process otherwise has no need to load at startup
     if use_langgraph:
+        from app.orchestrators.langgraph_orchestrator import create_langgraph_orchestrator
         return create_langgraph_orchestrator(api_config, verification_rounds=verification_rounds)
+    from app.orchestrators.sdk_orchestrator import create_sdk_orchestrator
     return create_sdk_orchestrator(api_config, verification_rounds=verification_rounds)
@@ -1,25 +1,48 @@
-import json
+import hashlib
+import os
+import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
 from fastapi import HTTPException, UploadFile
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from app.core.config import build_api_config, validate_api_keys
-from app.core.storage import OUTPUT_DIR, REPORT_STORE
+from app.core.storage import OUTPUT_DIR, REPORT_STORE, ReportStore
+from app.formatting.formatter import format_report_as_html, pending_word_doc, wait_for_word_doc
 from app.services.orchestrator import get_orchestrator
 
+# Reports whose verification goes through the Batch API can take hours, so they run
+# in the background and the request returns a pending entry to poll
+BATCH_REPORT_WORKERS = 4
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=BATCH_REPORT_WORKERS, thread_name_prefix="batch-report")
 
-def create_report_from_transcript(payload: Dict[str, Any]) -> Dict[str, Any]:
+
+class CompanyInfo(BaseModel):
+    # Extra keys are passed through to the workflow, as they were before validation
+    model_config = ConfigDict(extra="allow")
+
+    company_name: str
+    country: str
+    consultation_date: str
+    experts: str
+    customer_manager: str
+    consultation_type: str
+
+
+def create_report_from_transcript(payload: Dict[str, Any], store: ReportStore = REPORT_STORE,
+                                  output_dir: Path = OUTPUT_DIR) -> Dict[str, Any]:
     transcript = payload.get("transcript", "").strip()
     if not transcript:
         raise HTTPException(status_code=400, detail="Transcript cannot be empty")
 
-    api_config = build_api_config(payload.get("use_azure", True), payload.get("selected_model", "gpt-5.1"))
-    try:
-        validate_api_keys(api_config)
-    except ValueError as exc:
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    api_config = _resolve_api_config(
+        payload.get("use_azure", True),
+        payload.get("selected_model", "gpt-5.1"),
+        payload.get("verification_mode", "sync"),
+    )
 
     orchestrator = get_orchestrator(
         api_config,
@@ -27,21 +50,17 @@ def create_report_from_transcript(payload: Dict[str, Any]) -> Dict[str, Any]:
         payload.get("use_langgraph", True),
     )
 
-    results = orchestrator.process_transcript(
-        transcript=transcript,
-        output_dir=str(OUTPUT_DIR),
-        company_data=payload["company_data"],
-        meeting_notes=payload.get("meeting_notes", "") or "",
-        additional_instructions=payload.get("additional_instructions", "") or "",
-    )
-
-    report_id = payload["report_id"]
-    REPORT_STORE[report_id] = {
-        "status": results.get("status"),
-        "results": results,
-    }
+    def run() -> Dict[str, Any]:
+        return orchestrator.process_transcript(
+            transcript=transcript,
+            output_dir=str(output_dir),
+            company_data=payload["company_data"],
+            meeting_notes=payload.get("meeting_notes", "") or "",
+            additional_instructions=payload.get("additional_instructions", "") or "",
+            report_id=payload["report_id"],
+        )
 
-    return REPORT_STORE[report_id]
+    return _dispatch_report(payload["report_id"], payload["company_data"], api_config, run, store)
 
 
 def create_report_from_recording(
@@ -55,38 +74,191 @@ def create_report_from_recording(
     verification_rounds: int,
     compress_audio: bool,
     use_langgraph: bool,
+    verification_mode: str = "sync",
+    store: ReportStore = REPORT_STORE,
+    output_dir: Path = OUTPUT_DIR,
 ) -> Dict[str, Any]:
+    api_config = _resolve_api_config(use_azure, selected_model, verification_mode)
+
+    orchestrator = get_orchestrator(api_config, verification_rounds, use_langgraph)
+
+    # Removed once the report is done, which may be after this request returns
+    temp_dir = tempfile.mkdtemp()
+    temp_path = Path(temp_dir) / file.filename
+    _save_upload(file, temp_path)
+
+    def run() -> Dict[str, Any]:
+        try:
+            return orchestrator.process_recording(
+                file_path=str(temp_path),
+                output_dir=str(output_dir),
+                company_data=company_payload,
+                meeting_notes=meeting_notes or "",
+                additional_instructions=additional_instructions or "",
+                compress_audio=compress_audio,
+                report_id=report_id,
+            )
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return _dispatch_report(report_id, company_payload, api_config, run, store)
+
+
+UPLOAD_COPY_CHUNK = 1 << 20
+
+
+def _save_upload(file: UploadFile, path: Path) -> None:
+    """Copy an upload to disk without holding the whole recording in memory."""
+    source = file.file
+    with open(path, "wb") as out:
+        start = source.tell()
+        try:
+            # Kernel-side copy; fileno() rolls a spooled upload over to disk first
+            in_fd = source.fileno()
+            offset, size = start, os.fstat(in_fd).st_size
+            while offset < size:
+                sent = os.sendfile(out.fileno(), in_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            source.seek(start)
+            out.seek(0)
+            out.truncate()
+            shutil.copyfileobj(source, out, UPLOAD_COPY_CHUNK)
+
+
+def _resolve_api_config(use_azure: bool, selected_model: str, verification_mode: str) -> Dict[str, Any]:
     api_config = build_api_config(use_azure, selected_model)
+    if verification_mode != "sync":
+        # build_api_config is shared between requests, so extend a copy
+        api_config = {**api_config, "verification_mode": verification_mode}
+
     try:
         validate_api_keys(api_config)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return api_config
+
+
+def _dispatch_report(report_id: str, company_data: Dict[str, Any], api_config: Dict[str, Any],
+                     run: Callable[[], Dict[str, Any]], store: ReportStore) -> Dict[str, Any]:
+    """Run the workflow now, or in the background for batch verification."""
+    if api_config.get("verification_mode") == "batch":
+        return _submit_batch_report(report_id, company_data, api_config, run, store)
+    return _store_results(report_id, run(), store)
+
+
+def _submit_batch_report(report_id: str, company_data: Dict[str, Any], api_config: Dict[str, Any],
+                         run: Callable[[], Dict[str, Any]], store: ReportStore) -> Dict[str, Any]:
+    """Store a pending entry for the report and finish it on the batch worker pool."""
+    pending = store[report_id] = {
+        "status": "pending_batch",
+        "results": {"company_data": company_data},
+        "etag": None,
+        "batch_id": None,
+    }
+
+    def record_batch(batch_id: str) -> None:
+        pending["batch_id"] = batch_id
+
+    # In batch mode api_config is this request's own copy (see _resolve_api_config),
+    # shared with its orchestrator, so the verifier reports each batch it waits on
+    api_config["on_batch_submitted"] = record_batch
+
+    def process() -> None:
+        try:
+            entry = _store_results(report_id, run(), store)
+        except Exception as exc:
+            entry = store[report_id] = {
+                "status": "failed",
+                "results": {
+                    "status": "failed",
+                    "error": str(exc),
+                    "company_data": company_data,
+                    "verification_history": [],
+                    "revision_history": [],
+                    "final_report": None,
+                },
+                "etag": None,
+            }
+        entry["batch_id"] = pending["batch_id"]
+
+    _BATCH_EXECUTOR.submit(process)
+    return pending
 
-    orchestrator = get_orchestrator(api_config, verification_rounds, use_langgraph)
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir) / file.filename
-        temp_path.write_bytes(file.file.read())
-
-        results = orchestrator.process_recording(
-            file_path=str(temp_path),
-            output_dir=str(OUTPUT_DIR),
-            company_data=company_payload,
-            meeting_notes=meeting_notes or "",
-            additional_instructions=additional_instructions or "",
-            compress_audio=compress_audio,
+def _store_results(report_id: str, results: Dict[str, Any], store: ReportStore) -> Dict[str, Any]:
+    # Render the HTML preview once per report instead of on every /html request
+    if results.get("final_report_content") and results.get("company_data"):
+        results["final_report_html"] = format_report_as_html(
+            results["final_report_content"], results["company_data"]
         )
 
-    REPORT_STORE[report_id] = {
+    entry = {
         "status": results.get("status"),
         "results": results,
+        "etag": None,
     }
+    store[report_id] = entry
+    _set_etag_when_written(entry, results.get("final_report_path"))
+    return entry
+
+
+def _set_etag_when_written(entry: Dict[str, Any], doc_path: Optional[str]) -> None:
+    """Fill in the entry's ETag from the DOCX bytes once its background render finishes."""
+    if not doc_path:
+        return
+    future = pending_word_doc(doc_path)
+    if future is None:
+        entry["etag"] = _compute_etag(doc_path)
+        return
+
+    def on_written(done) -> None:
+        if done.exception() is None:
+            entry["etag"] = _etag_for(done.result())
+
+    future.add_done_callback(on_written)
+
+
+def ensure_report_file(report: Dict[str, Any]) -> Optional[str]:
+    """Wait for the report's DOCX to be written and return its path, computing the ETag once."""
+    doc_path = report.get("results", {}).get("final_report_path")
+    if not doc_path:
+        return None
+
+    try:
+        wait_for_word_doc(doc_path)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Report document could not be generated: {exc}") from exc
+    if not Path(doc_path).is_file():
+        return None
+    # Normally set when the render finished; the callback may not have run yet
+    if report.get("etag") is None:
+        report["etag"] = _compute_etag(doc_path)
+    return doc_path
+
+
+def _compute_etag(doc_path: Optional[str]) -> Optional[str]:
+    """Hash the final DOCX once so downloads can be served with a strong ETag."""
+    if not doc_path or not Path(doc_path).is_file():
+        return None
+
+    digest = hashlib.sha256()
+    with open(doc_path, "rb") as doc_file:
+        for block in iter(lambda: doc_file.read(1024 * 1024), b""):
+            digest.update(block)
+    return f'"{digest.hexdigest()}"'
+
 
-    return REPORT_STORE[report_id]
+def _etag_for(data: bytes) -> str:
+    return f'"{hashlib.sha256(data).hexdigest()}"'
 
 
 def parse_company_data(raw_company_data: str) -> Dict[str, Any]:
+    # Validate straight from the raw JSON in pydantic-core, skipping the json.loads dict
     try:
-        return json.loads(raw_company_data)
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=400, detail="company_data must be valid JSON") from exc
+        return CompanyInfo.model_validate_json(raw_company_data).model_dump()
+    except ValidationError as exc:
+        # Covers malformed JSON as well as missing or mistyped company fields
+        raise HTTPException(status_code=400, detail=exc.errors(include_url=False)) from exc
@@ -1,20 +1,29 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import re
+import functools
+import gc
+import hashlib
 import os
-import json
+import pickle
+import re
+import sys
+import time
+import uuid
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List
 import torch
 import whisperx
 import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
+import httpx
 from openai import OpenAI, AzureOpenAI
-import openai
 
 
 torch.backends.cuda.matmul.allow_tf32 = True
 torch.backends.cudnn.allow_tf32 = True
+torch.set_float32_matmul_precision("high")
 # Load environment variables from a .env file if it exists
 load_dotenv(".env")
 
@@ -42,6 +51,9 @@ HF_TOKEN = os.getenv("HF_TOKEN") or os.getenv("HUGGINGFACE_TOKEN")
 MIN_SPEAKERS = 3  # e.g., 2
 MAX_SPEAKERS = 6  # e.g., 4
 SPEAKER_COUNT = None  # Use if you know the exact number of speakers
+# Run the segmentation and speaker-embedding networks under float16 autocast on CUDA;
+# clustering stays in float32. Off by default so speaker labels can be compared first
+DIARIZATION_HALF_PRECISION = False
 
 # --- Whisper ASR Model & Task ---
 # Common choices: "large-v3" (best EN), "large-v2", "distil-large-v3", "medium", "small", "base", "tiny"
@@ -56,15 +68,36 @@ PATIENCE = 2.0
 CONDITION_ON_PREV = True  # Default in WhisperX to reduce hallucinations
 INITIAL_PROMPT = INITIAL_PROMPT or '''Speakers are engaged in an AI and data consultation discussion.'''
 
+# --- Console Output ---
+VERBOSE = False  # Also print API settings and transcript previews/lengths while post-processing
+
 # --- Technical & Execution Parameters ---
+# Keep the ASR, alignment and diarization models loaded between runs (e.g. when the
+# pipeline is called repeatedly from a server); otherwise each is freed after use
+KEEP_MODELS_LOADED = False
+# Transcription/alignment and diarization results are cached per audio file, so a run
+# that fails later (e.g. on an LLM rate limit) can be retried without redoing them.
+# Bump STAGE_CACHE_VERSION when a stage's code changes its output
+STAGE_CACHE_DIR = os.path.join("_cache", "stages")
+STAGE_CACHE_VERSION = 1
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 if 0:
     COMPUTE_TYPE = "float32" # "float16"
     BATCH_SIZE = 8  # VRAM vs throughput trade-off
-else:
+elif DEVICE == "cuda" and torch.cuda.get_device_capability()[0] >= 7:
+    # int8 weights with float16 activations: roughly half the weight bandwidth and VRAM on Volta and newer
+    COMPUTE_TYPE = "int8_float16"
+    BATCH_SIZE = 48  # VRAM vs throughput trade-off
+elif DEVICE == "cuda":
     COMPUTE_TYPE = "float16" # "float16"
     BATCH_SIZE = 32  # VRAM vs throughput trade-off
+else:
+    # CTranslate2 has no float16 kernels on CPU; int8 is the fastest CPU compute type
+    COMPUTE_TYPE = "int8"
+    BATCH_SIZE = 8
 
+# Whisper's encoder always sees a padded 30 s window, so shorter chunks only add
+# batch items; VAD merges speech regions up to this length to keep windows full
 CHUNK_SIZE = 30  # In seconds; how VAD-chunked segments are processed, DO NOTE REDUCE!
 
 # --- VAD (Voice Activity Detection) ---
@@ -79,6 +112,9 @@ ALIGN_LANGUAGE = LANGUAGE or "en"  # Fallback to English if language is not spec
 ALIGN_MODEL_NAME = None  # Let WhisperX pick the best model per language
 RETURN_CHAR_ALIGNMENTS = False
 ALIGN_INTERPOLATE_METHOD = "nearest"  # "nearest", "linear", or "ignore"
+# torch.compile the wav2vec2 aligner (dynamic shapes, as segment lengths vary). The
+# warm-up only pays off when the model is reused, so it follows KEEP_MODELS_LOADED
+COMPILE_ALIGN_MODEL = KEEP_MODELS_LOADED and DEVICE == "cuda"
 
 # --- ASR Options Dictionary (passed to faster-whisper) ---
 ASR_OPTIONS = {
@@ -92,6 +128,37 @@ ASR_OPTIONS = {
 # =================================================================
 # Helper Functions
 # =================================================================
+
+_SRT_PUNCTUATION = ",.;:!?"
+
+
+def _normalize_spaces(text: str) -> str:
+    """Collapse whitespace runs and drop spaces before punctuation."""
+    text = " ".join(text.split())
+    if " " in text:
+        for mark in _SRT_PUNCTUATION:
+            text = text.replace(" " + mark, mark)
+    return text
+
+
+def _is_srt_timestamp(value: str) -> bool:
+    """True for a fixed-width HH:MM:SS,mmm timestamp."""
+    return (len(value) == 12 and value[2] == value[5] == ":" and value[8] == ","
+            and (value[:2] + value[3:5] + value[6:8] + value[9:]).isdecimal())
+
+
+def _parse_srt_times(line: str):
+    """Split a "start --> end" cue timing line, or return None when it isn't one."""
+    start = line[:12]
+    rest = line[12:].lstrip()
+    if not rest.startswith("-->"):
+        return None
+    end = rest[3:].lstrip()[:12]
+    if not (_is_srt_timestamp(start) and _is_srt_timestamp(end)):
+        return None
+    return start, end
+
+
 def merge_srt_exact_tag(srt_text: str) -> str:
     """
     Merge consecutive SRT cues when the FIRST token in the cue text is a single tag
@@ -100,109 +167,148 @@ def merge_srt_exact_tag(srt_text: str) -> str:
     never merge. Returns a new SRT string with renumbered indices starting at 1.
     """
 
-    time_re = re.compile(
-        r"^(?P<start>\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(?P<end>\d{2}:\d{2}:\d{2},\d{3})\s*(?:.*)?$"
-    )
-    tag_at_start = re.compile(r"^\s*(\[[^\[\]]*\])\s*(.*)$", re.DOTALL)
-
-    def normalize_spaces(text: str) -> str:
-        text = re.sub(r"\s+", " ", text).strip()
-        text = re.sub(r"\s+([,.;:!?])", r"\1", text)
-        return text
-
-    def split_blocks(s: str):
-        return [p for p in re.split(r"\r?\n\r?\n+", s.strip(), flags=re.MULTILINE) if p.strip()]
-
-    def parse_block(block: str):
-        lines = [ln.rstrip("\r") for ln in block.splitlines()]
-        if not lines:
-            return None
-        pos = 0
-        if re.fullmatch(r"\d+", lines[0].strip()):
-            pos = 1
-        if pos >= len(lines):
-            return None
-        m = time_re.match(lines[pos].strip())
-        if not m:
-            return None
-        start, end = m.group("start"), m.group("end")
-        text_lines = lines[pos + 1 :] if pos + 1 < len(lines) else [""]
-        text = " ".join(ln.strip() for ln in text_lines if ln.strip())
-        text = normalize_spaces(text)
-        tm = tag_at_start.match(text)
-        if tm:
-            tag = tm.group(1)            # exact as seen
-            text_wo = tm.group(2).lstrip()
-        else:
-            tag = None
-            text_wo = text
-        return {"start": start, "end": end, "speaker": tag, "text": text_wo}
+    merged = []
 
-    # Parse cues
-    cues = []
-    for blk in split_blocks(srt_text):
-        parsed = parse_block(blk)
-        if parsed:
-            cues.append(parsed)
+    def finish_cue(cue):
+        text = _normalize_spaces(" ".join(cue.pop("lines")))
+        tag = None
+        if text.startswith("["):
+            close = text.find("]")
+            opening = text.find("[", 1)
+            if close != -1 and (opening == -1 or opening > close):
+                tag = text[:close + 1]           # exact as seen
+                text = text[close + 1:].lstrip()
+        cue["speaker"] = tag
+        cue["texts"] = [text] if text else []
 
-    # Merge consecutive cues with identical (exact) speaker tag
-    merged = []
-    for cue in cues:
-        if merged and cue["speaker"] is not None and cue["speaker"] == merged[-1]["speaker"]:
+        # Merge into the previous cue when both carry the identical (exact) speaker tag;
+        # merged texts are joined and normalized once, when the output is rebuilt
+        if merged and tag is not None and tag == merged[-1]["speaker"]:
             merged[-1]["end"] = cue["end"]
-            if cue["text"]:
-                merged[-1]["text"] = normalize_spaces((merged[-1]["text"] + " " + cue["text"]).strip())
+            merged[-1]["texts"].extend(cue["texts"])
         else:
-            merged.append(cue.copy())
+            merged.append(cue)
+
+    # Single pass over the lines: optional index, timing line, then text up to a blank line
+    state, cue = "index", None
+    for raw in srt_text.strip().splitlines():
+        if not raw:
+            if cue is not None:
+                finish_cue(cue)
+            state, cue = "index", None
+            continue
+        line = raw.strip()
+        if state == "index":
+            state = "timing"
+            if line.isdecimal():
+                continue
+        if state == "timing":
+            times = _parse_srt_times(line)
+            if times is None:
+                state = "skip"
+            else:
+                cue = {"start": times[0], "end": times[1], "lines": []}
+                state = "text"
+        elif state == "text" and line:
+            cue["lines"].append(line)
+    if cue is not None:
+        finish_cue(cue)
 
     # Rebuild SRT with renumbered indices
     out_lines = []
     for i, cue in enumerate(merged, start=1):
         out_lines.append(str(i))
         out_lines.append(f"{cue['start']} --> {cue['end']}")
-        txt = (cue["speaker"] + " " if cue["speaker"] else "") + (cue["text"] or "")
-        out_lines.append(normalize_spaces(txt))
+        txt = (cue["speaker"] + " " if cue["speaker"] else "") + " ".join(cue["texts"])
+        out_lines.append(_normalize_spaces(txt))
         out_lines.append("")
     return "\n".join(out_lines).rstrip() + "\n"
 
 def _srt_ts(t: float) -> str:
     """Formats a timestamp for SRT files."""
-    t = max(0.0, float(t))
-    h = int(t // 3600)
-    t -= 3600 * h
-    m = int(t // 60)
-    t -= 60 * m
-    s = int(t)
-    ms = int(round((t - s) * 1000.0))
+    # Whole milliseconds first, so rounding can never produce a ",1000" field
+    ms_total = max(0, int(t * 1000 + 0.5))
+    h, rem = divmod(ms_total, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    s, ms = divmod(rem, 1000)
     return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
-def _write_words_jsonl(words: List[Dict[str, Any]], path: str):
+JSONL_WRITE_CHUNK = 65536  # Words serialised per write, bounding the buffer size
+
+def _write_words_jsonl(words: pd.DataFrame, path: str):
     """Writes word-level segments to a JSONL file."""
-    with open(path, "w", encoding="utf-8") as f:
-        for w in words:
-            f.write(json.dumps(w, ensure_ascii=False) + "\n")
+    with open(path, "wb") as f:
+        for i in range(0, len(words), JSONL_WRITE_CHUNK):
+            block = words.iloc[i:i + JSONL_WRITE_CHUNK]
+            # Rows are only materialised one block at a time, straight from the columns
+            f.write(b"".join(
+                orjson.dumps({"start": start, "end": end, "text": text, "speaker": speaker},
+                             option=orjson.OPT_APPEND_NEWLINE)
+                for start, end, text, speaker in zip(
+                    block["start"].tolist(), block["end"].tolist(),
+                    block["text"].tolist(), block["speaker"].tolist(),
+                )
+            ))
 
 def _write_srt_from_segments(segments: List[Dict[str, Any]], path: str):
     """Writes speaker-attributed segments to an SRT file."""
-    out = ''
-    with open(path, "w", encoding="utf-8") as f:
-        idx = 1
-        for seg in segments:
-            start = _srt_ts(seg["start"])
-            end = _srt_ts(seg["end"])
-            spk = seg.get("speaker", "UNKNOWN")
-            text = seg.get("text", "").strip()
+    cues = []
+    for seg in segments:
+        start = _srt_ts(seg["start"])
+        end = _srt_ts(seg["end"])
+        spk = seg.get("speaker", "UNKNOWN")
+        text = seg.get("text", "").strip()
 
-            if not text and seg.get("words"):
-                text = " ".join(w.get("text", "") for w in seg["words"]).strip()
+        if not text and seg.get("words"):
+            text = " ".join(w.get("text", "") for w in seg["words"]).strip()
 
-            if text:
-                f.write(f"{idx}\n{start} --> {end}\n[{spk}] {text}\n\n")
-                idx += 1
-                out += f"{idx}\n{start} --> {end}\n[{spk}] {text}\n\n"
+        if text:
+            cues.append(f"{len(cues) + 1}\n{start} --> {end}\n[{spk}] {text}\n\n")
+
+    out = "".join(cues)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(out)
 
     return out
 
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stage_cache_path(stage: str, audio_hash: str, settings: str) -> str:
+    key = hashlib.sha256(f"{STAGE_CACHE_VERSION}|{stage}|{audio_hash}|{settings}".encode("utf-8")).hexdigest()
+    return os.path.join(STAGE_CACHE_DIR, f"{stage}_{key[:32]}.pkl")
+
+
+def _read_stage_cache(path: str):
+    """Returns the cached stage result, or None when the stage has not run for this audio"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        result = pickle.load(f)
+    print(f"[{now()}] ♻️ Reusing cached stage output: {path}")
+    return result
+
+
+def _write_stage_cache(path: str, result):
+    os.makedirs(STAGE_CACHE_DIR, exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def _release_model_memory():
+    """Return memory held by a dropped model before the next one is loaded."""
+    gc.collect()
+    if DEVICE == "cuda":
+        torch.cuda.empty_cache()
+
+
 def now():
     """Returns current timestamp string"""
     return datetime.now().strftime("%H:%M:%S")
@@ -233,169 +339,488 @@ def get_api_config():
 # Transcript Enhancement and Role Classification  
 # =================================================================
 
-def post_process_transcript(transcript_text):
+# The static editing rubric lives entirely in the system message so every call and chunk
+# shares a byte-identical prefix that OpenAI/Azure prompt caching can reuse; only the
+# transcript in the user message varies. Keep timestamps and IDs out of it.
+POST_PROCESS_SYSTEM_PROMPT = """\
+You are an expert transcript editor specializing in AI consultation meeting transcription. Please improve the following raw transcript of an AI needs analysis and advisory meeting between AI experts and company representatives.
+
+Your task is to:
+1. The transcript needs to be in English. Even if some or all parts of the transcript are in any other language, translate them in English.
+2. Fix any transcription errors, inconsistencies, and unclear speech
+3. Create proper dialogue structure with clear speaker identification and role classification
+4. Format the text with appropriate paragraphs and line breaks for readability
+5. Maintain consistent naming of speakers throughout the entire transcript
+6. Ensure the conversation flows naturally between segments and timestamp blocks
+7. Preserve all timestamp markers [Timestamp: XX:XX - XX:XX] if present
+8. Retain all factual information without altering meaning or context
+9. Do not add any content that wasn't in the original transcript
+
+**CRITICAL: SPEAKER DIARIZATION & ROLE CLASSIFICATION**
+Perform intelligent speaker diarization that:
+- **Separates different speakers** based on voice patterns, speaking style, and context clues
+- **Classifies speakers by role** using conversation context and content analysis:
+
+**AI EXPERTS** are identified by content that:
+- **Offers services, recommendations, opinions, deliverables, or solutions** 
+- **Proposes implementation strategies** or technical approaches
+- **Discusses AI technologies, methodologies, or technical frameworks**
+- **Asks technical assessment questions** about company needs or capabilities
+- **Provides expert guidance** on AI implementation or best practices
+- **Uses specialized AI/ML terminology** and technical language
+- **Suggests next steps for consultation** or technical development
+- **Explains technical concepts** or methodologies to the client
+
+**COMPANY REPRESENTATIVES** are identified by content that:
+- **Describes their company, business operations, or organizational structure**
+- **Explains current challenges, problems, or business objectives**
+- **Provides company-specific context**, processes, or domain knowledge
+- **Shares their background or role within the company**
+- **Asks questions about services, costs, timelines, or implementation**
+- **Responds to technical questions** about their business needs
+- **Discusses company resources, constraints, or requirements**
+
+**CUSTOMER MANAGER** are identified by content that is **purely administrative/facilitative**:
+- **Works as a liason** between AI experts and company representatives
+- **Manages meeting flow** and transitions between speakers, although his/her involvement might be minimal
+- **Handles scheduling or administrative matters**
+- **Acts as neutral moderator** without providing technical expertise or business context
+- **IMPORTANT**: Does NOT offer services, make recommendations, or provide technical guidance
+
+**KEY DISTINCTION**: If someone is **offering services, providing recommendations, or giving technical advice**, they are an **AI EXPERT**, NOT a Customer Manager, regardless of how the statement is phrased.
+
+**SPEAKER LABELING FORMAT:**
+- Use the label "[AI Expert:]" for the dialogues uttered by AI consultation specialists
+- Use the label "[Company rep.:]" for the dialogues uttered by company representatives  
+- Use the label "[Customer Manager:]" for the dialogues uttered by customer managers
+- **IMPORTANT:** Analyze each dialogue's **content and intent** carefully. Focus on WHAT is being said rather than HOW it's said.
+- **CRITICAL RULE**: Anyone discussing deliverables, recommendations, opinions, technical solutions, or service offerings is an AI EXPERT.
+- Do not add any names with the labels. Do not use any other labels except those mentioned.
+- Maintain consistent numbering throughout the transcript
+
+**QUALITY ENHANCEMENT:**
+- Remove filler words (um, uh, you know) for clarity while preserving natural speech patterns
+- Fix grammatical errors and incomplete sentences
+- Ensure proper capitalization and punctuation
+- Group related statements by the same speaker into coherent paragraphs
+- Add line breaks between different speakers for visual clarity
+
+Return ONLY the enhanced transcript with proper speaker identification and role classification. Do not include any explanatory text or commentary.
+"""
+POST_PROCESS_PROMPT_CACHE_KEY = "transcript-post-process"
+
+# Long transcripts are edited in windows of roughly 3-4k tokens, sent concurrently
+POST_PROCESS_CHUNK_CHARS = 14000
+POST_PROCESS_MAX_CONCURRENCY = 8
+
+# One keep-alive pool shared by every post-processing client, so concurrent chunk
+# requests and later runs reuse open TLS connections instead of re-handshaking
+POST_PROCESS_HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    timeout=httpx.Timeout(600, connect=5),
+)
+
+# Submit post-processing through the Batch API: half the token price and separate rate
+# limits, but results can take up to 24h. All chunks go in one batch file.
+USE_BATCH_API = False
+BATCH_POLL_INITIAL_SECONDS = 10
+BATCH_POLL_MAX_SECONDS = 300
+
+# Optional pickled scikit-learn text classifier (e.g. TfidfVectorizer + LogisticRegression
+# trained on labelled meetings) mapping each diarized speaker's combined text to one of
+# "AI Expert", "Company rep." or "Customer Manager". When every speaker is classified
+# above the confidence threshold, the labels are applied locally and the LLM is skipped
+ROLE_CLASSIFIER_PATH = None
+ROLE_CLASSIFIER_MIN_CONFIDENCE = 0.85
+_SPEAKER_TAG = re.compile(r"^\[([^\]\n]+)\] ?", re.MULTILINE)
+
+# Enhanced transcripts are cached on disk; with temperature 0 a re-run on the same
+# transcript, model, prompt and chunking would return the same text anyway
+POST_PROCESS_CACHE_DIR = os.path.join("_cache", "post_process")
+
+
+def _build_post_process_prompt(transcript_text):
+    """Create the user message for transcript enhancement; the rubric is in the system prompt"""
+    return f"RAW TRANSCRIPT:\n{transcript_text}"
+
+
+def _post_process_cache_path(chat_model, transcript_text):
+    key = hashlib.sha256("\0".join(
+        (chat_model, POST_PROCESS_SYSTEM_PROMPT, str(POST_PROCESS_CHUNK_CHARS), transcript_text)
+    ).encode("utf-8")).hexdigest()
+    return os.path.join(POST_PROCESS_CACHE_DIR, f"{key}.txt")
+
+
+def _write_post_process_cache(cache_path, enhanced_transcript):
+    os.makedirs(POST_PROCESS_CACHE_DIR, exist_ok=True)
+    temp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(enhanced_transcript)
+    os.replace(temp_path, cache_path)
+
+
+def _split_transcript_chunks(transcript_text, max_chars=POST_PROCESS_CHUNK_CHARS):
     """
-    Post-process the transcript using Azure OpenAI or OpenAI to improve quality and assign roles
+    Split a transcript into windows of at most ~max_chars on cue boundaries.
+
+    Boundaries are [Timestamp: ...] markers when present, otherwise the blank
+    lines between SRT cues, so no speaker turn is cut in half.
     """
-    print(f"[{now()}] 🔧 Starting transcript post-processing with role classification...")
-    
+    if "[Timestamp:" in transcript_text:
+        blocks = re.split(r'(?=\[Timestamp:)', transcript_text)
+        joiner = ""
+    else:
+        blocks = transcript_text.split("\n\n")
+        joiner = "\n\n"
+
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        if not block.strip():
+            continue
+        if current and size + len(block) > max_chars:
+            chunks.append(joiner.join(current))
+            current, size = [], 0
+        current.append(block)
+        size += len(block) + len(joiner)
+    if current:
+        chunks.append(joiner.join(current))
+    return chunks
+
+
+def _post_process_request(chat_model, chunk):
+    """Chat completion request body for one transcript window"""
+    return {
+        "model": chat_model,
+        "messages": [
+            {"role": "system", "content": POST_PROCESS_SYSTEM_PROMPT},
+            {"role": "user", "content": _build_post_process_prompt(chunk)}
+        ],
+        "temperature": 0.0,
+        "prompt_cache_key": POST_PROCESS_PROMPT_CACHE_KEY,
+        # "max_tokens": 16000
+    }
+
+
+@functools.lru_cache(maxsize=4)
+def _get_post_process_client(use_azure, api_key, azure_endpoint, api_version):
+    """Process-wide client per configuration, on the shared connection pool"""
+    if use_azure:
+        return AzureOpenAI(
+            api_key=api_key,
+            azure_endpoint=azure_endpoint,
+            api_version=api_version,
+            http_client=POST_PROCESS_HTTP_CLIENT,
+        )
+    return OpenAI(api_key=api_key, http_client=POST_PROCESS_HTTP_CLIENT)
+
+
+def _post_process_chunk(client, chat_model, chunk):
+    """Enhance one transcript window"""
+    response = client.chat.completions.create(**_post_process_request(chat_model, chunk))
+    return response.choices[0].message.content
+
+
+def _post_process_batch(client, chat_model, chunks, use_azure):
+    """Enhance all windows in a single Batch API job and return the results in chunk order."""
+    endpoint = "/chat/completions" if use_azure else "/v1/chat/completions"
+    run_id = uuid.uuid4().hex
+    batch_lines = b"".join(
+        orjson.dumps({
+            "custom_id": f"transcript-{run_id}-{index}",
+            "method": "POST",
+            "url": endpoint,
+            "body": _post_process_request(chat_model, chunk),
+        }, option=orjson.OPT_APPEND_NEWLINE)
+        for index, chunk in enumerate(chunks)
+    )
+
+    batch_file = client.files.create(file=("post_process.jsonl", batch_lines), purpose="batch")
+    batch = client.batches.create(input_file_id=batch_file.id, endpoint=endpoint, completion_window="24h")
+    print(f"[{now()}] 📦 Post-processing submitted as batch {batch.id} ({len(chunks)} request(s))")
+
+    delay = BATCH_POLL_INITIAL_SECONDS
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(delay)
+        delay = min(delay * 2, BATCH_POLL_MAX_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Post-processing batch {batch.id} ended with status '{batch.status}'")
+
+    # Output lines are not guaranteed to be in input order
+    contents = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        result = orjson.loads(line)
+        contents[result["custom_id"]] = result["response"]["body"]["choices"][0]["message"]["content"]
+    return [contents[f"transcript-{run_id}-{index}"] for index in range(len(chunks))]
+
+
+def _post_process_chunks(client, chat_model, chunks, output_file=None):
+    executor = ThreadPoolExecutor(max_workers=POST_PROCESS_MAX_CONCURRENCY, thread_name_prefix="post-process")
+    try:
+        # map yields in chunk order, so each chunk is written out as soon as it and
+        # every chunk before it are done, while later requests are still running
+        results = []
+        for enhanced_chunk in executor.map(lambda chunk: _post_process_chunk(client, chat_model, chunk), chunks):
+            if output_file is not None:
+                output_file.write(("\n\n" if results else "") + enhanced_chunk)
+                output_file.flush()
+            results.append(enhanced_chunk)
+        return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def post_process_transcript(transcript_text, output_path=None):
+    """
+    Post-process the transcript using Azure OpenAI or OpenAI to improve quality and assign roles.
+    When output_path is given the result (or the fallback transcript) is also saved there.
+    """
+    enhanced_transcript, written = _enhance_transcript(transcript_text, output_path)
+    if output_path and not written:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(enhanced_transcript)
+    return enhanced_transcript
+
+
+def _post_process_setup():
+    """Returns (client, chat_model, use_azure) for the configured API, or None when credentials are missing"""
     # Get API configuration
     api_config = get_api_config()
     print(f"[{now()}] 📋 API configuration loaded for {'Azure OpenAI' if api_config.get('use_azure') else 'OpenAI Direct'}")
+    use_azure = api_config.get('use_azure', False)
+    
+    if VERBOSE:
+        print(f"[{now()}] 🔧 API Config Debug:")
+        print(f"  - Use Azure: {use_azure}")
+        print(f"  - API Key present: {'Yes' if api_config.get('api_key') else 'No'}")
+        print(f"  - Azure Endpoint: {api_config.get('azure_endpoint', 'Not set')}")
     
-    # Create the prompt for transcript enhancement
-    prompt = f"""
-    You are an expert transcript editor specializing in AI consultation meeting transcription. Please improve the following raw transcript of an AI needs analysis and advisory meeting between AI experts and company representatives.
-
-    Your task is to:
-    1. The transcript needs to be in English. Even if some or all parts of the transcript are in any other language, translate them in English.
-    2. Fix any transcription errors, inconsistencies, and unclear speech
-    3. Create proper dialogue structure with clear speaker identification and role classification
-    4. Format the text with appropriate paragraphs and line breaks for readability
-    5. Maintain consistent naming of speakers throughout the entire transcript
-    6. Ensure the conversation flows naturally between segments and timestamp blocks
-    7. Preserve all timestamp markers [Timestamp: XX:XX - XX:XX] if present
-    8. Retain all factual information without altering meaning or context
-    9. Do not add any content that wasn't in the original transcript
-
-    **CRITICAL: SPEAKER DIARIZATION & ROLE CLASSIFICATION**
-    Perform intelligent speaker diarization that:
-    - **Separates different speakers** based on voice patterns, speaking style, and context clues
-    - **Classifies speakers by role** using conversation context and content analysis:
-
-    **AI EXPERTS** are identified by content that:
-    - **Offers services, recommendations, opinions, deliverables, or solutions** 
-    - **Proposes implementation strategies** or technical approaches
-    - **Discusses AI technologies, methodologies, or technical frameworks**
-    - **Asks technical assessment questions** about company needs or capabilities
-    - **Provides expert guidance** on AI implementation or best practices
-    - **Uses specialized AI/ML terminology** and technical language
-    - **Suggests next steps for consultation** or technical development
-    - **Explains technical concepts** or methodologies to the client
-
-    **COMPANY REPRESENTATIVES** are identified by content that:
-    - **Describes their company, business operations, or organizational structure**
-    - **Explains current challenges, problems, or business objectives**
-    - **Provides company-specific context**, processes, or domain knowledge
-    - **Shares their background or role within the company**
-    - **Asks questions about services, costs, timelines, or implementation**
-    - **Responds to technical questions** about their business needs
-    - **Discusses company resources, constraints, or requirements**
-
-    **CUSTOMER MANAGER** are identified by content that is **purely administrative/facilitative**:
-    - **Works as a liason** between AI experts and company representatives
-    - **Manages meeting flow** and transitions between speakers, although his/her involvement might be minimal
-    - **Handles scheduling or administrative matters**
-    - **Acts as neutral moderator** without providing technical expertise or business context
-    - **IMPORTANT**: Does NOT offer services, make recommendations, or provide technical guidance
-
-    **KEY DISTINCTION**: If someone is **offering services, providing recommendations, or giving technical advice**, they are an **AI EXPERT**, NOT a Customer Manager, regardless of how the statement is phrased.
-
-    **SPEAKER LABELING FORMAT:**
-    - Use the label "[AI Expert:]" for the dialogues uttered by AI consultation specialists
-    - Use the label "[Company rep.:]" for the dialogues uttered by company representatives  
-    - Use the label "[Customer Manager:]" for the dialogues uttered by customer managers
-    - **IMPORTANT:** Analyze each dialogue's **content and intent** carefully. Focus on WHAT is being said rather than HOW it's said.
-    - **CRITICAL RULE**: Anyone discussing deliverables, recommendations, opinions, technical solutions, or service offerings is an AI EXPERT.
-    - Do not add any names with the labels. Do not use any other labels except those mentioned.
-    - Maintain consistent numbering throughout the transcript
-
-    **QUALITY ENHANCEMENT:**
-    - Remove filler words (um, uh, you know) for clarity while preserving natural speech patterns
-    - Fix grammatical errors and incomplete sentences
-    - Ensure proper capitalization and punctuation
-    - Group related statements by the same speaker into coherent paragraphs
-    - Add line breaks between different speakers for visual clarity
-
-    Return ONLY the enhanced transcript with proper speaker identification and role classification. Do not include any explanatory text or commentary.
-
-    RAW TRANSCRIPT:
-    {transcript_text}
+    if use_azure:
+        # Use Azure OpenAI
+        print(f"[{now()}] 🌐 Connecting to Azure OpenAI endpoint...")
+        if not api_config.get('api_key') or not api_config.get('azure_endpoint'):
+            print(f"[{now()}] ❌ Missing Azure OpenAI credentials!")
+            return None
+            
+        client = _get_post_process_client(
+            True,
+            api_config.get('api_key'),
+            api_config.get('azure_endpoint', ''),
+            api_config.get('api_version', '2024-12-01-preview'),
+        )
+        chat_model = api_config.get('model', 'gpt-4.1')
+    else:
+        # Use OpenAI directly
+        print(f"[{now()}] 🌐 Connecting to OpenAI direct endpoint...")
+        if not api_config.get('api_key'):
+            print(f"[{now()}] ❌ Missing OpenAI API key!")
+            return None
+            
+        client = _get_post_process_client(False, api_config.get('api_key'), None, None)
+        chat_model = api_config.get('model', 'gpt-4.1-2025-04-14')
+    return client, chat_model, use_azure
+
+
+@functools.lru_cache(maxsize=1)
+def _load_role_classifier(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _classify_roles_locally(transcript_text):
     """
+    Relabel diarized speakers with roles using ROLE_CLASSIFIER_PATH.
+    Returns None when no classifier is configured or any speaker is uncertain.
+    """
+    if not ROLE_CLASSIFIER_PATH:
+        return None
+    speaker_texts = {}
+    for match in _SPEAKER_TAG.finditer(transcript_text):
+        line_end = transcript_text.find("\n", match.end())
+        speaker_texts.setdefault(match.group(1), []).append(
+            transcript_text[match.end():line_end if line_end != -1 else None]
+        )
+    if not speaker_texts or "UNKNOWN" in speaker_texts:
+        return None
+
+    classifier = _load_role_classifier(ROLE_CLASSIFIER_PATH)
+    speakers = list(speaker_texts)
+    probabilities = classifier.predict_proba([" ".join(speaker_texts[speaker]) for speaker in speakers])
+    if probabilities.max(axis=1).min() < ROLE_CLASSIFIER_MIN_CONFIDENCE:
+        return None
+    labels = {
+        speaker: f"[{classifier.classes_[best]}:] "
+        for speaker, best in zip(speakers, probabilities.argmax(axis=1))
+    }
+    print(f"[{now()}] 🏷️ Roles assigned locally for {len(speakers)} speaker(s), skipping the LLM")
+    return _SPEAKER_TAG.sub(lambda match: labels[match.group(1)], transcript_text)
+
+
+def _read_post_process_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return None
+    with open(cache_path, "r", encoding="utf-8") as f:
+        enhanced_transcript = f.read()
+    print(f"[{now()}] ♻️ Reusing cached post-processed transcript: {cache_path}")
+    return enhanced_transcript
+
+
+def _enhance_transcript(transcript_text, output_path):
+    """Returns the enhanced transcript and whether it was already written to output_path"""
+    print(f"[{now()}] 🔧 Starting transcript post-processing with role classification...")
     
     # Debug: Print transcript length and first 200 characters
-    print(f"[{now()}] 🔍 Raw transcript length: {len(transcript_text)} characters")
-    print(f"[{now()}] 🔍 Raw transcript preview: {transcript_text[:200]}...")
+    if VERBOSE:
+        print(f"[{now()}] 🔍 Raw transcript length: {len(transcript_text)} characters")
+        print(f"[{now()}] 🔍 Raw transcript preview: {transcript_text[:200]}...")
     
     # Use OpenAI or Azure OpenAI based on config
     try:
-        use_azure = api_config.get('use_azure', False)
+        labelled_transcript = _classify_roles_locally(transcript_text)
+        if labelled_transcript is not None:
+            return labelled_transcript, False
+
+        setup = _post_process_setup()
+        if setup is None:
+            return transcript_text, False
+        client, chat_model, use_azure = setup
         
-        print(f"[{now()}] 🔧 API Config Debug:")
-        print(f"  - Use Azure: {use_azure}")
-        print(f"  - API Key present: {'Yes' if api_config.get('api_key') else 'No'}")
-        print(f"  - Azure Endpoint: {api_config.get('azure_endpoint', 'Not set')}")
+        cache_path = _post_process_cache_path(chat_model, transcript_text)
+        enhanced_transcript = _read_post_process_cache(cache_path)
+        if enhanced_transcript is not None:
+            return enhanced_transcript, False
+
+        chunks = _split_transcript_chunks(transcript_text)
+        print(f"[{now()}] 🤖 Sending transcript to {chat_model} for role classification in {len(chunks)} chunk(s)...")
         
-        if use_azure:
-            # Use Azure OpenAI
-            print(f"[{now()}] 🌐 Connecting to Azure OpenAI endpoint...")
-            if not api_config.get('api_key') or not api_config.get('azure_endpoint'):
-                print(f"[{now()}] ❌ Missing Azure OpenAI credentials!")
-                return transcript_text
-                
-            client = AzureOpenAI(
-                api_key=api_config.get('api_key'),
-                azure_endpoint=api_config.get('azure_endpoint', ''),
-                api_version=api_config.get('api_version', '2024-12-01-preview')
-            )
-            
-            chat_model = api_config.get('model', 'gpt-4.1')
-            print(f"[{now()}] 🤖 Sending transcript to {chat_model} for role classification...")
-            print(f"[{now()}] 📏 Prompt length: {len(prompt)} characters")
-            
-            response = client.chat.completions.create(
-                model=chat_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert transcript editor who improves the quality, readability, and structure of transcribed conversations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.0,  
-                # max_tokens=16000
-            )
+        # Extract the enhanced transcript, reassembled in order
+        written = False
+        if USE_BATCH_API:
+            enhanced_chunks = _post_process_batch(client, chat_model, chunks, use_azure)
+        elif output_path:
+            with open(output_path, "w", encoding="utf-8") as output_file:
+                enhanced_chunks = _post_process_chunks(client, chat_model, chunks, output_file)
+            written = True
         else:
-            # Use OpenAI directly
-            print(f"[{now()}] 🌐 Connecting to OpenAI direct endpoint...")
-            if not api_config.get('api_key'):
-                print(f"[{now()}] ❌ Missing OpenAI API key!")
-                return transcript_text
-                
-            import openai
-            openai.api_key = api_config.get('api_key')
-            chat_model = api_config.get('model', 'gpt-4.1-2025-04-14')
-            print(f"[{now()}] 🤖 Sending transcript to {chat_model} for role classification...")
-            print(f"[{now()}] 📏 Prompt length: {len(prompt)} characters")
-            
-            response = openai.chat.completions.create(
-                model=chat_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert transcript editor who improves the quality, readability, and structure of transcribed conversations."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.0,  
-                # max_tokens=16000
-            )
-        
-        # Extract the enhanced transcript
-        enhanced_transcript = response.choices[0].message.content
-        print(f"[{now()}] 🔍 Enhanced transcript length: {len(enhanced_transcript)} characters")
-        print(f"[{now()}] 🔍 Enhanced transcript preview: {enhanced_transcript[:200]}...")
+            enhanced_chunks = _post_process_chunks(client, chat_model, chunks)
+        enhanced_transcript = "\n\n".join(enhanced_chunks)
+        _write_post_process_cache(cache_path, enhanced_transcript)
+        if VERBOSE:
+            print(f"[{now()}] 🔍 Enhanced transcript length: {len(enhanced_transcript)} characters")
+            print(f"[{now()}] 🔍 Enhanced transcript preview: {enhanced_transcript[:200]}...")
         print(f"[{now()}] ✅ Transcript post-processing completed")
-        return enhanced_transcript
+        return enhanced_transcript, written
         
     except Exception as e:
         print(f"[{now()}] ❌ Error during post-processing: {e}")
         print(f"[{now()}] ⚠️ Falling back to original transcript...")
-        return transcript_text
+        return transcript_text, False
+
+
+def post_process_transcripts(transcript_texts, output_paths):
+    """
+    Post-process several meetings' transcripts and save each to its output path.
+    With USE_BATCH_API, every uncached chunk of every transcript goes into one batch job.
+    """
+    if not USE_BATCH_API or len(transcript_texts) == 1:
+        return [post_process_transcript(text, path) for text, path in zip(transcript_texts, output_paths)]
+
+    print(f"[{now()}] 🔧 Starting post-processing of {len(transcript_texts)} transcripts in one batch...")
+    # Transcripts that cannot be enhanced are saved unchanged
+    results = list(transcript_texts)
+    try:
+        setup = _post_process_setup()
+        if setup is not None:
+            client, chat_model, use_azure = setup
+            pending = []
+            for index, transcript_text in enumerate(transcript_texts):
+                labelled_transcript = _classify_roles_locally(transcript_text)
+                if labelled_transcript is not None:
+                    results[index] = labelled_transcript
+                    continue
+                cache_path = _post_process_cache_path(chat_model, transcript_text)
+                cached = _read_post_process_cache(cache_path)
+                if cached is not None:
+                    results[index] = cached
+                else:
+                    pending.append((index, cache_path, _split_transcript_chunks(transcript_text)))
+
+            if pending:
+                enhanced_chunks = _post_process_batch(
+                    client, chat_model, [chunk for _, _, chunks in pending for chunk in chunks], use_azure
+                )
+                offset = 0
+                for index, cache_path, chunks in pending:
+                    results[index] = "\n\n".join(enhanced_chunks[offset:offset + len(chunks)])
+                    offset += len(chunks)
+                    _write_post_process_cache(cache_path, results[index])
+            print(f"[{now()}] ✅ Transcript post-processing completed")
+    except Exception as e:
+        print(f"[{now()}] ❌ Error during post-processing: {e}")
+        print(f"[{now()}] ⚠️ Falling back to original transcripts where needed...")
+
+    for enhanced_transcript, output_path in zip(results, output_paths):
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(enhanced_transcript)
+    return results
 
 # =================================================================
 # Main Pipeline
 # =================================================================
 
-def run_diarization_transcription():
-    """Executes the full transcription, alignment, and diarization pipeline."""
-    print(f"CUDA available: {torch.cuda.is_available()} | Device: {DEVICE} | Compute Type: {COMPUTE_TYPE}")
+def _transcribe_without_diarization(audio_path=AUDIO_PATH) -> List[Dict[str, Any]]:
+    """
+    Transcribe with faster-whisper directly when no speaker labels are needed.
+
+    Without diarization the WhisperX alignment pass adds nothing to the SRT output,
+    so the segments come straight from faster-whisper's own VAD-filtered decode.
+    """
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(ASR_MODEL, device=DEVICE, compute_type=COMPUTE_TYPE)
+    segments, info = model.transcribe(
+        audio_path,
+        language=LANGUAGE,
+        task=TASK,
+        beam_size=BEAM_SIZE,
+        patience=PATIENCE,
+        condition_on_previous_text=CONDITION_ON_PREV,
+        initial_prompt=INITIAL_PROMPT,
+        vad_filter=True,
+        vad_parameters={"threshold": VAD_OPTIONS["vad_onset"], "min_silence_duration_ms": 500},
+    )
+    print(f"Transcription complete (language: {info.language}).")
+    return [{"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments]
+
+
+def _word_records(word_segments: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Flatten WhisperX's word list into columnar JSONL rows in one DataFrame pass."""
+    words_df = pd.DataFrame(word_segments, columns=["start", "end", "word", "speaker"])
+    words_df[["start", "end"]] = words_df[["start", "end"]].astype(float).fillna(0).round(3)
+    words_df["word"] = words_df["word"].fillna("")
+    # A handful of speakers repeat across every word, so store them dictionary-encoded
+    words_df["speaker"] = words_df["speaker"].fillna("UNKNOWN").astype("category")
+    return words_df.rename(columns={"word": "text"})
+
 
-    # 1) Load ASR model
+def _assign_majority_speakers(segments: List[Dict[str, Any]]):
+    """Give each segment without a speaker the most frequent speaker among its words."""
+    pending = [i for i, seg in enumerate(segments) if "speaker" not in seg and seg.get("words")]
+    if not pending:
+        return
+    words_df = pd.DataFrame(
+        [(i, w.get("speaker", "UNKNOWN")) for i in pending for w in segments[i]["words"]],
+        columns=["segment_id", "speaker"],
+    )
+    # value_counts sorts by count, so the first row per segment is its majority speaker
+    majority = words_df.value_counts().reset_index().drop_duplicates("segment_id")
+    for segment_id, speaker in zip(majority["segment_id"], majority["speaker"]):
+        segments[segment_id]["speaker"] = speaker
+
+
+@functools.lru_cache(maxsize=1)
+def _load_asr_model():
     # Decoding and VAD options are passed at model load time
     model = whisperx.load_model(
         ASR_MODEL,
@@ -404,12 +829,63 @@ def run_diarization_transcription():
         language=LANGUAGE,
         task=TASK,
         asr_options=ASR_OPTIONS,
+        vad_method=VAD_METHOD,
         vad_options=VAD_OPTIONS,
     )
     print("WhisperX model loaded.")
+    return model
+
+
+@functools.lru_cache(maxsize=4)
+def _load_align_model(language_code):
+    align_model, align_meta = whisperx.load_align_model(
+        language_code=language_code,
+        device=DEVICE,
+        model_name=ALIGN_MODEL_NAME,
+    )
+    if COMPILE_ALIGN_MODEL:
+        align_model = torch.compile(align_model, dynamic=True)
+    return align_model, align_meta
+
+
+@functools.lru_cache(maxsize=1)
+def _load_diarization_pipeline():
+    return whisperx.diarize.DiarizationPipeline(model_name=DIARIZATION_MODEL,use_auth_token=HF_TOKEN, device=DEVICE)
+
+
+def _drop_model(loader):
+    """Forget a cached model once its stage is done, unless models are kept loaded."""
+    if not KEEP_MODELS_LOADED:
+        loader.cache_clear()
+        _release_model_memory()
 
-    # 2) Load audio and transcribe
-    audio = whisperx.load_audio(AUDIO_PATH)
+
+def _diarize_audio(audio):
+    """Run speaker diarization on the raw audio."""
+    print("Starting diarization...")
+    diar_pipeline = _load_diarization_pipeline()
+
+    diar_kwargs = {}
+    if SPEAKER_COUNT is not None:
+        diar_kwargs["num_speakers"] = SPEAKER_COUNT
+    elif MIN_SPEAKERS is not None or MAX_SPEAKERS is not None:
+        diar_kwargs["min_speakers"] = MIN_SPEAKERS if MIN_SPEAKERS is not None else 1
+        diar_kwargs["max_speakers"] = MAX_SPEAKERS if MAX_SPEAKERS is not None else 10  # A reasonable default max
+
+    try:
+        if DIARIZATION_HALF_PRECISION and DEVICE == "cuda":
+            with torch.autocast("cuda", dtype=torch.float16):
+                return diar_pipeline(audio, **diar_kwargs)
+        return diar_pipeline(audio, **diar_kwargs)
+    finally:
+        del diar_pipeline
+        _drop_model(_load_diarization_pipeline)
+
+
+def _transcribe_and_align(audio):
+    """Transcribe the audio and align the segments for word-level timestamps."""
+    # 1) Transcribe
+    model = _load_asr_model()
     result = model.transcribe(
         audio,
         batch_size=BATCH_SIZE,
@@ -419,12 +895,12 @@ def run_diarization_transcription():
     # result: {"segments":[{start,end,text,...}], "text":"...", "language":"xx"}
     print("Transcription complete.")
 
-    # 3) Align for word-level timestamps
-    align_model, align_meta = whisperx.load_align_model(
-        language_code=result["language"],
-        device=DEVICE,
-        model_name=ALIGN_MODEL_NAME,
-    )
+    # Keep the ASR and alignment models from coexisting in VRAM
+    del model
+    _drop_model(_load_asr_model)
+
+    # 2) Align for word-level timestamps
+    align_model, align_meta = _load_align_model(result["language"])
     aligned = whisperx.align(
         result["segments"],
         align_model,
@@ -435,67 +911,85 @@ def run_diarization_transcription():
         interpolate_method=ALIGN_INTERPOLATE_METHOD,
     )
     print("Alignment complete.")
+    del align_model
+    _drop_model(_load_align_model)
+    return aligned
 
-    # 4) Diarize to assign speakers (optional)
-    if DO_DIARIZATION:
-        if not HF_TOKEN:
-            raise ValueError(
-                "Diarization requires a Hugging Face token. "
-                "Please set HF_TOKEN in your environment."
-            )
-        print("Starting diarization...")
-        diar_pipeline = whisperx.diarize.DiarizationPipeline(model_name=DIARIZATION_MODEL,use_auth_token=HF_TOKEN, device=DEVICE)
-
-        diar_kwargs = {}
-        if SPEAKER_COUNT is not None:
-            diar_kwargs["num_speakers"] = SPEAKER_COUNT
-        elif MIN_SPEAKERS is not None or MAX_SPEAKERS is not None:
-            diar_kwargs["min_speakers"] = MIN_SPEAKERS if MIN_SPEAKERS is not None else 1
-            diar_kwargs["max_speakers"] = MAX_SPEAKERS if MAX_SPEAKERS is not None else 10  # A reasonable default max
-
-        diar_segments = diar_pipeline(audio, **diar_kwargs)
-        fused = whisperx.assign_word_speakers(diar_segments, aligned)
-        print("Diarization complete.")
-
-        full_segments_df = pd.DataFrame(fused['segments'])
-        word_segments_df = pd.DataFrame(fused['word_segments'])
-    else:
-        fused = aligned
-
-    # 5) Save word-level JSONL output
-    words = []
-    for segment in fused.get("word_segments", []):
-        for word in segment.get("words", []):
-            words.append({
-                "start": round(float(word.get("start", 0)), 3),
-                "end": round(float(word.get("end", 0)), 3),
-                "text": word.get("word", ""),
-                "speaker": word.get("speaker", "UNKNOWN"),
-            })
-    if words:
-        _write_words_jsonl(words, OUT_WORDS_JSONL)
-
-    # 6) Save segment-level SRT with majority speaker
+
+def run_diarization_transcription(audio_path=AUDIO_PATH, out_srt=OUT_SRT, out_words_jsonl=OUT_WORDS_JSONL):
+    """Executes the full transcription, alignment, and diarization pipeline."""
+    print(f"CUDA available: {torch.cuda.is_available()} | Device: {DEVICE} | Compute Type: {COMPUTE_TYPE}")
+
+    audio_hash = _file_sha256(audio_path)
+    asr_settings = f"{ASR_MODEL}|{COMPUTE_TYPE}|{LANGUAGE}|{TASK}|{ASR_OPTIONS}|{VAD_METHOD}|{VAD_OPTIONS}|{CHUNK_SIZE}"
+
+    if not DO_DIARIZATION:
+        segments_cache = _stage_cache_path("segments", audio_hash, asr_settings)
+        segments = _read_stage_cache(segments_cache)
+        if segments is None:
+            segments = _transcribe_without_diarization(audio_path)
+            _write_stage_cache(segments_cache, segments)
+        srt_text_formatted = merge_srt_exact_tag(_write_srt_from_segments(segments, out_srt))
+        with open(out_srt.replace('.srt','_JOINED.srt'), "w", encoding="utf-8") as f:
+            f.write(srt_text_formatted)
+        print(f"[{now()}] ✅ Transcription completed (diarization disabled)")
+        print(f" - SRT saved to: {out_srt}")
+        return srt_text_formatted
+
+    aligned_cache = _stage_cache_path(
+        "aligned", audio_hash, f"{asr_settings}|{ALIGN_MODEL_NAME}|{RETURN_CHAR_ALIGNMENTS}|{ALIGN_INTERPOLATE_METHOD}"
+    )
+    diar_cache = _stage_cache_path(
+        "diarization", audio_hash, f"{DIARIZATION_MODEL}|{SPEAKER_COUNT}|{MIN_SPEAKERS}|{MAX_SPEAKERS}"
+    )
+    aligned = _read_stage_cache(aligned_cache)
+    diar_segments = _read_stage_cache(diar_cache)
+
+    if diar_segments is None and not HF_TOKEN:
+        raise ValueError(
+            "Diarization requires a Hugging Face token. "
+            "Please set HF_TOKEN in your environment."
+        )
+
+    if aligned is None or diar_segments is None:
+        # Diarization only needs the raw audio, so it runs on its own thread while
+        # transcription and alignment proceed; the pyannote model is small next to ASR
+        audio = whisperx.load_audio(audio_path)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization") as diar_executor:
+            if diar_segments is None:
+                diar_future = diar_executor.submit(_diarize_audio, audio)
+            if aligned is None:
+                aligned = _transcribe_and_align(audio)
+                _write_stage_cache(aligned_cache, aligned)
+            if diar_segments is None:
+                diar_segments = diar_future.result()
+                _write_stage_cache(diar_cache, diar_segments)
+        # The 16 kHz float32 waveform (~230 MB per hour) is not needed past this point
+        del audio
+        gc.collect()
+    print("Diarization complete.")
+
+    fused = whisperx.assign_word_speakers(diar_segments, aligned)
+
+    # Save word-level JSONL output
+    words = _word_records(fused.get("word_segments", []))
+    if not words.empty:
+        _write_words_jsonl(words, out_words_jsonl)
+
+    # Save segment-level SRT with majority speaker
     # First, ensure each segment has a speaker assigned based on its words
-    for seg in fused["segments"]:
-        if "speaker" not in seg and seg.get("words"):
-            word_speakers = [w.get("speaker", "UNKNOWN") for w in seg["words"]]
-            if word_speakers:
-                # Assign the most frequent speaker in the segment
-                seg["speaker"] = max(set(word_speakers), key=word_speakers.count)
-            else:
-                seg["speaker"] = "UNKNOWN"
+    _assign_majority_speakers(fused["segments"])
 
-    srt_text = _write_srt_from_segments(fused["segments"], OUT_SRT)
+    srt_text = _write_srt_from_segments(fused["segments"], out_srt)
 
     srt_text_formatted = merge_srt_exact_tag(srt_text)
 
-    with open(OUT_SRT.replace('.srt','_JOINED.srt'), "w", encoding="utf-8") as f:
+    with open(out_srt.replace('.srt','_JOINED.srt'), "w", encoding="utf-8") as f:
         f.write(srt_text_formatted)
 
     print(f"[{now()}] ✅ Diarization and transcription completed")
-    print(f" - Word-level JSONL saved to: {OUT_WORDS_JSONL}")
-    print(f" - Speaker SRT saved to: {OUT_SRT}")
+    print(f" - Word-level JSONL saved to: {out_words_jsonl}")
+    print(f" - Speaker SRT saved to: {out_srt}")
     
     # Return the formatted transcript for post-processing
     return srt_text_formatted
@@ -504,34 +998,43 @@ def run_diarization_transcription():
 # Main Function
 # =================================================================
 
-def main():
-    """Main function that orchestrates the entire pipeline"""
-    print(f"[{now()}] 🚀 Starting enhanced diarization pipeline")
-    
-    # 1) Run WhisperX diarization+transcription
-    raw_transcript = run_diarization_transcription()
+def _output_paths(audio_path):
+    """SRT and word-level JSONL paths for an audio file; the configured names for AUDIO_PATH"""
+    if audio_path == AUDIO_PATH:
+        return OUT_SRT, OUT_WORDS_JSONL
+    stem = os.path.splitext(audio_path)[0]
+    return f"{stem}_segments_with_speakers.srt", f"{stem}_words_with_speakers.jsonl"
+
+
+def main(audio_paths=None):
+    """Main function that orchestrates the entire pipeline for one or more meetings"""
+    audio_paths = audio_paths or [AUDIO_PATH]
+    print(f"[{now()}] 🚀 Starting enhanced diarization pipeline for {len(audio_paths)} recording(s)")
     
-    # 2) Post-process for role classification
+    raw_transcripts, enhanced_paths = [], []
+    for audio_path in audio_paths:
+        # 1) Run WhisperX diarization+transcription
+        out_srt, out_words_jsonl = _output_paths(audio_path)
+        raw_transcript = run_diarization_transcription(audio_path, out_srt, out_words_jsonl)
+        raw_transcripts.append(raw_transcript)
+
+        base_out = os.path.splitext(os.path.abspath(audio_path))[0] + "_dialogue"
+        enhanced_paths.append(base_out + "_enhanced.txt")
+
+        # Save raw diarization output as text
+        print(f"[{now()}] 📄 Saving raw diarization transcript...")
+        with open(base_out + "_raw.txt", "w", encoding="utf-8") as f:
+            f.write(raw_transcript)
+        print(f"[{now()}] ✅ Saved raw diarization to {base_out}_raw.txt")
+
+    # 2) Post-process for role classification; with the Batch API all meetings share
+    # one batch job, otherwise each enhanced transcript is written as its chunks come back
     print(f"[{now()}] 🔄 Starting transcript enhancement phase...")
-    enhanced_transcript = post_process_transcript(raw_transcript)
-    
-    # 3) Save final outputs
-    print(f"[{now()}] 💾 Preparing to save final output files...")
-    base_out = os.path.splitext(os.path.abspath(AUDIO_PATH))[0] + "_dialogue"
-    
-    # Save raw diarization output as text
-    print(f"[{now()}] 📄 Saving raw diarization transcript...")
-    with open(base_out + "_raw.txt", "w", encoding="utf-8") as f:
-        f.write(raw_transcript)
-    print(f"[{now()}] ✅ Saved raw diarization to {base_out}_raw.txt")
-    
-    # Save enhanced transcript as text  
-    print(f"[{now()}] 📄 Saving enhanced transcript with role classification...")
-    with open(base_out + "_enhanced.txt", "w", encoding="utf-8") as f:
-        f.write(enhanced_transcript)
-    print(f"[{now()}] ✅ Saved enhanced transcript to {base_out}_enhanced.txt")
+    post_process_transcripts(raw_transcripts, enhanced_paths)
+    for enhanced_path in enhanced_paths:
+        print(f"[{now()}] ✅ Saved enhanced transcript to {enhanced_path}")
     
     print(f"[{now()}] 🏁 Pipeline completed successfully! Generated enhanced transcript with role classification.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sys.argv[1:])
\ No newline at end of file
@@ -1,16 +1,260 @@
 import os
-import openai
-from openai import AzureOpenAI
+import re
 from pathlib import Path
 import subprocess
 import sys
 import shutil
+import functools
+import logging
+import threading
 import math
 import hashlib
-from pydub import AudioSegment
-import tempfile
+import difflib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-import time
+
+from openai import RateLimitError
+
+from app.core.clients import get_azure_client, get_openai_client
+from app.core.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Where to look for ffmpeg when it is not on PATH
+FFMPEG_FALLBACK_PATHS = [
+    '/usr/bin/ffmpeg',
+    '/usr/local/bin/ffmpeg',
+    'C:\\ffmpeg\\bin\\ffmpeg.exe',
+    'ffmpeg-2025-03-10-git-87e5da9067-essentials_build\\ffmpeg-2025-03-10-git-87e5da9067-essentials_build\\bin\\ffmpeg.exe'
+]
+
+# 32k Opus VOIP fits about an hour of speech in ~14MB, so compressing files past these
+# limits usually lets the recording go in a single transcription request instead of chunks
+COMPRESSION_THRESHOLD_MB = 15
+COMPRESSION_MIN_DURATION_SECONDS = 1800
+
+# Cuts pauses longer than 2s down to 0.5s, which shortens what gets transcribed but
+# shifts every later chunk timestamp away from the recording. Applied while compressing
+# only when api_config['trim_silence'] is set
+SILENCE_TRIM_FILTER = 'silenceremove=stop_periods=-1:stop_duration=2:stop_threshold=-45dB:stop_silence=0.5'
+
+# Audio codecs the transcription endpoint accepts as-is, with the container to copy them into
+COPYABLE_AUDIO_CODECS = {'opus': '.ogg', 'aac': '.m4a', 'mp3': '.mp3'}
+
+# Chunks of one recording sent to the transcription endpoint at once, unless
+# api_config['transcription_workers'] says otherwise
+CHUNK_TRANSCRIPTION_WORKERS = 5
+
+# Requests per minute allowed against the transcription endpoint by this process; chunk
+# uploads fire immediately until the budget is spent, and a 429 backs every worker off
+TRANSCRIPTION_REQUESTS_PER_MINUTE = float(os.getenv("TRANSCRIPTION_REQUESTS_PER_MINUTE", "50"))
+TRANSCRIPTION_RATE_LIMIT = TokenBucket(TRANSCRIPTION_REQUESTS_PER_MINUTE / 60, CHUNK_TRANSCRIPTION_WORKERS)
+CHUNK_RATE_LIMIT_RETRIES = 3
+
+# Each chunk runs this far into the next one so no word is cut at the seam; the repeated
+# words are dropped by matching the last words of a chunk against the first of the next
+CHUNK_OVERLAP_MS = 500
+CHUNK_SEAM_WORDS = 8
+CHUNK_SEAM_MIN_MATCH = 2
+
+# Shared by every chunk so they can be transcribed independently
+CHUNK_TRANSCRIPTION_PROMPT = 'The following conversation is an AI need analysis and advisory meeting between AI advisors and company representatives. Extract transcript in English with proper dialogue structure.'
+
+# Post-processing prompt with advanced speaker diarization; filled in with the raw transcript
+POST_PROCESS_PROMPT = """
+    You are an expert transcript editor specializing in AI consultation meeting transcription. Please improve the following raw transcript of an AI needs analysis and advisory meeting between AI experts and company representatives.
+
+    Your task is to:
+    1. The transcript needs to be in English. Even if some or all parts of the transcript are in any other language, translate them in English.
+    2. Fix any transcription errors, inconsistencies, and unclear speech
+    3. Create proper dialogue structure with clear speaker identification and role classification
+    4. Format the text with appropriate paragraphs and line breaks for readability
+    5. Maintain consistent naming of speakers throughout the entire transcript
+    6. Ensure the conversation flows naturally between segments and timestamp blocks
+    7. Preserve all timestamp markers [Timestamp: XX:XX - XX:XX] if present
+    8. Retain all factual information without altering meaning or context
+    9. Do not add any content that wasn't in the original transcript
+
+    **CRITICAL: SPEAKER DIARIZATION & ROLE CLASSIFICATION**
+    Perform intelligent speaker diarization that:
+    - **Separates different speakers** based on voice patterns, speaking style, and context clues
+    - **Classifies speakers by role** using conversation context and content analysis:
+
+    **AI EXPERTS** are identified by content that:
+    - **Offers services, recommendations, opinions, deliverables, or solutions** 
+    - **Proposes implementation strategies** or technical approaches
+    - **Discusses AI technologies, methodologies, or technical frameworks**
+    - **Asks technical assessment questions** about company needs or capabilities
+    - **Provides expert guidance** on AI implementation or best practices
+    - **Uses specialized AI/ML terminology** and technical language
+    - **Suggests next steps for consultation** or technical development
+    - **Explains technical concepts** or methodologies to the client
+
+    **COMPANY REPRESENTATIVES** are identified by content that:
+    - **Describes their company, business operations, or organizational structure**
+    - **Explains current challenges, problems, or business objectives**
+    - **Provides company-specific context**, processes, or domain knowledge
+    - **Shares their background or role within the company**
+    - **Asks questions about services, costs, timelines, or implementation**
+    - **Responds to technical questions** about their business needs
+    - **Discusses company resources, constraints, or requirements**
+
+    **CUSTOMER MANAGER** are identified by content that is **purely administrative/facilitative**:
+    - **Works as a liason** between AI experts and company representatives
+    - **Manages meeting flow** and transitions between speakers, although his/her involvement might be minimal
+    - **Handles scheduling or administrative matters**
+    - **Acts as neutral moderator** without providing technical expertise or business context
+    - **IMPORTANT**: Does NOT offer services, make recommendations, or provide technical guidance
+
+    **KEY DISTINCTION**: If someone is **offering services, providing recommendations, or giving technical advice**, they are an **AI EXPERT**, NOT a Customer Manager, regardless of how the statement is phrased.
+
+    **SPEAKER LABELING FORMAT:**
+    - Use the label "[AI Expert:]" for the dialogues uttered by AI consultation specialists
+    - Use the label "[Company rep.:]" for the dialogues uttered by company representatives  
+    - Use the label "[Customer Manager:]" for the dialogues uttered by customer managers
+    - If a dialogue's label/speaker cannot be determined, label it as 'UNKNOWN'.
+    - **IMPORTANT:** Analyze each dialogue's **content and intent** carefully. Focus on WHAT is being said rather than HOW it's said.
+    - **CRITICAL RULE**: Anyone discussing deliverables, recommendations, opinions, technical solutions, or service offerings is an AI EXPERT.
+    - Do not add any names with the labels. Do not use any other labels except those mentioned.
+    - Maintain consistent numbering throughout the transcript
+
+    **QUALITY ENHANCEMENT:**
+    - Remove filler words (um, uh, you know) for clarity while preserving natural speech patterns
+    - Fix grammatical errors and incomplete sentences
+    - Ensure proper capitalization and punctuation
+    - Group related statements by the same speaker into coherent paragraphs
+    - Add line breaks between different speakers for visual clarity
+
+    Return ONLY the enhanced transcript with proper speaker identification and role classification. Do not include any explanatory text or commentary.
+
+    RAW TRANSCRIPT:
+    {raw_transcript}
+    """
+
+# Long transcripts are enhanced one timestamp section at a time, several in parallel;
+# each section sees the tail of the raw section before it for speaker continuity
+POST_PROCESS_WORKERS = 4
+POST_PROCESS_CONTEXT_CHARS = 200
+POST_PROCESS_SECTION_CONTEXT = """
+    This is one section of a longer meeting transcript. The end of the preceding section is shown below for context only; do not include it in your output.
+
+    PRECEDING CONTEXT:
+    {context}
+    """
+TIMESTAMP_SECTION_PATTERN = re.compile(r'(?=\n\[Timestamp:[^\]]+\]\n)')
+# Timestamp headers and failed-chunk placeholders carry no speech; they are neither
+# worth a post-processing call on their own nor useful as context for the next section
+NON_SPEECH_PATTERN = re.compile(r'\[Timestamp:[^\]]+\]|\[Transcription failed for segment \d+\]')
+
+# Cached transcripts are keyed by audio content, so a re-run of the same recording
+# skips the API calls; set api_config['no_cache'] to force a fresh transcription.
+# Chunk transcripts are cached too, so a re-run after a failed chunk only redoes that
+# chunk. api_config['transcript_cache_dir'] moves the cache out of the output directory
+TRANSCRIPT_CACHE_DIR = '.cache'
+POST_PROCESS_PROMPT_HASH = hashlib.sha256((POST_PROCESS_PROMPT + POST_PROCESS_SECTION_CONTEXT).encode()).hexdigest()[:8]
+
+@functools.lru_cache(maxsize=1)
+def _find_ffmpeg():
+    """Locate a working ffmpeg once per process; None when it is unavailable"""
+    on_path = shutil.which('ffmpeg')
+    if on_path:
+        return on_path
+    for path in FFMPEG_FALLBACK_PATHS:
+        try:
+            subprocess.run([path, '-version'], capture_output=True, check=True)
+            return path
+        except (subprocess.SubprocessError, FileNotFoundError):
+            continue
+    return None
+
+@dataclass
+class AudioInfo:
+    """Size of an audio file, stat-ed once, and its duration, probed on first use"""
+    path: str
+    size_mb: float
+
+    @classmethod
+    def from_path(cls, path):
+        return cls(path, os.path.getsize(path) / (1024 * 1024))
+
+    @functools.cached_property
+    def duration_s(self):
+        return get_duration_seconds(self.path)
+
+def _should_compress(audio_info):
+    """Whether an audio file is large or long enough to be worth compressing before upload"""
+    if audio_info.size_mb > COMPRESSION_THRESHOLD_MB:
+        return True
+    try:
+        return audio_info.duration_s > COMPRESSION_MIN_DURATION_SECONDS
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError, KeyError):
+        return False
+
+def _audio_codec(path):
+    """Codec of a media file's first audio stream, or None when it cannot be probed"""
+    try:
+        streams = probe_media(path)['streams']
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError, KeyError):
+        return None
+    return next((stream.get('codec_name') for stream in streams if stream.get('codec_type') == 'audio'), None)
+
+def _trim_seam_overlap(previous, current):
+    """Drop the words at the start of a chunk transcript that repeat the end of the chunk before it"""
+    # Failed chunks are placeholders without a timestamp header; there is nothing to trim
+    if not current.startswith('\n[Timestamp:'):
+        return current
+    header, _, body = current.partition(']\n')
+    header += ']\n'
+
+    def normalize(words):
+        return [re.sub(r'\W', '', word.lower()) for word in words]
+
+    tail = normalize(previous.split()[-CHUNK_SEAM_WORDS:])
+    head_spans = [match.span() for match in re.finditer(r'\S+', body)][:CHUNK_SEAM_WORDS]
+    head = normalize(body[start:end] for start, end in head_spans)
+
+    match = difflib.SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+    # Only a run that closes the previous chunk and opens this one is the overlap
+    if match.size < CHUNK_SEAM_MIN_MATCH or match.a + match.size < len(tail) - 1 or match.b > 1:
+        return current
+    return header + body[head_spans[match.b + match.size - 1][1]:].lstrip()
+
+def _transcribe_rate_limited(audio_client, **kwargs):
+    """Transcribe within the process request budget, retrying with backoff on rate-limit errors"""
+    for attempt in range(CHUNK_RATE_LIMIT_RETRIES + 1):
+        TRANSCRIPTION_RATE_LIMIT.acquire()
+        try:
+            return audio_client.audio.transcriptions.create(**kwargs)
+        except RateLimitError as e:
+            if attempt == CHUNK_RATE_LIMIT_RETRIES:
+                raise
+            try:
+                retry_after = float(e.response.headers.get('retry-after', ''))
+            except ValueError:
+                retry_after = min(2 ** attempt, 30)
+            logger.warning("Transcription rate limited, retrying in %.0fs", retry_after)
+            TRANSCRIPTION_RATE_LIMIT.penalize(retry_after)
+
+def _hash_audio_file(path):
+    """Content hash of an audio file, read in 1MB blocks"""
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _read_cached_transcript(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _write_transcript(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
 
 def process_audio_transcription(file_path, output_dir, api_config, compress_audio=True):
     """
@@ -31,153 +275,132 @@ def process_audio_transcription(file_path, output_dir, api_config, compress_audi
     file_name = os.path.basename(file_path)
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     unique_id = hashlib.md5(f"{file_name}_{timestamp}".encode()).hexdigest()[:10]
+
+    # Set output file path for transcript
+    transcript_path = os.path.join(output_dir, f"{unique_id}_transcript.txt")
+    raw_transcript_path = os.path.join(output_dir, f"{unique_id}_raw_transcript.txt")
+
+    # Look for transcripts of the same audio from an earlier run
+    use_cache = not api_config.get('no_cache', False)
+    trim_silence = api_config.get('trim_silence', False)
+    cache_dir = api_config.get('transcript_cache_dir') or os.path.join(output_dir, TRANSCRIPT_CACHE_DIR)
+    # Trimmed audio has different timestamps, so its transcripts are cached separately
+    audio_hash = _hash_audio_file(file_path)[:16] + ('_trimmed' if trim_silence else '')
+    raw_cache_path = os.path.join(
+        cache_dir, f"{audio_hash}_{api_config.get('transcription_model', 'whisper-1')}_raw_transcript.txt")
+    enhanced_cache_path = os.path.join(
+        cache_dir, f"{audio_hash}_{api_config.get('model', 'gpt-4.1')}_{POST_PROCESS_PROMPT_HASH}_transcript.txt")
+
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        enhanced_transcript = _read_cached_transcript(enhanced_cache_path)
+        if enhanced_transcript is not None:
+            logger.info("Found cached transcript for this audio - skipping transcription and post-processing")
+            _write_transcript(transcript_path, enhanced_transcript)
+            return enhanced_transcript, transcript_path
+
+        raw_transcript = _read_cached_transcript(raw_cache_path)
+        if raw_transcript is not None:
+            logger.info("Found cached raw transcript for this audio - skipping transcription")
+            _write_transcript(raw_transcript_path, raw_transcript)
+            enhanced_transcript = post_process_transcript(raw_transcript, api_config)
+            _write_transcript(transcript_path, enhanced_transcript)
+            if enhanced_transcript != raw_transcript:
+                _write_transcript(enhanced_cache_path, enhanced_transcript)
+            return enhanced_transcript, transcript_path
     
     # Use ffprobe to detect if file contains video streams
     audio_path = file_path
-    extracted_audio = False
     is_video = False
+    # Compressed and extracted audio written for this run, removed once transcription ends
+    temp_files = []
     
     try:
-        # Use ffprobe to check if file has video streams
-        result = subprocess.run([
-            'ffprobe', '-v', 'quiet', '-select_streams', 'v:0', 
-            '-show_entries', 'stream=codec_type', '-of', 'csv=p=0', file_path
-        ], capture_output=True, text=True)
-        
         # If video stream found, it's a video file
-        is_video = result.stdout.strip() != ""
+        is_video = any(stream.get('codec_type') == 'video' for stream in probe_media(file_path)['streams'])
         
-    except (subprocess.SubprocessError, FileNotFoundError):
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError, KeyError):
         # If ffprobe fails, fall back to extension check
         file_extension = os.path.splitext(file_path)[1].lower()
         is_video = file_extension in ['.mp4', '.avi', '.mov', '.mkv', '.flv']
     
     # Calculate file size in MB
-    file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    audio_info = AudioInfo.from_path(file_path)
+    file_size_mb = audio_info.size_mb
     compressed = False
     
-    # Compress audio file if it's not a video AND size > 25MB AND compression is enabled
-    if not is_video and file_size_mb > 25 and compress_audio:
-        print(f"Audio file detected ({file_size_mb:.1f}MB). Compression option selected - compressing to 32k bitrate...")
+    # Compress audio file if it's not a video AND size > 15MB or duration > 30 minutes AND compression is enabled
+    should_compress = not is_video and compress_audio and _should_compress(audio_info)
+    if should_compress:
+        logger.info("Audio file detected (%.1fMB). Compression option selected - compressing to 32k bitrate...", file_size_mb)
         compressed_audio_path = os.path.join(output_dir, f"{unique_id}_compressed_audio.ogg")
+        temp_files.append(Path(compressed_audio_path))
         try:
-            # Try to find ffmpeg - it might be in the path or need to be specified
-            try:
-                # Try running ffmpeg with a simple command to check if it's available
-                subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-                ffmpeg_available = True
-                ffmpeg_path = 'ffmpeg'
-            except (subprocess.SubprocessError, FileNotFoundError):
-                # Check for common ffmpeg locations
-                possible_paths = [
-                    'ffmpeg',
-                    '/usr/bin/ffmpeg',
-                    '/usr/local/bin/ffmpeg',
-                    'C:\\ffmpeg\\bin\\ffmpeg.exe',
-                    'ffmpeg-2025-03-10-git-87e5da9067-essentials_build\\ffmpeg-2025-03-10-git-87e5da9067-essentials_build\\bin\\ffmpeg.exe'
-                ]
-                
-                ffmpeg_available = False
-                ffmpeg_path = None
-                
-                for path in possible_paths:
-                    try:
-                        subprocess.run([path, '-version'], capture_output=True, check=True)
-                        ffmpeg_available = True
-                        ffmpeg_path = path
-                        break
-                    except (subprocess.SubprocessError, FileNotFoundError):
-                        continue
+            ffmpeg_path = _find_ffmpeg()
+            ffmpeg_available = ffmpeg_path is not None
             
             if ffmpeg_available:
-                print("ffmpeg found. Compressing audio...")
+                logger.info("ffmpeg found. Compressing audio...")
                 # Compress audio using ffmpeg with specified parameters
+                silence_filter = ['-af', SILENCE_TRIM_FILTER] if trim_silence else []
                 subprocess.run([
-                    ffmpeg_path, '-i', file_path, '-vn', '-map_metadata', '-1', '-ac', '1',
+                    ffmpeg_path, '-i', file_path, '-vn', '-map_metadata', '-1', '-ac', '1', *silence_filter,
                     '-c:a', 'libopus', '-b:a', '32k', '-application', 'voip',
                     compressed_audio_path, '-y'
                 ], check=True, capture_output=True)
                 
                 audio_path = compressed_audio_path
-                extracted_audio = True
-                print(f"Audio compression completed. Using compressed file: {audio_path}")
+                logger.info("Audio compression completed. Using compressed file: %s", audio_path)
                 compressed = True
             else:
-                print("FFmpeg not found. Audio compression disabled - processing original audio file.")
-        except Exception as e:
-            print(f"Error compressing audio: {e}")
-            print("Audio compression failed - processing original audio file.")
+                logger.warning("FFmpeg not found. Audio compression disabled - processing original audio file.")
+        except Exception:
+            logger.warning("Error compressing audio", exc_info=True)
+            logger.warning("Audio compression failed - processing original audio file.")
     elif not is_video and file_size_mb > 25 and not compress_audio:
-        print(f"Audio file detected ({file_size_mb:.1f}MB). Compression option disabled - processing original file.")
+        logger.info("Audio file detected (%.1fMB). Compression option disabled - processing original file.", file_size_mb)
     
-    if not is_video and file_size_mb < 25 and compress_audio:
-        print("File size is less than 25MB. Proceeding without compression...")
+    if not is_video and compress_audio and not should_compress:
+        logger.info("File size is less than %sMB. Proceeding without compression...", COMPRESSION_THRESHOLD_MB)
 
     if is_video:
-        print("Video file detected. Audio will be extracted for transcription.")
-        # Extract audio from video file
-        extracted_audio_path = os.path.join(output_dir, f"{unique_id}_audio.mp3")
+        logger.info("Video file detected. Audio will be extracted for transcription.")
+        # Extract audio from video file; a track already in an accepted codec is copied out
+        # without re-encoding, anything else is re-encoded to MP3
+        copy_extension = COPYABLE_AUDIO_CODECS.get(_audio_codec(file_path))
+        extracted_audio_path = os.path.join(output_dir, f"{unique_id}_audio{copy_extension or '.mp3'}")
+        temp_files.append(Path(extracted_audio_path))
         try:
-            # Try to find ffmpeg - it might be in the path or need to be specified
-            try:
-                # Try running ffmpeg with a simple command to check if it's available
-                subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-                ffmpeg_available = True
-                ffmpeg_path = 'ffmpeg'
-            except (subprocess.SubprocessError, FileNotFoundError):
-                # Check for common ffmpeg locations
-                possible_paths = [
-                    'ffmpeg',
-                    '/usr/bin/ffmpeg',
-                    '/usr/local/bin/ffmpeg',
-                    'C:\\ffmpeg\\bin\\ffmpeg.exe',
-                    'ffmpeg-2025-03-10-git-87e5da9067-essentials_build\\ffmpeg-2025-03-10-git-87e5da9067-essentials_build\\bin\\ffmpeg.exe'
-                ]
-                
-                ffmpeg_available = False
-                ffmpeg_path = None
-                
-                for path in possible_paths:
-                    try:
-                        subprocess.run([path, '-version'], capture_output=True, check=True)
-                        ffmpeg_available = True
-                        ffmpeg_path = path
-                        break
-                    except (subprocess.SubprocessError, FileNotFoundError):
-                        continue
+            ffmpeg_path = _find_ffmpeg()
+            ffmpeg_available = ffmpeg_path is not None
             
             if ffmpeg_available:
                 # Extract audio using ffmpeg
+                codec_args = ['-c:a', 'copy'] if copy_extension else ['-q:a', '0']
                 subprocess.run([
-                    ffmpeg_path, '-i', file_path, '-q:a', '0', '-map', 'a', 
+                    ffmpeg_path, '-i', file_path, '-vn', *codec_args, '-map', 'a:0',
                     extracted_audio_path, '-y'
                 ], check=True, capture_output=True)
                 
                 audio_path = extracted_audio_path
-                extracted_audio = True
-                print(f"Extracted audio to {audio_path}")
+                logger.info("Extracted audio to %s", audio_path)
             else:
-                print("FFmpeg not found. Will try to process the video directly.")
-        except Exception as e:
-            print(f"Error extracting audio from video: {e}")
+                logger.warning("FFmpeg not found. Will try to process the video directly.")
+        except Exception:
+            logger.warning("Error extracting audio from video", exc_info=True)
             # Continue with original file and let OpenAI handle it
-            print("Will try to process the video directly.")
+            logger.warning("Will try to process the video directly.")
 
-    # Set output file path for transcript
-    transcript_path = os.path.join(output_dir, f"{unique_id}_transcript.txt")
-    raw_transcript_path = os.path.join(output_dir, f"{unique_id}_raw_transcript.txt")
-    
     # Get API configuration parameters
     use_azure = api_config.get('use_azure', False)
     transcription_model = api_config.get('transcription_model', 'whisper-1')
     api_key = api_config.get('api_key')
     
-    # Get file size and determine if chunking is needed
-    file_size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+    # Get file size and determine if chunking is needed; only re-stat if compression or extraction replaced the file
+    if audio_path != file_path:
+        audio_info = AudioInfo.from_path(audio_path)
+    file_size_mb = audio_info.size_mb
 
-    audio = AudioSegment.from_file(audio_path)
-    duration_seconds = len(audio) / 1000  # pydub uses milliseconds
-    duration_hours = duration_seconds / 3600  # Convert to hours
     # Determine if chunking is needed based on file size and duration
     max_size_mb = 25  # 25MB chunk size
     max_duration_seconds = 1500  # 25 minutes (1500 seconds)
@@ -186,41 +409,34 @@ def process_audio_transcription(file_path, output_dir, api_config, compress_audi
     
     try:
         # Handle transcript generation with or without chunking
-        if needs_chunking and audio is not None:
-            # Split and transcribe in chunks with context preservation
-            raw_transcript = split_and_transcribe_with_context(audio_path, api_config, max_size_mb, max_duration_seconds, audio)
+        enhanced_transcript = None
+        if needs_chunking:
+            # Split and transcribe in chunks, post-processing each one as soon as it is ready
+            raw_transcript, enhanced_transcript = transcribe_and_post_process_chunks(
+                audio_path, api_config, max_size_mb, max_duration_seconds, audio_info,
+                cache_dir=cache_dir if use_cache else None)
         else:
-            print("Transcribing the whole audio file in one shot (file size <25MB)...")
+            logger.info("Transcribing the whole audio file in one shot (file size <25MB)...")
             
             # Transcribe directly based on API selection
             if use_azure:
-                print("Using MS Azure endpoint for transcription")
+                logger.info("Using MS Azure endpoint for transcription")
             else:
-                print("Using OpenAI direct endpoint for transcription")
+                logger.info("Using OpenAI direct endpoint for transcription")
                 
             with open(audio_path, "rb") as audio_file:
                 if use_azure:
-                    # Use Azure OpenAI for transcription
-                    client = AzureOpenAI(
-                        api_key=api_key,
-                        # azure_endpoint=api_config.get('azure_endpoint', '').replace("chat/completions?", ""),
-                        azure_endpoint=api_config.get('azure_endpoint', ''),
-                        # api_version=api_config.get('api_version', '2024-12-01-preview')
-                        api_version=api_config.get('api_version', '2025-03-01-preview'),
-                    )
-                    
                     # Use the specific audio endpoint if provided, otherwise construct from the main endpoint
                     audio_endpoint_url = api_config.get('azure_audio_endpoint', 
                                         api_config.get('azure_endpoint', '').replace("chat/completions?", "audio/transcriptions?"))
                     
-                    print(f"Using Azure endpoint for transcription: {audio_endpoint_url}")
+                    logger.info("Using Azure endpoint for transcription: %s", audio_endpoint_url)
                     
-                    # Create a customized client for audio transcription with the correct endpoint
-                    from openai import AzureOpenAI as AzureAudioClient
-                    audio_client = AzureAudioClient(
-                        api_key=api_key,
-                        azure_endpoint=audio_endpoint_url.split('/openai/')[0],  # Base URL part
-                        api_version=api_config.get('api_version', '2024-12-01-preview')
+                    # Shared client for audio transcription with the correct endpoint
+                    audio_client = get_azure_client(
+                        api_key,
+                        audio_endpoint_url.split('/openai/')[0],  # Base URL part
+                        api_config.get('api_version', '2024-12-01-preview')
                     )
                     
                     # Now use the correct client and deployment name
@@ -231,8 +447,7 @@ def process_audio_transcription(file_path, output_dir, api_config, compress_audi
                     )
                 else:
                     # Use OpenAI directly
-                    openai.api_key = api_key
-                    transcript_response = openai.audio.transcriptions.create(
+                    transcript_response = get_openai_client(api_config).audio.transcriptions.create(
                         model=transcription_model,
                         file=audio_file,
                         prompt='Extract transcript in English with proper dialogue structure. The following conversation is an AI need analysis and advisory meeting between AI advisors and company representatives. Under no circumstances create transcript in any other language than English.'
@@ -242,28 +457,31 @@ def process_audio_transcription(file_path, output_dir, api_config, compress_audi
                 raw_transcript = transcript_response.text
         
         # Save raw transcript to file for reference
-        with open(raw_transcript_path, "w", encoding="utf-8") as f:
-            f.write(raw_transcript)
+        _write_transcript(raw_transcript_path, raw_transcript)
+        if use_cache:
+            _write_transcript(raw_cache_path, raw_transcript)
 
-        print("Raw transcription complete. Post-processing transcript for improved quality...")
-        
-        # Post-process the transcript using GPT-4.1 for improved quality and structure
-        enhanced_transcript = post_process_transcript(raw_transcript, api_config)
+        if enhanced_transcript is None:
+            logger.info("Raw transcription complete. Post-processing transcript for improved quality...")
+
+            # Post-process the transcript using GPT-4.1 for improved quality and structure
+            enhanced_transcript = post_process_transcript(raw_transcript, api_config)
         
         # Save enhanced transcript to file
-        with open(transcript_path, "w", encoding="utf-8") as f:
-            f.write(enhanced_transcript)
+        _write_transcript(transcript_path, enhanced_transcript)
+        if use_cache and enhanced_transcript != raw_transcript:
+            _write_transcript(enhanced_cache_path, enhanced_transcript)
 
-    except Exception as e:
-        print(f"Error during transcription: {e}")
+    except Exception:
+        logger.error("Error during transcription", exc_info=True)
         raise
     finally:
-        # Clean up extracted audio file if applicable - COMMENTED OUT (keeping extracted audio files)
-        if extracted_audio and 'extracted_audio_path' in locals() and os.path.exists(extracted_audio_path):
+        # Clean up compressed or extracted audio, including partial output from a failed ffmpeg run
+        for temp_file in temp_files:
             try:
-                os.remove(extracted_audio_path)  
-            except Exception as e:
-                print(f"Error with temporary audio file: {e}")
+                temp_file.unlink(missing_ok=True)
+            except OSError:
+                logger.warning("Error with temporary audio file", exc_info=True)
     
     return enhanced_transcript, transcript_path
 
@@ -279,78 +497,35 @@ def post_process_transcript(raw_transcript, api_config):
         str: Enhanced transcript with proper formatting and structure
     """
     model_name = api_config.get('model', 'GPT model')
-    print(f"Enhancing transcript quality with {model_name}...")
-    
-    # Create prompt for transcript enhancement with advanced speaker diarization
-    prompt = f"""
-    You are an expert transcript editor specializing in AI consultation meeting transcription. Please improve the following raw transcript of an AI needs analysis and advisory meeting between AI experts and company representatives.
-
-    Your task is to:
-    1. The transcript needs to be in English. Even if some or all parts of the transcript are in any other language, translate them in English.
-    2. Fix any transcription errors, inconsistencies, and unclear speech
-    3. Create proper dialogue structure with clear speaker identification and role classification
-    4. Format the text with appropriate paragraphs and line breaks for readability
-    5. Maintain consistent naming of speakers throughout the entire transcript
-    6. Ensure the conversation flows naturally between segments and timestamp blocks
-    7. Preserve all timestamp markers [Timestamp: XX:XX - XX:XX] if present
-    8. Retain all factual information without altering meaning or context
-    9. Do not add any content that wasn't in the original transcript
-
-    **CRITICAL: SPEAKER DIARIZATION & ROLE CLASSIFICATION**
-    Perform intelligent speaker diarization that:
-    - **Separates different speakers** based on voice patterns, speaking style, and context clues
-    - **Classifies speakers by role** using conversation context and content analysis:
-
-    **AI EXPERTS** are identified by content that:
-    - **Offers services, recommendations, opinions, deliverables, or solutions** 
-    - **Proposes implementation strategies** or technical approaches
-    - **Discusses AI technologies, methodologies, or technical frameworks**
-    - **Asks technical assessment questions** about company needs or capabilities
-    - **Provides expert guidance** on AI implementation or best practices
-    - **Uses specialized AI/ML terminology** and technical language
-    - **Suggests next steps for consultation** or technical development
-    - **Explains technical concepts** or methodologies to the client
-
-    **COMPANY REPRESENTATIVES** are identified by content that:
-    - **Describes their company, business operations, or organizational structure**
-    - **Explains current challenges, problems, or business objectives**
-    - **Provides company-specific context**, processes, or domain knowledge
-    - **Shares their background or role within the company**
-    - **Asks questions about services, costs, timelines, or implementation**
-    - **Responds to technical questions** about their business needs
-    - **Discusses company resources, constraints, or requirements**
+    logger.info("Enhancing transcript quality with %s...", model_name)
 
-    **CUSTOMER MANAGER** are identified by content that is **purely administrative/facilitative**:
-    - **Works as a liason** between AI experts and company representatives
-    - **Manages meeting flow** and transitions between speakers, although his/her involvement might be minimal
-    - **Handles scheduling or administrative matters**
-    - **Acts as neutral moderator** without providing technical expertise or business context
-    - **IMPORTANT**: Does NOT offer services, make recommendations, or provide technical guidance
+    sections = [section for section in TIMESTAMP_SECTION_PATTERN.split(raw_transcript) if section.strip()]
+    if len(sections) <= 1:
+        return _enhance_transcript_section(raw_transcript, api_config)
 
-    **KEY DISTINCTION**: If someone is **offering services, providing recommendations, or giving technical advice**, they are an **AI EXPERT**, NOT a Customer Manager, regardless of how the statement is phrased.
+    logger.info("Enhancing %s transcript sections in parallel...", len(sections))
+    contexts = [None] + [_section_context(section) for section in sections[:-1]]
+    with ThreadPoolExecutor(max_workers=min(POST_PROCESS_WORKERS, len(sections))) as executor:
+        enhanced_sections = list(executor.map(
+            lambda section, context: _enhance_transcript_section(section, api_config, context),
+            sections, contexts))
+    return "\n\n".join(section.strip() for section in enhanced_sections)
 
-    **SPEAKER LABELING FORMAT:**
-    - Use the label "[AI Expert:]" for the dialogues uttered by AI consultation specialists
-    - Use the label "[Company rep.:]" for the dialogues uttered by company representatives  
-    - Use the label "[Customer Manager:]" for the dialogues uttered by customer managers
-    - If a dialogue's label/speaker cannot be determined, label it as 'UNKNOWN'.
-    - **IMPORTANT:** Analyze each dialogue's **content and intent** carefully. Focus on WHAT is being said rather than HOW it's said.
-    - **CRITICAL RULE**: Anyone discussing deliverables, recommendations, opinions, technical solutions, or service offerings is an AI EXPERT.
-    - Do not add any names with the labels. Do not use any other labels except those mentioned.
-    - Maintain consistent numbering throughout the transcript
+def _speech_text(transcript):
+    """A transcript or section without its timestamp headers and failed-chunk placeholders"""
+    return NON_SPEECH_PATTERN.sub('', transcript).strip()
 
-    **QUALITY ENHANCEMENT:**
-    - Remove filler words (um, uh, you know) for clarity while preserving natural speech patterns
-    - Fix grammatical errors and incomplete sentences
-    - Ensure proper capitalization and punctuation
-    - Group related statements by the same speaker into coherent paragraphs
-    - Add line breaks between different speakers for visual clarity
-
-    Return ONLY the enhanced transcript with proper speaker identification and role classification. Do not include any explanatory text or commentary.
+def _section_context(previous_section):
+    """Tail of the preceding section's speech, or None when it had none"""
+    return _speech_text(previous_section)[-POST_PROCESS_CONTEXT_CHARS:] or None
 
-    RAW TRANSCRIPT:
-    {raw_transcript}
-    """
+def _enhance_transcript_section(raw_transcript, api_config, context=None):
+    """Enhance one transcript or transcript section; returns it unchanged if the call fails"""
+    if not _speech_text(raw_transcript):
+        return raw_transcript
+    prompt = POST_PROCESS_PROMPT.format(raw_transcript=raw_transcript)
+    if context:
+        prompt = POST_PROCESS_SECTION_CONTEXT.format(context=context) + prompt
 
 
     ###Legacy prompt for transcript enhancement
@@ -415,52 +590,74 @@ def post_process_transcript(raw_transcript, api_config):
     # """
 
     
-    # Use OpenAI or Azure OpenAI based on config
+    # Use OpenAI or Azure OpenAI based on config, through the process-wide client
     try:
         use_azure = api_config.get('use_azure', False)
-        
-        if use_azure:
-            # Use Azure OpenAI
-            client = AzureOpenAI(
-                api_key=api_config.get('api_key'),
-                azure_endpoint=api_config.get('azure_endpoint', ''),
-                api_version=api_config.get('api_version', '2024-12-01-preview')
-            )
-            
-            chat_model = api_config.get('model', 'gpt-4.1')
-            response = client.chat.completions.create(
-                model=chat_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert transcript editor who improves the quality, readability, and structure of transcribed conversations."},
-                    {"role": "user", "content": prompt}
-                ],
-                # temperature=0.0,
-                # max_tokens=16000
-            )
-        else:
-            # Use OpenAI directly
-            openai.api_key = api_config.get('api_key')
-            chat_model = api_config.get('model', 'gpt-4.1-2025-04-14')
-            response = openai.chat.completions.create(
-                model=chat_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert transcript editor who improves the quality, readability, and structure of transcribed conversations."},
-                    {"role": "user", "content": prompt}
-                ]
-                # temperature=0.0,  
-                # max_tokens=16000
-            )
+        client = get_openai_client(api_config)
+        chat_model = api_config.get('model', 'gpt-4.1' if use_azure else 'gpt-4.1-2025-04-14')
+        response = client.chat.completions.create(
+            model=chat_model,
+            messages=[
+                {"role": "system", "content": "You are an expert transcript editor who improves the quality, readability, and structure of transcribed conversations."},
+                {"role": "user", "content": prompt}
+            ],
+            # temperature=0.0,
+            # max_tokens=16000
+        )
         
         # Extract the enhanced transcript
         enhanced_transcript = response.choices[0].message.content
         return enhanced_transcript
         
-    except Exception as e:
-        print(f"Error enhancing transcript: {e}")
-        print("Falling back to raw transcript...")
+    except Exception:
+        logger.warning("Error enhancing transcript", exc_info=True)
+        logger.warning("Falling back to raw transcript...")
         return raw_transcript
 
-def split_and_transcribe_with_context(audio_path, api_config, max_size_mb=25, max_duration_seconds=1500, audio=None):
+def transcribe_and_post_process_chunks(audio_path, api_config, max_size_mb=25, max_duration_seconds=1500, audio_info=None,
+                                       cache_dir=None):
+    """
+    Transcribe an audio file in chunks while post-processing the chunks already transcribed
+
+    Args:
+        audio_path: Path to the audio file
+        api_config: Dictionary containing API configuration
+        max_size_mb: Maximum file size in MB
+        max_duration_seconds: Maximum duration in seconds
+        audio_info: AudioInfo already gathered for audio_path (optional)
+        cache_dir: Directory for cached chunk transcripts (optional)
+
+    Returns:
+        tuple: (raw transcript, enhanced transcript)
+    """
+    chunk_transcripts = {}
+    section_futures = {}
+    lock = threading.Lock()
+
+    def submit_ready(executor, i):
+        # A chunk is enhanced once it and the chunk before it, its context, are transcribed
+        if i in chunk_transcripts and i not in section_futures and (i == 0 or i - 1 in chunk_transcripts):
+            context = _section_context(chunk_transcripts[i - 1]) if i else None
+            section_futures[i] = executor.submit(_enhance_transcript_section, chunk_transcripts[i], api_config, context)
+
+    with ThreadPoolExecutor(max_workers=POST_PROCESS_WORKERS) as executor:
+        def on_chunk(i, chunk_transcript):
+            with lock:
+                chunk_transcripts[i] = chunk_transcript
+                submit_ready(executor, i)
+                submit_ready(executor, i + 1)
+
+        raw_transcript = split_and_transcribe_with_context(
+            audio_path, api_config, max_size_mb, max_duration_seconds, audio_info, on_chunk=on_chunk,
+            cache_dir=cache_dir)
+        logger.info("Raw transcription complete. Waiting for the remaining post-processing...")
+        enhanced_transcript = "\n\n".join(
+            section_futures[i].result().strip() for i in sorted(section_futures))
+
+    return raw_transcript, enhanced_transcript
+
+def split_and_transcribe_with_context(audio_path, api_config, max_size_mb=25, max_duration_seconds=1500, audio_info=None,
+                                      on_chunk=None, cache_dir=None):
     """
     Split an audio file into chunks and transcribe each chunk while preserving context between chunks
     
@@ -469,7 +666,9 @@ def split_and_transcribe_with_context(audio_path, api_config, max_size_mb=25, ma
         api_config: Dictionary containing API configuration
         max_size_mb: Maximum file size in MB
         max_duration_seconds: Maximum duration in seconds
-        audio: Pre-loaded AudioSegment (optional)
+        audio_info: AudioInfo already gathered for audio_path (optional)
+        on_chunk: Called with (chunk index, chunk transcript) as each chunk finishes (optional)
+        cache_dir: Directory for transcripts keyed by chunk content, reused on re-runs (optional)
         
     Returns:
         str: Combined transcript from all chunks with preserved context
@@ -479,142 +678,119 @@ def split_and_transcribe_with_context(audio_path, api_config, max_size_mb=25, ma
     api_key = api_config.get('api_key')
     transcription_model = api_config.get('transcription_model', 'whisper-1')
     
-    # Load the audio file if not provided
-    if audio is None:
-        audio = AudioSegment.from_file(audio_path)
-    
-    # Get audio duration in seconds
-    duration_seconds = len(audio) / 1000
+    # Get audio duration in seconds; probing the container avoids decoding the whole file
+    audio_info = audio_info or AudioInfo.from_path(audio_path)
+    duration_seconds = audio_info.duration_s
+    duration_ms = int(duration_seconds * 1000)
     
     # Calculate the number of chunks needed based on both size and duration
-    file_size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+    file_size_mb = audio_info.size_mb
     
     chunks_by_size = math.ceil(file_size_mb / (max_size_mb * 0.9))  # Use 90% of max to be safe
     chunks_by_duration = math.ceil(duration_seconds / (max_duration_seconds * 0.95))  # Use 95% of max to be safe
     # num_chunks = max(chunks_by_size, chunks_by_duration)
     num_chunks = chunks_by_size
     
-    print(f"Splitting audio into {num_chunks} chunks based on size ({chunks_by_size})")
+    logger.info("Splitting audio into %s chunks based on size (%s)", num_chunks, chunks_by_size)
     
     # Calculate chunk duration in milliseconds
-    chunk_length_ms = len(audio) // num_chunks
-    
-    # Create temp directory for chunks
-    temp_dir = tempfile.mkdtemp()
+    chunk_length_ms = duration_ms // num_chunks
     
-    # Split the audio into chunks and transcribe each chunk
-    transcripts = []
-    context_text = ""  # Initialize context as empty for the first chunk
-
+    # Every chunk goes through one shared client, so its connection pool keeps the
+    # TLS session to the endpoint alive between chunk uploads
     if use_azure:
-        client = AzureOpenAI(
-            api_key=api_key,
-            azure_endpoint=api_config.get('azure_endpoint', ''),
-            api_version=api_config.get('api_version', '2025-03-01-preview')
-        )
-    
-        # Create a separate client for audio transcription
-        from openai import AzureOpenAI as AzureAudioClient
+        # Separate client for audio transcription
         # audio_endpoint_url = api_config.get('azure_audio_endpoint', 
         #                     api_config.get('azure_endpoint', '').replace("chat/completions?", "audio/transcriptions?"))
 
         audio_endpoint_url = api_config.get('azure_audio_endpoint')
-        audio_client = AzureAudioClient(
-            api_key=api_key,
-            # azure_endpoint=audio_endpoint_url.split('/openai/')[0],  # Base URL part
-            # api_version=api_config.get('api_version', '2024-12-01-preview')
-            azure_endpoint=audio_endpoint_url,
-            api_version=api_config.get('api_version', '2025-03-01-preview')
+        audio_client = get_azure_client(
+            api_key,
+            # audio_endpoint_url.split('/openai/')[0],  # Base URL part
+            # api_config.get('api_version', '2024-12-01-preview')
+            audio_endpoint_url,
+            api_config.get('api_version', '2025-03-01-preview')
         )
+        logger.info("Using MS Azure endpoint for transcription")
     else:
         # Use OpenAI directly
-        openai.api_key = api_key
+        audio_client = get_openai_client(api_config)
+        logger.info("Using OpenAI direct endpoint for transcription")
     
-    for i in range(num_chunks):
+    def transcribe_chunk(i):
         # Calculate start and end times for this chunk
         start_ms = i * chunk_length_ms
-        end_ms = min((i + 1) * chunk_length_ms, len(audio))
-        
-        # Extract the chunk
-        chunk = audio[start_ms:end_ms]
-        
-        # Save the chunk to a temporary file
-        chunk_path = os.path.join(temp_dir, f"chunk_{i}.mp3")
-        chunk.export(chunk_path, format="mp3")
-        
-        # Log chunk information
-        chunk_size_mb = os.path.getsize(chunk_path) / (1024 * 1024)
-        chunk_duration = len(chunk) / 1000
-        print(f"Chunk {i+1}/{num_chunks}: {chunk_size_mb:.2f}MB, {chunk_duration:.2f}s")
+        end_ms = duration_ms if i == num_chunks - 1 else (i + 1) * chunk_length_ms
+        encode_end_ms = min(end_ms + CHUNK_OVERLAP_MS, duration_ms)
         
         # Format timestamp for header
         start_time = format_timestamp(start_ms/1000)
         end_time = format_timestamp(end_ms/1000)
         chunk_header = f"\n[Timestamp: {start_time} - {end_time}]\n"
         
-        # Create appropriate prompt with context from previous chunk
-        if i == 0:
-            # For the first chunk, use a basic prompt
-            prompt = 'The following conversation is an AI need analysis and advisory meeting between AI advisors and company representatives. Extract transcript in English with proper dialogue structure.'
-        else:
-            # For subsequent chunks, include context from previous transcript
-            # Limit context to last 170 characters 
-            trimmed_context = context_text[-170:] if len(context_text) > 170 else context_text
-            prompt = f'''The following is a continuation of a conversation. Here is the previous part of the transcript:
-            
-{trimmed_context}
-
-Continue the transcription, maintaining speaker consistency and dialogue structure. This is an AI need analysis and advisory meeting between AI advisors and company representatives.'''
-        if use_azure:
-            print("Using MS Azure endpoint for transcription")
-        else:
-            print("Using OpenAI direct endpoint for transcription")
-        # Transcribe the chunk based on API selection
         try:
-            with open(chunk_path, "rb") as chunk_file:
+            # Encode just this chunk with ffmpeg straight into memory; seeking before
+            # -i skips the audio ahead of it instead of decoding it
+            chunk_bytes = subprocess.run([
+                _find_ffmpeg() or 'ffmpeg', '-ss', f"{start_ms / 1000:.3f}", '-t', f"{(encode_end_ms - start_ms) / 1000:.3f}",
+                '-i', audio_path, '-vn', '-map_metadata', '-1', '-ac', '1',
+                '-c:a', 'libopus', '-b:a', '32k', '-application', 'voip',
+                # Bit-exact output so the same audio always encodes to the same cache key
+                '-fflags', '+bitexact', '-flags:a', '+bitexact', '-f', 'ogg', 'pipe:1'
+            ], check=True, capture_output=True).stdout
+            
+            # Log chunk information
+            chunk_size_mb = len(chunk_bytes) / (1024 * 1024)
+            chunk_duration = (encode_end_ms - start_ms) / 1000
+            logger.info("Chunk %s/%s: %.2fMB, %.2fs", i+1, num_chunks, chunk_size_mb, chunk_duration)
 
-                if use_azure:
-                    transcript_response = audio_client.audio.transcriptions.create(
-                        model=transcription_model,
-                        file=chunk_file,
-                        prompt=prompt
-                    )
-                else:
-                    transcript_response = openai.audio.transcriptions.create(
-                        model=transcription_model,
-                        file=chunk_file,
-                        prompt=prompt
-                    )
-                
-                chunk_transcript = transcript_response.text
-                
-                # Add to our list of transcripts with header
-                transcripts.append(chunk_header + chunk_transcript)
-                
-                # Update context for the next chunk
-                context_text = chunk_transcript
-                
-                # Add a small delay to avoid rate limiting
-                time.sleep(1)
-                
-        except Exception as e:
-            print(f"Error transcribing chunk {i+1}: {e}")
+            chunk_cache_path = None
+            if cache_dir:
+                chunk_hash = hashlib.blake2b(chunk_bytes, digest_size=16).hexdigest()
+                chunk_cache_path = os.path.join(cache_dir, f"{chunk_hash}_{transcription_model}_chunk.txt")
+                cached_transcript = _read_cached_transcript(chunk_cache_path)
+                if cached_transcript is not None:
+                    logger.info("Chunk %s/%s: using cached transcript", i+1, num_chunks)
+                    return chunk_header + cached_transcript
+            
+            transcript_response = _transcribe_rate_limited(
+                audio_client,
+                model=transcription_model,
+                file=(f"chunk_{i}.ogg", chunk_bytes),
+                prompt=CHUNK_TRANSCRIPTION_PROMPT
+            )
+            if chunk_cache_path:
+                _write_transcript(chunk_cache_path, transcript_response.text)
+            return chunk_header + transcript_response.text
+        except Exception:
+            logger.warning("Error transcribing chunk %s", i+1, exc_info=True)
             # Add a placeholder for the failed chunk
-            transcripts.append(f"[Transcription failed for segment {i+1}]")
-            # Wait a bit longer if we hit an error (might be rate limiting)
-            time.sleep(5)
-        finally:
-            # Clean up the temporary chunk file
-            try:
-                os.remove(chunk_path)
-            except Exception as e:
-                print(f"Error removing chunk file: {e}")
-    
-    # Clean up the temporary directory
-    try:
-        shutil.rmtree(temp_dir)
-    except Exception as e:
-        print(f"Error removing temporary directory: {e}")
+            return f"[Transcription failed for segment {i+1}]"
+
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    # Filled by index as chunks finish in any order
+    raw_chunks = [None] * num_chunks
+    transcripts = [None] * num_chunks
+    lock = threading.Lock()
+
+    def transcribe_and_report(i):
+        chunk_transcript = transcribe_chunk(i)
+        with lock:
+            raw_chunks[i] = chunk_transcript
+            # A chunk is final once the chunk before it is in, since its seam is trimmed against it
+            for j in range(i, min(i + 2, num_chunks)):
+                if raw_chunks[j] is not None and transcripts[j] is None and (j == 0 or raw_chunks[j - 1] is not None):
+                    transcripts[j] = raw_chunks[j] if j == 0 else _trim_seam_overlap(raw_chunks[j - 1], raw_chunks[j])
+                    if on_chunk:
+                        on_chunk(j, transcripts[j])
+
+    # Encoding and transcription are per-chunk subprocess and network work, so the
+    # chunks are processed concurrently and reassembled in chunk order
+    workers = api_config.get('transcription_workers', CHUNK_TRANSCRIPTION_WORKERS)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, num_chunks))) as executor:
+        list(executor.map(transcribe_and_report, range(num_chunks)))
     
     # Combine all transcripts
     combined_transcript = "\n\n".join(transcripts)
@@ -622,7 +798,7 @@ Continue the transcription, maintaining speaker consistency and dialogue structu
     return combined_transcript
 
 # Keep the original function for backward compatibility
-def split_and_transcribe(audio_path, api_config, max_size_mb=25, max_duration_seconds=1500, audio=None):
+def split_and_transcribe(audio_path, api_config, max_size_mb=25, max_duration_seconds=1500, audio_info=None):
     """
     Split an audio file into chunks and transcribe each chunk (without context preservation)
     
@@ -631,15 +807,27 @@ def split_and_transcribe(audio_path, api_config, max_size_mb=25, max_duration_se
         api_config: Dictionary containing API configuration
         max_size_mb: Maximum file size in MB
         max_duration_seconds: Maximum duration in seconds
-        audio: Pre-loaded AudioSegment (optional)
+        audio_info: AudioInfo already gathered for audio_path (optional)
         
     Returns:
         str: Combined transcript from all chunks
     """
-    return split_and_transcribe_with_context(audio_path, api_config, max_size_mb, max_duration_seconds, audio)
+    return split_and_transcribe_with_context(audio_path, api_config, max_size_mb, max_duration_seconds, audio_info)
+
+@functools.lru_cache(maxsize=32)
+def probe_media(path):
+    """Read a media file's streams and container format with a single ffprobe call"""
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-print_format', 'json', '-show_streams', '-show_format', path
+    ], check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+def get_duration_seconds(path):
+    """Read a media file's duration from its container with ffprobe"""
+    return float(probe_media(path)['format']['duration'])
 
+@functools.lru_cache(maxsize=4096)
 def format_timestamp(seconds):
     """Format seconds into MM:SS format"""
-    minutes = int(seconds // 60)
-    seconds = int(seconds % 60)
+    minutes, seconds = divmod(int(seconds), 60)
     return f"{minutes:02d}:{seconds:02d}"
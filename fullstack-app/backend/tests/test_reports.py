@@ -1,23 +1,28 @@
 import json
+from concurrent import futures
 from pathlib import Path
 
+import anyio
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 
 from app.main import app
 from app.core import storage
+from app.core.security import require_auth
+from app.formatting import formatter
 from app.services import report_service
 
 
 class StubOrchestrator:
+    # Written once per session by the docx_artifact fixture
+    ARTIFACT: Path
+
     def _build_results(self, output_dir, company_data):
-        doc_path = Path(output_dir) / "test_report.docx"
-        doc_path.write_bytes(b"docx-content")
         return {
             "status": "success",
             "company_data": company_data,
             "final_report_content": "**AI Maturity Level:** n/a",
-            "final_report_path": str(doc_path),
+            "final_report_path": str(self.ARTIFACT),
         }
 
     def process_transcript(self, transcript, output_dir, company_data, **kwargs):
@@ -27,88 +32,497 @@ class StubOrchestrator:
         return self._build_results(output_dir, company_data)
 
 
-@pytest.fixture(autouse=True)
-def reset_store(monkeypatch, tmp_path):
-    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
-    storage.REPORT_STORE.clear()
-    storage.OUTPUT_DIR = tmp_path
-    yield
+@pytest.fixture(scope="session", autouse=True)
+def docx_artifact(tmp_path_factory):
+    doc_path = tmp_path_factory.mktemp("stub") / "test_report.docx"
+    doc_path.write_bytes(b"docx-content")
+    StubOrchestrator.ARTIFACT = doc_path
+    return doc_path
+
+
+@pytest.fixture()
+def anyio_backend():
+    return "asyncio"
 
 
 @pytest.fixture()
-def client(monkeypatch):
+def stub_orchestrator(monkeypatch):
     def stub_get_orchestrator(api_config, verification_rounds, use_langgraph):
         return StubOrchestrator()
 
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
     monkeypatch.setattr(report_service, "get_orchestrator", stub_get_orchestrator)
-    return TestClient(app)
 
 
-def test_health_endpoints(client):
-    response = client.get("/")
+@pytest.fixture(scope="module")
+def company_data():
+    return {
+        "company_name": "Acme",
+        "country": "Finland",
+        "consultation_date": "01-01-2025",
+        "experts": "Expert A",
+        "customer_manager": "Manager B",
+        "consultation_type": "Regular",
+    }
+
+
+@pytest.fixture()
+def report_store():
+    return storage.ReportStore(storage.REPORT_STORE_MAX_SIZE)
+
+
+@pytest.fixture()
+async def client(stub_orchestrator, report_store, tmp_path):
+    # Each test gets its own store and output directory through the app's dependencies
+    app.dependency_overrides[require_auth] = lambda: "test-user"
+    app.dependency_overrides[storage.get_report_store] = lambda: report_store
+    app.dependency_overrides[storage.get_output_dir] = lambda: tmp_path
+    # Requests run in-process on the test's event loop instead of through a portal thread
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+        yield async_client
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.anyio
+async def test_health_endpoints(client):
+    response = await client.get("/")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
-    response = client.get("/test")
+    response = await client.get("/test")
     assert response.status_code == 200
     assert response.json()["status"] == "success"
 
 
-def test_create_report_from_transcript(client):
-    payload = {
+def transcript_request(company_data, **fields):
+    return {"json": {
         "transcript": "Sample transcript text",
-        "company_data": {
-            "company_name": "Acme",
-            "country": "Finland",
-            "consultation_date": "01-01-2025",
-            "experts": "Expert A",
-            "customer_manager": "Manager B",
-            "consultation_type": "Regular",
-        },
+        "company_data": company_data,
         "use_azure": False,
         "selected_model": "gpt-4.1",
         "verification_rounds": 2,
         "use_langgraph": False,
+        **fields,
+    }}
+
+
+def recording_request(company_data):
+    return {
+        "files": {"file": ("meeting.mp3", b"audio-bytes", "audio/mpeg")},
+        "data": {
+            "company_data": json.dumps(company_data),
+            "use_azure": "false",
+            "selected_model": "gpt-4.1",
+            "verification_rounds": "2",
+            "compress_audio": "true",
+            "use_langgraph": "false",
+        },
     }
 
-    response = client.post("/reports/from-transcript", json=payload)
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("endpoint, build_request", [
+    ("from-transcript", transcript_request),
+    ("from-recording", recording_request),
+])
+async def test_create_report(client, company_data, endpoint, build_request):
+    response = await client.post(f"/reports/{endpoint}", **build_request(company_data))
     assert response.status_code == 200
     body = response.json()
     assert body["status"] == "success"
     assert "report_id" in body
 
     report_id = body["report_id"]
-    stored = client.get(f"/reports/{report_id}")
+    stored = await client.get(f"/reports/{report_id}")
     assert stored.status_code == 200
     assert stored.json()["status"] == "success"
 
-    download = client.get(f"/reports/{report_id}/download")
+    download = await client.get(f"/reports/{report_id}/download")
     assert download.status_code == 200
     assert download.content == b"docx-content"
 
 
-def test_create_report_from_recording(client, tmp_path):
-    company_data = {
-        "company_name": "Acme",
-        "country": "Finland",
-        "consultation_date": "01-01-2025",
-        "experts": "Expert A",
-        "customer_manager": "Manager B",
-        "consultation_type": "Regular",
-    }
+@pytest.mark.anyio
+async def test_download_report_honours_etag(client, company_data):
+    response = await client.post("/reports/from-transcript", **transcript_request(company_data))
+    report_id = response.json()["report_id"]
+    # Computed once the DOCX is written, not on first download
+    etag = (await client.get(f"/reports/{report_id}")).json()["etag"]
+    assert etag
+
+    download = await client.get(f"/reports/{report_id}/download")
+    assert download.status_code == 200
+    assert download.headers["etag"] == etag
+    assert download.headers["content-disposition"].endswith('filename="Acme.docx"')
+
+    cached = await client.get(f"/reports/{report_id}/download", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+@pytest.mark.anyio
+async def test_download_reports_failed_docx_render(client, report_store, company_data, monkeypatch, tmp_path):
+    doc_path = str(tmp_path / "failed.docx")
+
+    class RenderingOrchestrator(StubOrchestrator):
+        def _build_results(self, output_dir, company_data):
+            results = super()._build_results(output_dir, company_data)
+            results["final_report_path"] = doc_path
+            formatter.submit_word_doc(results["final_report_content"], company_data, doc_path)
+            return results
+
+    def failed_render(report_content, company_data):
+        raise ValueError("render failed")
 
+    monkeypatch.setattr(formatter, "_render_word_doc_in_process", failed_render)
+    monkeypatch.setattr(report_service, "get_orchestrator", lambda *args: RenderingOrchestrator())
+    response = await client.post("/reports/from-transcript", **transcript_request(company_data))
+    report_id = response.json()["report_id"]
+    futures.wait([formatter.pending_word_doc(doc_path)])
+
+    # The failure is still reported after the render has finished, on every download
+    for _ in range(2):
+        download = await client.get(f"/reports/{report_id}/download")
+        assert download.status_code == 500
+        assert "render failed" in download.json()["detail"]
+
+    # Evicting the report drops the failed render
+    report_store.max_size = 0
+    report_store["other"] = {"results": {}}
+    assert formatter.pending_word_doc(doc_path) is None
+
+
+@pytest.mark.anyio
+async def test_create_report_from_recording_rejects_invalid_company_data(client):
     files = {
         "file": ("meeting.mp3", b"audio-bytes", "audio/mpeg"),
     }
     data = {
-        "company_data": json.dumps(company_data),
+        "company_data": json.dumps({"company_name": "Acme"}),
         "use_azure": "false",
-        "selected_model": "gpt-4.1",
-        "verification_rounds": "2",
-        "compress_audio": "true",
-        "use_langgraph": "false",
     }
 
-    response = client.post("/reports/from-recording", files=files, data=data)
-    assert response.status_code == 200
-    assert response.json()["status"] == "success"
+    response = await client.post("/reports/from-recording", files=files, data=data)
+    assert response.status_code == 400
+    missing = {error["loc"][0] for error in response.json()["detail"] if error["type"] == "missing"}
+    assert "country" in missing
+
+
+@pytest.mark.anyio
+async def test_report_html_is_rendered_once(client, company_data, monkeypatch):
+    calls = []
+
+    def fake_format(report_content, company_data):
+        calls.append(report_content)
+        return "<div>report</div>"
+
+    monkeypatch.setattr(report_service, "format_report_as_html", fake_format)
+
+    response = await client.post("/reports/from-transcript", **transcript_request(company_data))
+    report_id = response.json()["report_id"]
+
+    for _ in range(2):
+        response = await client.get(f"/reports/{report_id}/html")
+        assert response.status_code == 200
+        assert response.text == "<div>report</div>"
+    assert len(calls) == 1
+
+
+def test_report_store_evicts_least_recently_used(tmp_path):
+    store = storage.ReportStore(max_size=2)
+    paths = []
+    for index in range(3):
+        doc_path = tmp_path / f"report_{index}.docx"
+        doc_path.write_bytes(b"docx")
+        paths.append(doc_path)
+        store[f"id-{index}"] = {"status": "completed", "results": {"final_report_path": str(doc_path)}}
+        if index == 1:
+            store.get("id-0")
+
+    assert list(store) == ["id-0", "id-2"]
+    assert not paths[1].exists()
+    assert paths[0].exists() and paths[2].exists()
+
+
+def test_report_sections_keep_inline_bold_and_bullets(company_data):
+    from app.formatting.formatter import format_report_as_html
+    from app.formatting.sections import Block, parse_report_sections
+
+    report = (
+        "**AI Maturity Level:** The company is **moderate** in maturity.\n"
+        "- uses ML\n"
+        "- has data\n\n"
+        "**Recommendations:** Start small."
+    )
+
+    assert parse_report_sections(report) == (
+        ("AI Maturity Level", (
+            Block("para", "The company is **moderate** in maturity."),
+            Block("bullets", ("uses ML", "has data")),
+        )),
+        ("Recommendations", (Block("para", "Start small."),)),
+    )
+
+    html = format_report_as_html(report, company_data)
+    assert "<p>The company is <strong>moderate</strong> in maturity.</p><ul><li>uses ML</li><li>has data</li></ul>" in html
+
+
+def test_structure_check_flags_missing_and_out_of_order_sections():
+    from app.agents.report_agent import get_sample_report
+    from app.agents.verification_agent import check_report_structure
+
+    sample = get_sample_report()
+    assert check_report_structure(sample, sample) == []
+
+    issues = check_report_structure("**Recommendations:** x\n**AI Maturity Level:** y", sample)
+    missing = {issue["section"] for issue in issues if issue["type"] == "Missing Section"}
+    assert "Data Collection Strategy" in missing
+    assert "Recommendations" not in missing
+    assert any(issue["type"] == "Section Order" for issue in issues)
+
+
+def test_llm_cache_replays_stored_result():
+    from app.agents.report_agent import ReportResult
+    from app.core.llm_cache import LLMCache, MemoryBackend
+
+    cache = LLMCache(MemoryBackend(ttl=60))
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return ReportResult(report_content="report", company_data={"company_name": "Acme"}, report_summary="summary")
+
+    api_config = {"model": "gpt-test"}
+    first = cache.cached_call("generate", api_config, {"transcript": "t"}, ReportResult, generate)
+    second = cache.cached_call("generate", api_config, {"transcript": "t"}, ReportResult, generate)
+    cache.cached_call("generate", api_config, {"transcript": "other"}, ReportResult, generate)
+
+    assert second == first
+    assert len(calls) == 2
+
+    # Same inputs reached through a different feedback chain must not replay
+    cache.cached_call("revise", api_config, {"report": "r"}, ReportResult, generate, context={"round": 1})
+    cache.cached_call("revise", api_config, {"report": "r"}, ReportResult, generate, context={"round": 2})
+    cache.cached_call("revise", api_config, {"report": "r"}, ReportResult, generate, context={"round": 2})
+    assert len(calls) == 4
+
+
+def test_fallback_and_truncated_verifications_are_not_cached(monkeypatch):
+    from types import SimpleNamespace
+
+    import orjson
+
+    from app.agents import report_agent, verification_agent
+    from app.core.llm_cache import LLMCache, MemoryBackend
+
+    issue = {"type": "Missing Section", "section": "Recommendations", "description": "d", "suggestion": "s",
+             "severity": "High"}
+    streamed = orjson.dumps({"score": 4, "issues": [issue] * 4}).decode()
+
+    class Stream(list):
+        def close(self):
+            pass
+
+    # Streams a response the verifier stops reading once a blocking issue is complete
+
+    def create(**kwargs):
+        if kwargs["model"] == "broken":
+            raise RuntimeError("verifier unavailable")
+        return Stream(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=streamed[i:i + 20]))])
+                      for i in range(0, len(streamed), 20))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(verification_agent, "get_openai_client", lambda api_config: client)
+    sample = report_agent.get_sample_report()
+    cache = LLMCache(MemoryBackend(ttl=60))
+    calls = []
+
+    def verify(model):
+        calls.append(model)
+        return verification_agent.verify_report_content(sample, "transcript", api_config={"model": model})
+
+    for model, status in (("broken", "fallback"), ("gpt-4.1", "truncated")):
+        for _ in range(2):
+            result = cache.cached_call("verify", {"model": model}, {"report": sample}, verification_agent.VerificationResult,
+                                       lambda: verify(model), store_if=lambda verified: verified.status == "completed")
+            assert result.status == status
+
+    assert calls == ["broken", "broken", "gpt-4.1", "gpt-4.1"]
+
+
+def test_app_logs_are_written_without_the_listener(monkeypatch):
+    import io
+    import logging
+
+    from app.core import log
+
+    output = io.StringIO()
+    monkeypatch.setattr(log._direct_handler, "stream", output)
+    logging.getLogger("app.tests").info("before start")
+    log.start_logging()
+    log.stop_logging()
+    logging.getLogger("app.tests").info("after stop")
+
+    assert output.getvalue() == "before start\nafter stop\n"
+
+
+def test_revision_feedback_is_matched_to_report_sections():
+    from app.agents.revision_agent import _match_section_name
+
+    sections = ["Company Info", "Technical Expertise and Capability", "Recommendations"]
+
+    assert _match_section_name("Recommendations section", sections) == "Recommendations"
+    assert _match_section_name("technical expertise", sections) == "Technical Expertise and Capability"
+    assert _match_section_name("General", sections) is None
+
+
+def test_workflow_history_fields_append_through_reducers(monkeypatch, tmp_path):
+    import asyncio
+
+    from app.agents import report_agent, revision_agent, verification_agent
+    from app.orchestrators import langgraph_orchestrator as orchestrator
+
+    sample = report_agent.get_sample_report()
+
+    def verify(report, transcript, notes, instructions, round_number, api_config, **kwargs):
+        needs_revision = round_number == 1
+        return verification_agent.VerificationResult(
+            score=6 if needs_revision else 9, issues=[], suggestions=[], summary="", strengths=[],
+            needs_revision=needs_revision, round_number=round_number, decision_explanation="",
+        )
+
+    monkeypatch.setattr(report_agent, "generate_report_content", lambda *args: report_agent.ReportResult(
+        report_content=sample, company_data={}, report_summary=""))
+    monkeypatch.setattr(verification_agent, "verify_report_content", verify)
+    monkeypatch.setattr(revision_agent, "revise_report_content", lambda report, *args: revision_agent.RevisionResult(
+        revised_report=report, revision_notes="notes", issues_addressed=0, suggestions_implemented=0,
+        revision_summary=""))
+    monkeypatch.setattr("app.formatting.formatter.submit_word_doc", lambda *args: None)
+
+    state = orchestrator.WorkflowState(
+        output_dir=str(tmp_path), company_data={"company_name": "Acme"}, api_config={"model": "gpt-4.1"},
+        transcript="transcript", verification_rounds=3, status="transcription_skipped",
+    )
+    final = orchestrator._as_workflow_state(asyncio.run(orchestrator.build_workflow_graph().ainvoke(state)))
+
+    assert final.status == "completed"
+    assert [entry["round"] for entry in final.verification_history] == [1, 2]
+    assert len(final.report_history) == 2
+    assert final.revision_notes == ["notes"]
+
+
+@pytest.mark.anyio
+async def test_recording_batches_share_the_report_slots(monkeypatch, tmp_path):
+    import threading
+
+    from app.orchestrators import langgraph_orchestrator as orchestrator
+
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def process_recording(file_path, output_dir, company_data, *args, report_id=None):
+        with lock:
+            running.append(file_path)
+            peak.append(len(running))
+        threading.Event().wait(0.1)
+        with lock:
+            running.remove(file_path)
+        if file_path == "broken.mp3":
+            return {"status": "failed", "error": "Transcription failed", "company_data": company_data}
+        return {"status": "success", "company_data": company_data, "final_report_path": f"{report_id}.docx"}
+
+    workflow = orchestrator.LangGraphOrchestrator({"model": "gpt-4.1"}, 3)
+    monkeypatch.setattr(workflow, "process_recording", process_recording)
+    files = ["a.mp3", "broken.mp3", "c.mp3", "d.mp3"]
+    results = await workflow.process_recordings_batch(
+        files, str(tmp_path), [{"company_name": name} for name in files],
+        report_ids=["r1", "r2", "r3", "r4"], slots=anyio.Semaphore(2),
+    )
+
+    assert max(peak) == 2
+    assert [result["status"] for result in results] == ["success", "failed", "success", "success"]
+    assert [result["company_data"]["company_name"] for result in results] == files
+    assert results[3]["final_report_path"] == "r4.docx"
+
+
+def test_failed_verification_batch_fails_the_report(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+
+    from app.agents import report_agent, verification_agent
+    from app.orchestrators import sdk_orchestrator
+
+    class FailedBatchClient:
+        files = SimpleNamespace(create=lambda **kwargs: SimpleNamespace(id="file-1"))
+        batches = SimpleNamespace(
+            create=lambda **kwargs: SimpleNamespace(id="batch-1", status="failed", output_file_id=None),
+        )
+
+    sample = report_agent.get_sample_report()
+    monkeypatch.setattr(verification_agent, "get_openai_client", lambda api_config: FailedBatchClient())
+    monkeypatch.setattr(sdk_orchestrator, "generate_report_content", lambda *args: report_agent.ReportResult(
+        report_content=sample, company_data={}, report_summary=""))
+    batch_ids = []
+    api_config = {"model": "gpt-4.1", "verification_mode": "batch", "on_batch_submitted": batch_ids.append}
+
+    results = sdk_orchestrator.SDKOrchestrator(api_config, 1).process_transcript(
+        "transcript", str(tmp_path), {"company_name": "Acme"})
+
+    assert batch_ids == ["batch-1"]
+    assert results["status"] == "failed"
+    assert "batch-1" in results["error"]
+
+
+@pytest.mark.anyio
+async def test_batch_verification_reports_finish_in_background(client, report_store, company_data, monkeypatch):
+    import threading
+
+    release = threading.Event()
+
+    class SlowOrchestrator(StubOrchestrator):
+        def process_transcript(self, transcript, output_dir, company_data, **kwargs):
+            release.wait(5)
+            return super().process_transcript(transcript, output_dir, company_data, **kwargs)
+
+    monkeypatch.setattr(report_service, "get_orchestrator", lambda *args: SlowOrchestrator())
+    # Batch reports must not wait for a report slot
+    slots = anyio.Semaphore(1)
+    app.dependency_overrides[storage.get_report_slots] = lambda: slots
+    await slots.acquire()
+
+    request = transcript_request(company_data, verification_mode="batch")
+    with anyio.fail_after(5):
+        response = await client.post("/reports/from-transcript", **request)
+    assert response.json()["status"] == "pending_batch"
+    report_id = response.json()["report_id"]
+
+    release.set()
+    for _ in range(50):
+        if report_store[report_id]["status"] != "pending_batch":
+            break
+        await anyio.sleep(0.1)
+    assert report_store[report_id]["status"] == "success"
+
+
+@pytest.mark.anyio
+async def test_reports_wait_for_a_free_slot(client, report_store, company_data):
+    slots = anyio.Semaphore(1)
+    app.dependency_overrides[storage.get_report_slots] = lambda: slots
+    await slots.acquire()
+
+    request = transcript_request(company_data)
+    responses = []
+
+    async def post_report():
+        responses.append(await client.post("/reports/from-transcript", **request))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(post_report)
+        await anyio.sleep(0.2)
+        # The queued report waits on the event loop, not in a threadpool worker
+        assert not responses
+        assert not report_store
+        assert anyio.to_thread.current_default_thread_limiter().borrowed_tokens == 0
+        slots.release()
+
+    assert responses[0].json()["status"] == "success"